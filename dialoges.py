@@ -8,16 +8,21 @@ from   PyQt5.QtCore import QTimer
 import utilities
 import sys
 from   colorscheme import colorPopupDialogScheme
+from   ioMetrics import metrics
 
 
 class PopupDialog(QDialog):
     '''This Class define a simple own dialog for information without buttons.
+       Shown with exec() it blocks until it closes, shown with show() it does not.
        parameters:
        title = window title in the titleBar : str
        message     = textmessage : str
        displayTime = time to stay at the display (second * 10): int'''
+    openPopups = set()      # Keeps non-modal popups alive until they close
+
     def __init__(self, title, message, displayTime, colScheme):
         super().__init__()
+        PopupDialog.openPopups.add(self)
         self.count = 0
         self.displayTime = displayTime 
         # this will hide the title bar
@@ -41,8 +46,6 @@ class PopupDialog(QDialog):
         self.label1.setStyleSheet('QLabel{background-color:' + head + '}''QLabel{color:white}''QLabel{font: bold 20px}')
         self.label2.setStyleSheet('QLabel{background-color:' + body + '}')
 
-        # show all the widgets
-        self.show()
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.display)
         self.timer.start(100)
@@ -52,6 +55,7 @@ class PopupDialog(QDialog):
         if self.count > self.displayTime:
             self.timer.stop()
             self.close()
+            PopupDialog.openPopups.discard(self)
 
 
 #************************************************************************************
@@ -399,4 +403,53 @@ class LogFileRead(QDialog):
         print(logText)
         logfile.close
 
-        self.show()
\ No newline at end of file
+        self.show()
+
+
+#************************************************************************************
+class MetricsDialog(QDialog):
+    """Shows the latencies and counters of the mount connection from ioMetrics."""
+    def __init__(self):
+        super().__init__()
+        self.title = 'liomoco - transport metrics'
+        self.left = 10
+        self.top = 20
+        self.width = 800
+        self.height = 600
+        self.initUI()
+
+    def initUI(self):
+        self.setWindowTitle(self.title)
+        self.setGeometry(self.left, self.top, self.width, self.height)
+
+        self.textbox = QTextEdit(self)
+        self.textbox.setReadOnly(True)
+        self.textbox.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.textbox.move(20, 20)
+        self.textbox.resize(760, 520)
+
+        self.buttonRefresh = QPushButton('Refresh', self)
+        self.buttonRefresh.move(20, 555)
+        self.buttonRefresh.clicked.connect(self.refresh)
+        self.buttonExport = QPushButton('Export JSON', self)
+        self.buttonExport.move(130, 555)
+        self.buttonExport.clicked.connect(self.exportJson)
+        self.buttonReset = QPushButton('Reset', self)
+        self.buttonReset.move(240, 555)
+        self.buttonReset.clicked.connect(self.reset)
+        self.buttonClose = QPushButton('Close', self)
+        self.buttonClose.move(680, 555)
+        self.buttonClose.clicked.connect(self.close)
+        self.refresh()
+
+    def refresh(self):
+        self.textbox.setPlainText(metrics.formatTable())
+
+    def exportJson(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export metrics', 'metrics.json', 'JSON (*.json)')
+        if path:
+            metrics.exportJson(path)
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
@@ -0,0 +1,649 @@
+"""
+asyncio client for iOptron mounts.
+
+AsyncIoptron offers awaitable versions of the Ioptron methods for programs that
+drive several devices from one event loop. It talks to the mount through asyncio
+transports, a TCP connection to the WLAN bridge or the serial port, and never
+blocks the loop. Concurrent callers are serialized by the connection. Replies are
+framed by the command table in ioProtocol and parsed by the parse methods of
+Ioptron, so both clients keep the same state.
+
+    mount = await AsyncIoptron.connect()
+    await mount.refreshCoordinates()
+    print(mount.rightAscension, mount.declination)
+"""
+
+
+# Imports
+import os
+import time
+import serial
+import itertools
+import collections
+import asyncio
+import logging
+import utilities
+import ioProtocol
+from   ioMetrics     import metrics
+from   ioUtilities   import AdaptivePacing, IoConnection, extractFrame
+from   iOptronModel  import (Ioptron, Mount, Firmwares, Location, SystemStatus, Tracking, TimeSource,
+                             Hemisphere, Guiding, Pec, TimeInfo, RA, DEC, Altitude, Azimuth, meridian,
+                             Parking, MovingSpeed, SNAPSHOT_HISTORY)
+
+
+class MountProtocol(asyncio.Protocol):
+    """Collects the bytes from the mount for AsyncMountConnection."""
+    def __init__(self, connection):
+        self.connection = connection
+
+    def data_received(self, data):
+        self.connection.rxBuffer += data
+        self.connection.dataArrived.set()
+
+    def connection_lost(self, exc):
+        self.connection.mountIsConnected = False
+        self.connection.dataArrived.set()
+
+
+class AsyncMountConnection:
+    """Connection to the mount for AsyncIoptron. One exchange runs at a time, the
+    others wait for the lock in the order they came. Stop commands are written at
+    once, past the lock; the reply awaited meanwhile is dropped."""
+    def __init__(self, connectionType, floor):
+        self.pacing = AdaptivePacing(connectionType, floor = floor, gap = 0.01)
+        self.recvTimeout = 1.0       # Deadline for a complete reply
+        self.lastSendTime = 0.0
+        self.rxBuffer = bytearray()
+        self.dataArrived = asyncio.Event()
+        self.lock = asyncio.Lock()
+        self.replyStale = False      # Set by sendNow, the awaited reply is dropped
+        self.stopSent = False        # Set by sendNow, late replies are dropped by the next send
+        self.unreadReplies = collections.deque()   # Lengths of the replies the mount still owes
+        self.capabilities = None     # ioProtocol.Capabilities of the mount, once known
+        self.transports = []
+        self.writeTransport = None
+        self.mountIsConnected = False
+
+    @classmethod
+    async def openWlan(cls, ipAddress = '10.10.100.254', port = '8899'):
+        """Connect to the WLAN bridge of the mount."""
+        connection = cls('WLAN', floor = 0.005)
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_connection(lambda: MountProtocol(connection),
+                                                           ipAddress, int(port))
+        connection.transports.append(transport)
+        connection.writeTransport = transport
+        connection.mountIsConnected = True
+        logging.debug('async WLAN is connected ' + str(ipAddress) + ':' + str(port))
+        return connection
+
+    @classmethod
+    async def openUsb(cls, port = '/dev/ttyUSB0', baud = 115200):
+        """Open the serial port. pyserial sets up the port, its file descriptor is
+        then read and written by asyncio pipe transports."""
+        connection = cls('USB', floor = 0.002)
+        loop = asyncio.get_running_loop()
+        connection.serial = serial.Serial(port, int(baud), timeout = 0)
+        readFile = os.fdopen(os.dup(connection.serial.fileno()), 'rb', buffering = 0)
+        writeFile = os.fdopen(os.dup(connection.serial.fileno()), 'wb', buffering = 0)
+        readTransport, protocol = await loop.connect_read_pipe(lambda: MountProtocol(connection), readFile)
+        writeTransport, protocol = await loop.connect_write_pipe(asyncio.Protocol, writeFile)
+        connection.transports += [readTransport, writeTransport]
+        connection.writeTransport = writeTransport
+        connection.mountIsConnected = True
+        logging.debug('async USB serial port ' + port + ' connected')
+        return connection
+
+    def isOpen(self):
+        return self.mountIsConnected
+
+    async def waitForData(self, timeout):
+        """Wait up to timeout seconds for new bytes. Returns False on timeout."""
+        self.dataArrived.clear()
+        try:
+            await asyncio.wait_for(self.dataArrived.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    expectReplies = IoConnection.expectReplies
+    replyRead = IoConnection.replyRead
+
+    async def settleAfterStop(self):
+        """Drop the replies owed after a stop, see IoConnection.settleAfterStop."""
+        self.stopSent = False
+        owedReplies = list(self.unreadReplies)
+        self.unreadReplies.clear()
+        for replyLength in owedReplies:
+            deadline = time.monotonic() + self.recvTimeout
+            while extractFrame(self.rxBuffer, replyLength) is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.mountIsConnected or not await self.waitForData(remaining):
+                    logging.info('async reply owed after a stop not received: ' + str(bytes(self.rxBuffer)))
+                    self.rxBuffer.clear()
+                    return
+        self.rxBuffer.clear()
+
+    async def send(self, data):
+        """Send data after the pacing gap. Late replies of earlier commands are
+        dropped first, so they can not be taken for the reply of this one."""
+        gap = self.lastSendTime + self.pacing.gap - time.monotonic()
+        if gap > 0:
+            await asyncio.sleep(gap)
+        while self.stopSent:
+            await self.settleAfterStop()
+        self.rxBuffer.clear()
+        self.replyStale = False
+        self.expectReplies(data)
+        self.writeTransport.write(data.encode('utf-8'))
+        self.lastSendTime = time.monotonic()
+
+    def sendNow(self, data):
+        """Send data at once, also while an exchange waits for its reply. That
+        reply is dropped as stale. Used for emergency stops."""
+        self.replyStale = True
+        self.stopSent = True
+        self.expectReplies(data)
+        self.writeTransport.write(data.encode('utf-8'))
+        self.dataArrived.set()
+
+    async def recv(self, replyLength = None, timeout = None):
+        """Receive one reply like IoConnectionUSB.recv, without blocking the loop."""
+        deadline = time.monotonic() + (self.recvTimeout if timeout is None else timeout)
+        frame = extractFrame(self.rxBuffer, replyLength)
+        while frame is None and not self.replyStale and self.mountIsConnected:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await self.waitForData(remaining):
+                break
+            frame = extractFrame(self.rxBuffer, replyLength)
+        if frame is not None or not self.replyStale:
+            self.replyRead()
+        if self.replyStale:
+            # The rest of the reply stays owed and is dropped by settleAfterStop
+            logging.info('async reply dropped after emergency stop')
+            return ''
+        if frame is None:
+            frame = bytes(self.rxBuffer)
+            self.rxBuffer.clear()
+            logging.info('async reply timeout <- ' + str(frame))
+        return frame.decode('utf-8', 'replace')
+
+    checkReply = IoConnection.checkReply
+
+    async def query(self, command, timeout = None):
+        """Send a command and receive its reply, see IoConnection.query. Commands
+        the mount does not support get an empty reply at once, see IoWorker.submit."""
+        spec = ioProtocol.commandSpec(command)
+        if self.capabilities is not None and not self.capabilities.supports(spec):
+            # Not sent, the mount would not answer until the reply timeout
+            logging.debug('command ' + command + ' skipped, it needs ' + spec.requires)
+            return ''
+        async with self.lock:
+            startTime = time.monotonic()
+            await self.send(command)
+            reply = '' if spec.replyLength == 0 else await self.recv(spec.replyLength, timeout)
+            turnaround = time.monotonic() - startTime
+            metrics.recordExchange(spec.code, turnaround, len(command), len(reply))
+            self.checkReply(spec, reply)
+            return reply
+
+    async def queryBatch(self, commands, timeout = None):
+        """Send several commands in one write and split the replies, see
+        IoConnection.queryBatch."""
+        async with self.lock:
+            startTime = time.monotonic()
+            await self.send(''.join(commands))
+            replies = []
+            for command in commands:
+                spec = ioProtocol.commandSpec(command)
+                reply = '' if spec.replyLength == 0 else await self.recv(spec.replyLength, timeout)
+                self.checkReply(spec, reply)
+                replies.append(reply)
+            metrics.recordExchange('+'.join(ioProtocol.commandSpec(command).code for command in commands),
+                                   time.monotonic() - startTime, sum(map(len, commands)), sum(map(len, replies)))
+            return replies
+
+    def emergencyStop(self, command = ':Q#'):
+        """Send a stop command at once. Returns the time in seconds until it was
+        handed to the transport."""
+        startTime = time.monotonic()
+        self.sendNow(command)
+        latency = time.monotonic() - startTime
+        metrics.recordExchange(ioProtocol.commandSpec(command).code, latency, len(command), 0)
+        logging.info('async emergency stop ' + command + ' sent after %.3f ms' % (latency * 1000))
+        return latency
+
+    def close(self):
+        for transport in self.transports:
+            transport.close()
+        if hasattr(self, 'serial'):
+            self.serial.close()
+        self.mountIsConnected = False
+
+
+class AsyncIoptron:
+    """Awaitable counterpart of Ioptron. Holds the same state dataclasses, filled
+    by the parse methods of Ioptron."""
+    parseAllKindsOfStatus = Ioptron.parseAllKindsOfStatus
+    parseAltAndAz = Ioptron.parseAltAndAz
+    parseRaAndDec = Ioptron.parseRaAndDec
+    parseTimeInformation = Ioptron.parseTimeInformation
+    parseMovingSpeed = Ioptron.parseMovingSpeed
+    setDataclassDmsFromArcseconds = Ioptron.setDataclassDmsFromArcseconds
+    publishSnapshot = Ioptron.publishSnapshot
+    subscribe = Ioptron.subscribe
+    notifyChanges = Ioptron.notifyChanges
+    predictRaAndDec = Ioptron.predictRaAndDec
+    driftRate = Ioptron.driftRate
+
+    def __init__(self, connection, config = None):
+        self.scope = connection
+        self.config = utilities.readConfig() if config is None else config
+        self.myMount = Mount(connectionStatus = 'online')
+        self.location = Location()
+        self.firmware = Firmwares()
+        self.mountVersion = None
+        self.capabilities = ioProtocol.Capabilities.fromConfig(self.config)
+        self.mountStatus = None
+        self.systemStatus = SystemStatus()
+        self.tracking = Tracking()
+        self.movingSpeed = MovingSpeed()
+        self.timeSource = TimeSource()
+        self.hemisphere = Hemisphere()
+        self.guiding = Guiding()
+        self.isSlewing = False
+        self.pec = Pec()
+        self.time = TimeInfo()
+        self.rightAscension = RA()
+        self.declination = DEC()
+        self.pierSide = None
+        self.counterweightDirection = None
+        self.altitude = Altitude()
+        self.azimuth = Azimuth()
+        self.meridian = meridian()
+        self.parking = Parking()
+        self.snapshot = None
+        self.snapshotSequence = itertools.count(1)
+        self.history = collections.deque(maxlen = SNAPSHOT_HISTORY)
+        self.subscribers = []
+        self.reportedValues = {}
+
+    @classmethod
+    async def connect(cls, config = None):
+        """Open the connection set in setup.ini (or config) and identify the mount."""
+        config = utilities.readConfig() if config is None else config
+        if config['ConType'] == 'WLAN':
+            connection = await AsyncMountConnection.openWlan(config['IpAddress'], config['WLanPort'])
+        else:
+            connection = await AsyncMountConnection.openUsb(config['SerPort'], config['SerSpeed'])
+        mount = cls(connection, config)
+        await mount.identify()
+        return mount
+
+    async def identify(self):
+        """Read the firmwares and the model, and use the pacing learned for the model
+        and its capabilities."""
+        self.firmware.mainboard, self.firmware.handController = await self.getMainFirmwares()
+        self.firmware.rightAscention, self.firmware.declination = await self.getMotorFirmwares()
+        self.mountVersion = await self.getMountVersion()
+        self.scope.pacing.useModel(self.mountVersion)
+        self.capabilities = ioProtocol.capabilitiesOf(self.mountVersion, self.capabilities)
+        self.scope.capabilities = self.capabilities
+
+    def close(self):
+        self.scope.close()
+        self.myMount.connectionStatus = 'offline'
+
+    async def command(self, command):
+        """Send a command and return True if the mount answered '1'."""
+        return await self.scope.query(command) == '1'
+
+    # Status
+    async def getAllKindsOfStatus(self):
+        return self.parseAllKindsOfStatus(await self.scope.query(':GLS#'))
+
+    async def getAltAndAz(self):
+        return self.parseAltAndAz(await self.scope.query(':GAC#'))
+
+    async def getRaAndDec(self):
+        return self.parseRaAndDec(await self.scope.query(':GEP#'))
+
+    async def getTimeInformation(self):
+        return self.parseTimeInformation(await self.scope.query(':GUT#'))
+
+    async def refreshStatusBatch(self, withStatus: bool = False):
+        """See Ioptron.refreshStatusBatch."""
+        commands = [':GEP#', ':GAC#', ':GUT#']
+        parsers = [self.parseRaAndDec, self.parseAltAndAz, self.parseTimeInformation]
+        if withStatus is True:
+            commands.insert(0, ':GLS#')
+            parsers.insert(0, self.parseAllKindsOfStatus)
+        replies = await self.scope.queryBatch(commands)
+        results = [parse(reply) for parse, reply in zip(parsers, replies)]
+        if all(results):
+            self.publishSnapshot()
+        return all(results)
+
+    async def refreshCoordinates(self):
+        return await self.refreshStatusBatch()
+
+    async def refreshAllMountInformations(self):
+        await self.refreshStatusBatch(withStatus = True)
+        await self.getAltitudeLimit()
+        await self.getmeridianTreatment()
+
+    async def getAltitudeLimit(self):
+        fields = ioProtocol.splitReply('GAL', await self.scope.query(':GAL#'))
+        if fields is not None:
+            self.altitude.limit = fields['limit']
+        return self.altitude.limit
+
+    async def getmeridianTreatment(self):
+        if not self.capabilities.equatorial:
+            return
+        fields = ioProtocol.splitReply('GMT', await self.scope.query(':GMT#'))
+        if fields is None:
+            return
+        self.meridian.code = int(fields['code'])
+        self.meridian.degreeLimit = int(fields['degreeLimit'])
+
+    async def getGuidingRate(self):
+        fields = ioProtocol.splitReply('AG', await self.scope.query(':AG#'))
+        if fields is None:
+            return
+        self.guiding.rightAscentionRate = float(fields['rightAscentionRate']) * 0.01
+        self.guiding.declinationRate = float(fields['declinationRate']) * 0.01
+
+    async def getParkingPosition(self):
+        fields = ioProtocol.splitReply('GPC', await self.scope.query(':GPC#'))
+        if fields is None:
+            return
+        self.parking.altitude.arcseconds = float(fields['altitude'])
+        self.setDataclassDmsFromArcseconds(self.parking.altitude)
+        self.parking.azimuth.arcseconds = float(fields['azimuth'])
+        self.setDataclassDmsFromArcseconds(self.parking.azimuth)
+
+    async def getMainFirmwares(self):
+        fields = ioProtocol.splitReply('FW1', await self.scope.query(':FW1#'))
+        if fields is None:
+            return ('', '')
+        return (fields['mainboard'], fields['handController'])
+
+    async def getMotorFirmwares(self):
+        fields = ioProtocol.splitReply('FW2', await self.scope.query(':FW2#'))
+        if fields is None:
+            return ('', '')
+        return (fields['rightAscention'], fields['declination'])
+
+    async def getMountVersion(self):
+        return await self.scope.query(':MountInfo#')
+
+    async def getCoordinateMemory(self):
+        fields = ioProtocol.splitReply('QAP', await self.scope.query(':QAP#'))
+        if fields is not None:
+            self.tracking.memoryStore = fields['memoryStore']
+        return self.tracking.memoryStore
+
+    async def getCustomTrackingRate(self):
+        fields = ioProtocol.splitReply('GTR', await self.scope.query(':GTR#'))
+        if fields is None:
+            return
+        self.tracking.custom = round(float(fields['rate']) * 0.0001, 4)
+
+    async def getMaxSlewingSpeed(self):
+        fields = ioProtocol.splitReply('GSR', await self.scope.query(':GSR#'))
+        if fields is None:
+            return
+        speeds = {'7': 256, '8': 512, '9': self.config['trackingSpeeds'][9]}
+        return speeds.get(fields['maxSpeed'])
+
+    async def getRaGuidingFilterStatus(self):
+        if not (self.capabilities.equatorial and self.capabilities.encoders):
+            return None
+        self.guiding.hasRaFilter = True
+        reply = await self.scope.query(':GGF#')
+        if reply in ('0', '1'):
+            self.guiding.raFilterEnabled = reply == '1'
+        return self.guiding.raFilterEnabled
+
+    # PEC, eq mounts without encoders only
+    async def getPecIntegrity(self):
+        if not (self.capabilities.equatorial and self.capabilities.pec):
+            return
+        reply = await self.scope.query(':GPE#')
+        if reply in ('0', '1'):
+            self.pec.integrityComplete = reply == '1'
+
+    async def getPecRecordingStatus(self):
+        if not (self.capabilities.equatorial and self.capabilities.pec):
+            return
+        reply = await self.scope.query(':GPR#')
+        if reply in ('0', '1'):
+            self.pec.recording = reply == '1'
+
+    async def enablePecPlayback(self, enabled: bool):
+        if not (self.capabilities.equatorial and self.capabilities.pec):
+            return False
+        return await self.command(':SPP1#' if enabled is True else ':SPP0#')
+
+    async def startRecordingPec(self):
+        if not (self.capabilities.equatorial and self.capabilities.pec):
+            return False
+        return await self.command(':SPR1#')
+
+    async def stopRecordingPec(self):
+        if not (self.capabilities.equatorial and self.capabilities.pec):
+            return False
+        return await self.command(':SPR0#')
+
+    # Motion
+    async def setCommandedAxisFromDms(self, degrees, minutes, seconds, axis):
+        arcseconds = str(utilities.convertDmsToArcSeconds(degrees, minutes, seconds)).zfill(8)
+        commandDict = {'ra': 'SRA', 'dec': 'Sds', 'alt': 'Sas', 'az': 'Sz'}
+        assert axis in commandDict
+        return await self.command(':' + commandDict[axis] + arcseconds + '#')
+
+    async def setCommandedRightAscension(self, degrees, minutes, seconds):
+        return await self.setCommandedAxisFromDms(degrees, minutes, seconds, 'ra')
+
+    async def setCommandedDeclination(self, degrees, minutes, seconds):
+        return await self.setCommandedAxisFromDms(degrees, minutes, seconds, 'dec')
+
+    async def setCommandedAltitude(self, degrees, minutes, seconds):
+        return await self.setCommandedAxisFromDms(degrees, minutes, seconds, 'alt')
+
+    async def setCommandedAzimuth(self, degrees, minutes, seconds):
+        return await self.setCommandedAxisFromDms(degrees, minutes, seconds, 'az')
+
+    async def moveToDefinedRaAndDec(self):
+        return await self.command(':MS1#')
+
+    async def moveToDefinedAltAndAz(self):
+        return await self.command(':MSS#')
+
+    async def synchronizeMount(self):
+        return await self.command(':CM#')
+
+    async def moveInCardinalDirection(self, direction: str):
+        directions = {'north': 'mn', 'east': 'me', 'south': 'ms', 'west': 'mw'}
+        assert direction.lower() in directions
+        await self.scope.query(':' + directions[direction.lower()] + '#')
+        return True
+
+    async def moveNorth(self):
+        return await self.moveInCardinalDirection('north')
+
+    async def moveSouth(self):
+        return await self.moveInCardinalDirection('south')
+
+    async def moveEast(self):
+        return await self.moveInCardinalDirection('east')
+
+    async def moveWest(self):
+        return await self.moveInCardinalDirection('west')
+
+    async def moveInDirectionForNSeconds(self, direction: str, seconds: int):
+        directions = {'ra+': 'ZS', 'ra-': 'ZQ', 'dec+': 'ZE', 'dec-': 'ZC'}
+        assert direction.lower() in directions
+        assert 0 <= seconds <= 99999
+        await self.scope.query(':' + directions[direction.lower()] + str(seconds).zfill(5) + '#')
+        return True
+
+    async def moveRaPositive(self, seconds: int = 0):
+        return await self.moveInDirectionForNSeconds('ra+', seconds)
+
+    async def moveRaNegative(self, seconds: int = 0):
+        return await self.moveInDirectionForNSeconds('ra-', seconds)
+
+    async def moveDecPositive(self, seconds: int = 0):
+        return await self.moveInDirectionForNSeconds('dec+', seconds)
+
+    async def moveDecNegative(self, seconds: int = 0):
+        return await self.moveInDirectionForNSeconds('dec-', seconds)
+
+    async def goToZeroPosition(self):
+        await self.scope.query(':MH#')
+        self.isSlewing = True
+
+    async def goToMechanicalZeroPosition(self):
+        if self.capabilities.mechanicalZero:
+            await self.scope.query(':MSH#')
+            self.isSlewing = True
+
+    async def park(self):
+        self.parking.isParked = await self.command(':MP1#')
+        return self.parking.isParked
+
+    async def unpark(self):
+        await self.scope.query(':MP0#')
+        self.parking.isParked = False
+        return self.parking.isParked
+
+    def stopAllMovement(self):
+        """Stop all movement at once, not waiting for running exchanges. Returns
+        the time in seconds until the command was handed to the transport."""
+        latency = self.scope.emergencyStop(':Q#')
+        self.isSlewing = False
+        return latency
+
+    def stopEOrWMovement(self):
+        latency = self.scope.emergencyStop(':qR#')
+        self.isSlewing = False
+        return latency
+
+    def stopNOrSMovement(self):
+        latency = self.scope.emergencyStop(':qD#')
+        self.isSlewing = False
+        return latency
+
+    # Settings
+    async def setMovingSpeed(self, rate):
+        self.movingSpeed.code = rate
+        return await self.command(':SR' + str(rate) + '#')
+
+    async def setTrackingRate(self, rate):
+        return await self.command(':RT' + str(self.config[rate]) + '#')
+
+    async def setAltitudeLimit(self, limit: str):
+        self.altitude.limit = limit
+        return await self.command(':SAL' + limit + '#')
+
+    async def setCustomTrackingRate(self, rate):
+        """Set the custom tracking rate, n.nnnn of sidereal, sent as nnnnn like :GTR# answers."""
+        return await self.command(':RR' + f'{round(float(rate) * 10000):05d}' + '#')
+
+    async def setGuidingRate(self, rightAscention: float, declination: float):
+        """See Ioptron.setGuidingRate. The rates are sent as nn, hundredths of
+        sidereal, the format getGuidingRate reads back."""
+        assert self.capabilities.equatorial
+        assert 0.01 <= rightAscention <= 0.90 and 0.01 <= declination <= 0.90
+        self.guiding.rightAscentionRate = round(rightAscention, 2)
+        self.guiding.declinationRate = round(declination, 2)
+        return await self.command(':RG' + f'{round(self.guiding.rightAscentionRate * 100):02d}'
+                                  + f'{round(self.guiding.declinationRate * 100):02d}' + '#')
+
+    async def setRaGuidingFilterStatus(self, enabled: bool):
+        if not (self.capabilities.equatorial and self.capabilities.encoders):
+            return None
+        self.guiding.raFilterEnabled = enabled
+        await self.scope.query(':SGF1#' if enabled is True else ':SGF0#')
+        return True
+
+    async def setMaxSlewingSpeed(self, speed: str):
+        speedBits = {'256x': '7', '512x': '8', 'max': '9'}
+        assert speed in speedBits
+        await self.scope.query(':MSR' + speedBits[speed] + '#')
+        return True
+
+    async def setMeridianTreatment(self, treatment: str, limit: str):
+        self.meridian.code = treatment
+        self.meridian.degreeLimit = limit
+        if not self.capabilities.equatorial:
+            return False
+        return await self.command(':SMT' + treatment + limit + '#')
+
+    async def setParkingAltitude(self, degrees: int, minutes: int, seconds: float):
+        arcseconds = str(utilities.convertDmsToArcSeconds(degrees, minutes, seconds)).zfill(8)
+        return await self.command(':SPH' + arcseconds + '#')
+
+    async def setParkingAzimuth(self, degrees: int, minutes: int, seconds: float):
+        arcseconds = str(utilities.convertDmsToArcSeconds(degrees, minutes, seconds)).zfill(8)
+        return await self.command(':SPA' + arcseconds + '#')
+
+    async def setCurrentPositionAsZero(self):
+        return await self.command(':SZP#')
+
+    async def setHemisphere(self, direction: str):
+        assert direction.lower() in ['north', 'south', 'n', 's']
+        hemisphere = 0 if direction[0:1] == 's' else 1
+        await self.scope.query(':SHE' + str(hemisphere) + '#')
+        return True
+
+    async def setLatitude(self, latitude: float):
+        """Set the latitude in degrees, north is positive. Sent as signed 0.01 arc seconds."""
+        assert -90.0 <= latitude <= 90.0
+        self.location.latitude = latitude
+        return await self.command(f':SLA{round(utilities.convertDegreesToArcSeconds(latitude)):+09d}#')
+
+    async def setLongitude(self, longitude: float):
+        """Set the longitude in degrees, east is positive. Sent as signed 0.01 arc seconds."""
+        assert -180.0 <= longitude <= 180.0
+        self.location.longitude = longitude
+        return await self.command(f':SLO{round(utilities.convertDegreesToArcSeconds(longitude)):+09d}#')
+
+    # Time
+    async def setTime(self, dtString):
+        await self.scope.query(':SUT' + str(utilities.convertFormattedToJ2k(dtString)) + '#')
+
+    async def setPCTime(self):
+        await self.scope.query(':SUT' + str(utilities.getUtcTimeInJ2k()).zfill(13) + '#')
+
+    async def setTimezoneOffset(self, offset = None):
+        offset = utilities.getUtcOffsetMin() if offset is None else offset
+        tzOffset = str(offset).zfill(3)
+        return await self.command(':SG' + tzOffset + '#' if offset < 0 else ':SG+' + tzOffset + '#')
+
+    async def setDaylightSavings(self, dst: bool):
+        await self.scope.query(':SDS1#' if dst is True else ':SDS0#')
+        await self.getTimeInformation()
+
+    async def resetSettings(self, confirm: bool):
+        """Reset all settings to default and read the state back, see Ioptron.resetSettings."""
+        if confirm is True:
+            await self.scope.query(':RAS#')
+            await self.getAllKindsOfStatus()
+            await self.getTimeInformation()
+            await self.getRaAndDec()
+            await self.getAltAndAz()
+
+    async def startTracking(self):
+        if await self.command(':ST1#'):
+            self.tracking.isTracking = True
+            return True
+        return False
+
+    async def stopTracking(self):
+        if await self.command(':ST0#'):
+            self.tracking.isTracking = False
+            return True
+        return False
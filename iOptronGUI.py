@@ -10,15 +10,32 @@
 
 
 # Imports
-from   PyQt5 import QtCore, QtGui, QtWidgets
-from   PyQt5.QtCore import QTimer
+from   time import perf_counter, strftime, monotonic
+importStarted = perf_counter()
+import os
 import sys
 import logging
-from   time import *
-from   iOptronModel import *
-from   utilities import *
-from   dialoges import *
-from   colorscheme import *
+from   PyQt5 import QtCore, QtGui, QtWidgets
+from   PyQt5.QtCore import QTimer
+from   iOptronModel import Ioptron
+from   ioUtilities import IoConnectionError
+from   utilities import (checkValidFormat, convertArcSecondsToDms, convertArcSecondsToHms,
+                             convertDegreesToDms, readConfig)
+from   dialoges import PopupDialog, SetupDialog, LogFileRead, MetricsDialog
+from   colorscheme import colorMenuScheme, colorWidgetScheme
+from   ioMetrics import metrics
+from   qtAsyncio import asyncSlot
+import ioProtocol
+importFinished = perf_counter()
+
+FRAME_INTERVAL = 100        # ms between two renders of RA and DEC, independent of the polls
+
+
+class MountSignals(QtCore.QObject):
+    '''Signals handing the results of the I/O worker thread over to the GUI thread.'''
+    coordinatesPolled = QtCore.pyqtSignal(object)
+    allInformationsPolled = QtCore.pyqtSignal(object)
+    mountChanged = QtCore.pyqtSignal(object)
 
 
 class Ui_MainWindow(object):
@@ -28,6 +45,7 @@ class Ui_MainWindow(object):
         logging.debug('program is startet')
         self.colScheme = None
         self.scope = None
+        self.connecting = False
         font = QtGui.QFont()
         font.setPointSize(12)
         MainWindow.setFont(font)
@@ -711,6 +729,9 @@ class Ui_MainWindow(object):
         self.actionReadLogFile = QtWidgets.QAction(MainWindow)
         self.actionReadLogFile.setEnabled(True)
         self.actionReadLogFile.setObjectName("actionReadLogFile")
+        self.actionShowMetrics = QtWidgets.QAction(MainWindow)
+        self.actionShowMetrics.setEnabled(True)
+        self.actionShowMetrics.setObjectName("actionShowMetrics")
         self.actionBlueVersion = QtWidgets.QAction(MainWindow)
         self.actionBlueVersion.setObjectName("actionBlueVersion")
         self.actionCyanVersion = QtWidgets.QAction(MainWindow)
@@ -720,6 +741,7 @@ class Ui_MainWindow(object):
         self.actionYellowVersion = QtWidgets.QAction(MainWindow)
         self.actionYellowVersion.setObjectName("actionYellowVersion")
         self.menuFile.addAction(self.actionReadLogFile)
+        self.menuFile.addAction(self.actionShowMetrics)
         self.menuFile.addAction(self.actionExitApplication)
         self.menuMount.addSeparator()
         self.menuMount.addAction(self.actionWifiSearchAndConnect)
@@ -979,6 +1001,7 @@ class Ui_MainWindow(object):
         self.actionGreenVersion.setText(_translate("MainWindow", "Green Version"))
         self.actionWifiSearchAndConnect.setText(_translate("MainWindow", "Wifi search and connect"))
         self.actionReadLogFile.setText(_translate("MainWindow", "Read log file"))
+        self.actionShowMetrics.setText(_translate("MainWindow", "Transport metrics"))
         self.actionBlueVersion.setText(_translate("MainWindow", "Blue Version"))
         self.actionCyanVersion.setText(_translate("MainWindow", "Cyan Version"))
         self.actionMagentaVersion.setText(_translate("MainWindow", "Magenta Version"))
@@ -995,6 +1018,29 @@ class Ui_MainWindow(object):
         self.timerCycle = 0
         self.timerPollingCoordinates = QTimer()
         self.timerPollingCoordinates.timeout.connect(self.refreshCoordinates)
+        self.timerRenderFrame = QTimer()
+        self.timerRenderFrame.timeout.connect(self.renderFrame)
+        self.pollFuture = None
+        self.mountSignals = MountSignals()
+        self.mountSignals.coordinatesPolled.connect(self.coordinatesPolled)
+        self.mountSignals.allInformationsPolled.connect(self.allInformationsPolled)
+        self.mountSignals.mountChanged.connect(self.mountChanged)
+        self.renderedTexts = {}         # widget -> text shown by renderText
+        # Line edits changed by the user show another text than renderText set
+        for lineEdit in (self.lineEditDatePC, self.lineEditTimePC, self.lineEditOthersAltitudeLimit,
+                         self.lineEditOthersMeridianTreatmentValue):
+            lineEdit.textEdited.connect(lambda text, lineEdit = lineEdit: self.renderedTexts.pop(lineEdit, None))
+        # Widgets rendered from the changes of the mount, by field of iOptronModel.CHANGE_FIELDS.
+        # RA and DEC are rendered by renderFrame.
+        self.changeRenderers = {
+            'altitude': self.renderAltitude, 'azimuth': self.renderAzimuth,
+            'localTime': self.renderTime, 'dst': self.renderSummerTime,
+            'pierSide': self.renderPierSide, 'counterweightDirection': self.renderPointingState,
+            'systemStatus': self.renderSystemStatus, 'timeSource': self.renderTimeSource,
+            'gpsState': self.renderGps, 'hemisphere': self.renderLocation,
+            'latitude': self.renderLocation, 'longitude': self.renderLocation,
+            'trackingRate': self.renderTrackingRate, 'movingSpeed': self.renderMovingSpeed,
+        }
         self.t1 = None
         self.t2 = None
         self.t3 = None
@@ -1005,6 +1051,7 @@ class Ui_MainWindow(object):
 # Menu functions
 
         self.actionReadLogFile.triggered.connect(self.openReadLogFile)
+        self.actionShowMetrics.triggered.connect(self.openMetricsDialog)
         self.actionExitApplication.triggered.connect(self.exitApplication)
         
         self.actionWifiSearchAndConnect.triggered.connect(self.wifiSearchAndConnect)
@@ -1129,6 +1176,11 @@ class Ui_MainWindow(object):
         dlg = LogFileRead()
         dlg.exec()
 
+    def openMetricsDialog(self):
+        '''Method shows the latencies and counters of the mount connection.'''
+        dlg = MetricsDialog()
+        dlg.exec()
+
     def exitApplication(self):
         if self.scope != None:
             if self.scope.scope.mountIsConnected:
@@ -1146,12 +1198,53 @@ class Ui_MainWindow(object):
         info = PopupDialog('INFO: Wifi', 'This Funktion is not impemented.', 50, self.colScheme)
         info.exec()
 
-    def connectMount(self):
-        '''Method to connect the mount via USB or WLAN.'''
-        self.scope = Ioptron()
+    @asyncSlot
+    async def connectMount(self):
+        '''Method to connect the mount via USB or WLAN. The connection is opened on a
+           background thread, a progress dialog offers to cancel it and it is given up
+           after ConnectTimeout seconds.'''
+        if self.scope is not None or self.connecting:
+            return
+        self.connecting = True
+        deadline = float(readConfig()['ConnectTimeout'])
+        progress = QtWidgets.QProgressDialog('Connecting to the mount ...', 'Cancel', 0, 0,
+                                             self.centralwidget.window())
+        progress.setWindowTitle('Connection')
+        progress.setMinimumDuration(0)
+        import asyncio                      # Loaded with the first coroutine, not at startup
+        loop = asyncio.get_running_loop()
+        opening = loop.run_in_executor(None, Ioptron)
+        cancelled = loop.create_future()
+        progress.canceled.connect(lambda: cancelled.done() or cancelled.set_result(True))
+        progress.show()
+        await asyncio.wait({opening, cancelled}, timeout = deadline, return_when = asyncio.FIRST_COMPLETED)
+        progress.canceled.disconnect()     # Closing the dialog emits canceled too
+        progress.close()
+        self.connecting = False
+        if not opening.done():
+            # The thread can not be stopped, a connection it still opens is closed
+            opening.add_done_callback(self.closeAbandonedConnection)
+            if cancelled.done():
+                logging.info('Connecting cancelled.')
+                return
+            logging.error('No connection within ' + str(deadline) + ' s.')
+            PopupDialog('ERROR: Connection', 'No connection within ' + str(deadline) + ' s.',
+                        30, 'red').show()
+            return
+        try:
+            self.scope = opening.result()
+        except Exception as error:
+            logging.error('Connection failed: ' + repr(error))
+            PopupDialog('ERROR: Connection', str(error) or 'Connection failed.', 30, 'red').show()
+            return
+        self.scope.subscribe(self.mountSignals.mountChanged.emit, self.changeRenderers)
+        PopupDialog('INFO: ' + self.scope.mountConnectionType,
+                    'Mount is ' + self.scope.mountConnectionType + ' connected.', 10, 'gray').show()
         self.enableGroupBoxes()
         self.disableLineEdits()
-        self.scanStatus()
+        await self.scanStatus()
+        if self.scope is None:
+            return
         if self.scope.config['PollRefresh'] == '1:1':
             self.timerPollingOffset = 1
         elif self.scope.config['PollRefresh'] == '1:5':
@@ -1162,7 +1255,15 @@ class Ui_MainWindow(object):
             self.timerPollingOffset = 30
         else:
             self.timerPollingOffset = 0
-        self.timerPollingCoordinates.start(1000)
+        if self.scope.config['PollCoord'] != 'None':
+            self.timerPollingCoordinates.start(int(self.scope.config['PollCoord']) * 1000)
+        self.timerRenderFrame.start(FRAME_INTERVAL)
+
+    def closeAbandonedConnection(self, opening):
+        '''Close a connection opened after connecting was cancelled or timed out.'''
+        if not opening.cancelled() and opening.exception() is None:
+            opening.result().scope.close()
+            logging.info('Closed the connection opened too late.')
 
     def disconnectMount(self):
         '''Method disconnect the mount if it is connected.'''
@@ -1179,6 +1280,8 @@ class Ui_MainWindow(object):
             self.labelGPSActiv.setVisible(False)
             self.pushButtonSetDateAndTimeFromPC.setEnabled(False)
             self.timerPollingCoordinates.stop()
+            self.timerRenderFrame.stop()
+            self.renderedTexts.clear()      # The labels above are not set by renderText
             self.scope.scope.close()
             self.scope = None
             logging.info('Mount are disconnected.')
@@ -1304,86 +1407,103 @@ class Ui_MainWindow(object):
 # **************************************************************************************
 # Status funtion
 
-    def scanStatus(self):
+    async def scanStatus(self):
         # general informations
-        self.t1 = process_time()
-        self.refreshAllMountInformations()
+        self.t1 = perf_counter()
+        await self.scope.call(self.scope.refreshAllMountInformations)
+        if self.scope is None:
+            return
+        self.renderAllMountInformations()
         # time to read status informations
-        self.t2 = process_time()
-#        print('runtime start process: ',self.t2 - self.t1)
+        self.t2 = perf_counter()
+        metrics.recordCycle('scanStatus', self.t2 - self.t1)
 
 # **************************************************************************************
 # RadioButtons-Speed funtions
     '''This Methods changes the mount move speed.'''
 
-    def rBSpeed1xClicked(self):
+    @asyncSlot
+    async def rBSpeed1xClicked(self):
         if self.radioButton1x.isChecked():
-            self.scope.setMovingSpeed(1)
+            await self.scope.call(self.scope.setMovingSpeed, 1)
 #            print('1x')
 
-    def rBSpeed2xClicked(self):
+    @asyncSlot
+    async def rBSpeed2xClicked(self):
         if self.radioButton2x.isChecked():
-            self.scope.setMovingSpeed(2)
+            await self.scope.call(self.scope.setMovingSpeed, 2)
 #            print('2x')
 
-    def rBSpeed8xClicked(self):
+    @asyncSlot
+    async def rBSpeed8xClicked(self):
         if self.radioButton8x.isChecked():
-            self.scope.setMovingSpeed(3)
+            await self.scope.call(self.scope.setMovingSpeed, 3)
 #            print('8x')
 
-    def rBSpeed16xClicked(self):
+    @asyncSlot
+    async def rBSpeed16xClicked(self):
         if self.radioButton16x.isChecked():
-            self.scope.setMovingSpeed(4)
+            await self.scope.call(self.scope.setMovingSpeed, 4)
 #            print('16x')
 
-    def rBSpeed64xClicked(self):
+    @asyncSlot
+    async def rBSpeed64xClicked(self):
         if self.radioButton64x.isChecked():
-            self.scope.setMovingSpeed(5)
+            await self.scope.call(self.scope.setMovingSpeed, 5)
 #            print('64x')
 
-    def rBSpeed128xClicked(self):
+    @asyncSlot
+    async def rBSpeed128xClicked(self):
         if self.radioButton128x.isChecked():
-            self.scope.setMovingSpeed(6)
+            await self.scope.call(self.scope.setMovingSpeed, 6)
 #            print('128x')
 
-    def rBSpeed256xClicked(self):
+    @asyncSlot
+    async def rBSpeed256xClicked(self):
         if self.radioButton256x.isChecked():
-            self.scope.setMovingSpeed(7)
+            await self.scope.call(self.scope.setMovingSpeed, 7)
 #            print('256x')
 
-    def rBSpeed512xClicked(self):
+    @asyncSlot
+    async def rBSpeed512xClicked(self):
         if self.radioButton512x.isChecked():
-            self.scope.setMovingSpeed(8)
+            await self.scope.call(self.scope.setMovingSpeed, 8)
 #            print('512x')
 
-    def rBSpeedMaxClicked(self):
+    @asyncSlot
+    async def rBSpeedMaxClicked(self):
         if self.radioButtonMax.isChecked():
-            self.scope.setMovingSpeed(9)
+            await self.scope.call(self.scope.setMovingSpeed, 9)
 #            print('Max')
 
 # **************************************************************************************
 # RadioButtons-Tracking Rate funtions
     '''This Methods changes the mount tracking rate.'''
 
-    def rBTrackingSideralClicked(self):
+    @asyncSlot
+    async def rBTrackingSideralClicked(self):
         if self.radioButtonTrackingSideral.isChecked():
-            self.scope.setTrackingRate('Sidereal')
+            await self.scope.call(self.scope.setTrackingRate, 'Sidereal')
 
-    def rBTrackingLunarClicked(self):
+    @asyncSlot
+    async def rBTrackingLunarClicked(self):
         if self.radioButtonTrackingLunar.isChecked():
-            self.scope.setTrackingRate('Lunar')
+            await self.scope.call(self.scope.setTrackingRate, 'Lunar')
 
-    def rBTrackingSolarClicked(self):
+    @asyncSlot
+    async def rBTrackingSolarClicked(self):
         if self.radioButtonTrackingSolar.isChecked():
-            self.scope.setTrackingRate('Solar')
+            await self.scope.call(self.scope.setTrackingRate, 'Solar')
 
-    def rBTrackingKingClicked(self):
+    @asyncSlot
+    async def rBTrackingKingClicked(self):
         if self.radioButtonTrackingKing.isChecked():
-            self.scope.setTrackingRate('King')
+            await self.scope.call(self.scope.setTrackingRate, 'King')
 
-    def rBTrackingCustomClicked(self):
+    @asyncSlot
+    async def rBTrackingCustomClicked(self):
         if self.radioButtonTrackingCustom.isChecked():
-            self.scope.setTrackingRate('Custom')
+            await self.scope.call(self.scope.setTrackingRate, 'Custom')
 
 # **************************************************************************************
 # Buttons-Move funtions
@@ -1393,274 +1513,338 @@ class Ui_MainWindow(object):
         self.scope.stopAllMovement()
         self.scope.myMount.isInMotion = False
 
-    def buttonNorthWestClicked(self):
+    async def moveInDirections(self, *moves):
+        '''This Method runs the moves on the I/O worker. All are queued before the first
+           is awaited, so a stop clicked meanwhile cancels all of them.'''
+        scope = self.scope
+        calls = [scope.call(move, priority = ioProtocol.PRIORITY_MOTION) for move in moves]
+        for call in calls:
+            await call
+
+    @asyncSlot
+    async def buttonNorthWestClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveNorth()
-            self.scope.moveWest()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveNorth, self.scope.moveWest)
 
-    def buttonNorthClicked(self):
+    @asyncSlot
+    async def buttonNorthClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveNorth()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveNorth)
 
-    def buttonNorthEastClicked(self):
+    @asyncSlot
+    async def buttonNorthEastClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveNorth()
-            self.scope.moveEast()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveNorth, self.scope.moveEast)
 
-    def buttonWestClicked(self):
+    @asyncSlot
+    async def buttonWestClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveWest()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveWest)
     
-    def buttonEastClicked(self):
+    @asyncSlot
+    async def buttonEastClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveEast()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveEast)
 
-    def buttonSouthWestClicked(self):
+    @asyncSlot
+    async def buttonSouthWestClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveSouth()
-            self.scope.moveWest()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveSouth, self.scope.moveWest)
 
-    def buttonSouthClicked(self):
+    @asyncSlot
+    async def buttonSouthClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveSouth()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveSouth)
 
-    def buttonSouthEastClicked(self):
+    @asyncSlot
+    async def buttonSouthEastClicked(self):
         if self.scope.myMount.isInMotion:
             self.buttonStopClicked()
         else:
-            self.scope.moveSouth()
-            self.scope.moveEast()
             self.scope.myMount.isInMotion = True
+            await self.moveInDirections(self.scope.moveSouth, self.scope.moveEast)
 
 # **************************************************************************************
 # Button funtions
 
-    def buttonTrackingStartStopClicked(self):
+    @asyncSlot
+    async def buttonTrackingStartStopClicked(self):
         '''This Method starts and stops the mounts tracking.'''
-        if self.scope.tracking.isTracking:
-            self.scope.stopTracking()
-            self.scope.tracking.isTracking = False
-            self.labelGeneralInformationTracking.setText('Tracking: ' + str(self.scope.tracking.isTracking))
-            info = PopupDialog('INFO: Tracking', 'Tracking is stoped.', 20, self.colScheme)
-            info.exec()
+        scope = self.scope
+        if scope.tracking.isTracking:
+            await scope.call(scope.stopTracking)
+            scope.tracking.isTracking = False
+            self.labelGeneralInformationTracking.setText('Tracking: ' + str(scope.tracking.isTracking))
+            PopupDialog('INFO: Tracking', 'Tracking is stoped.', 20, self.colScheme).show()
         else:
-            self.scope.startTracking()
-            self.scope.tracking.isTracking = True
-            self.labelGeneralInformationTracking.setText('Tracking: ' + str(self.scope.tracking.isTracking))
-            info = PopupDialog('INFO: Tracking', 'Tracking is started.', 20, self.colScheme)
-            info.exec()
+            await scope.call(scope.startTracking)
+            scope.tracking.isTracking = True
+            self.labelGeneralInformationTracking.setText('Tracking: ' + str(scope.tracking.isTracking))
+            PopupDialog('INFO: Tracking', 'Tracking is started.', 20, self.colScheme).show()
 
-    def buttonZeroPositionClicked(self):
-        self.scope.goToZeroPosition()
-        info = PopupDialog('INFO: Zero Position', 'Mount is slewing to the zero position.', 20, self.colScheme)
-        info.exec()
+    @asyncSlot
+    async def buttonZeroPositionClicked(self):
+        await self.scope.call(self.scope.goToZeroPosition, priority = ioProtocol.PRIORITY_MOTION)
+        PopupDialog('INFO: Zero Position', 'Mount is slewing to the zero position.', 20, self.colScheme).show()
 
-    def buttonParkPositionClicked(self):
-        self.scope.park()
-        if self.scope.parking.isParked:
-            info = PopupDialog('INFO: Parking', 'Mount is parked.', 20, self.colScheme)
-            info.exec()
+    @asyncSlot
+    async def buttonParkPositionClicked(self):
+        if await self.scope.call(self.scope.park, priority = ioProtocol.PRIORITY_MOTION):
+            PopupDialog('INFO: Parking', 'Mount is parked.', 20, self.colScheme).show()
 
-    def buttonUnparkClicked(self):
-        self.scope.unpark()
-        if not self.scope.parking.isParked:
-            info = PopupDialog('INFO: Parking', 'Mount is unparked.', 20, self.colScheme)
-            info.exec()
+    @asyncSlot
+    async def buttonUnparkClicked(self):
+        if not await self.scope.call(self.scope.unpark, priority = ioProtocol.PRIORITY_MOTION):
+            PopupDialog('INFO: Parking', 'Mount is unparked.', 20, self.colScheme).show()
 
-    def buttonSynchronizeMountClicked(self):
-        if self.scope.synchronizeMount():
-            info = PopupDialog('INFO: Synchronize', 'Mount synchronize. The most recently defined\n RA and DEC, or ALT and AZ become the commanded values.', 20, self.colScheme)
-            info.exec()
+    @asyncSlot
+    async def buttonSynchronizeMountClicked(self):
+        if await self.scope.call(self.scope.synchronizeMount):
+            PopupDialog('INFO: Synchronize', 'Mount synchronize. The most recently defined\n RA and DEC, or ALT and AZ become the commanded values.', 20, self.colScheme).show()
 
 
 # **************************************************************************************
 # Timer funtions
 
     def refreshCoordinates(self):
-        '''This Method refreshes the mounts coordinates periodical timer controlled.'''
-        if not self.scope.myMount.isInIoProzess:
-            self.t3 = process_time()
-
-            if self.timerPollingOffset != 0:
-                if self.timerPollingOffset == self.timerCycle:
-                    self.timerCycle = 0
-                    self.refreshAllMountInformations()
-                else:
-                    self.timerCycle = self.timerCycle + 1
-                    self.scope.refreshCoordinates()
-                    # Ra, Dec write format strings
-                    d = f"{self.scope.rightAscension.hours:02d}"
-                    m = f"{self.scope.rightAscension.minutes:02d}"
-                    s = f"{self.scope.rightAscension.seconds:02.0f}"
-                    self.lineEditRA.selectAll()
-                    self.lineEditRA.insert(d + 'h' + m + 'min' + s + 's')
-                    d = f"{self.scope.declination.degrees:02d}"
-                    m = f"{self.scope.declination.minutes:02d}"
-                    s = f"{self.scope.declination.seconds:02.0f}"
-                    self.lineEditDEC.selectAll()
-                    self.lineEditDEC.insert(d + '°' + m + '\'' + s + '\"')
-                    # Alt, AZI write format strings
-                    d = f"{self.scope.altitude.degrees:02d}"
-                    m = f"{self.scope.altitude.minutes:02d}"
-                    s = f"{self.scope.altitude.seconds:02.0f}"
-                    self.lineEditALT.selectAll()
-                    self.lineEditALT.insert(d + '°' + m + '\'' + s + '\"')
-                    d = f"{self.scope.azimuth.degrees:03d}"
-                    m = f"{self.scope.azimuth.minutes:02d}"
-                    s = f"{self.scope.azimuth.seconds:02.0f}"
-                    self.lineEditAZI.selectAll()
-                    self.lineEditAZI.insert(d + '°' + m + '\'' + s + '\"')
-                    # Time and Date write format strings
-                    self.scope.getTimeInformation()
-                    dateAndTime = self.scope.time.formatted
-                    self.lineEditDate.selectAll()
-                    self.lineEditDate.insert(dateAndTime[0:10])
-                    self.lineEditTime.selectAll()
-                    self.lineEditTime.insert(dateAndTime[12:20])
-                    self.t4 = process_time()
-#            print('executing time: ',self.t4 - self.t3)
-
-    def refreshAllMountInformations(self):
-        '''This Method refreshes the all mount informations periodical timer controlled.'''
-        self.scope.getAllKindsOfStatus()
-        self.labelGeneralInformtionModel.setText('Mount Model: ' + str(self.scope.mountVersion))
-        self.labelGeneralInformtionMountStatus.setText('Mount Status: ' + self.scope.myMount.connectionStatus + ', ' + self.scope.mountConnectionType)
-        self.labelGeneralInformationTracking.setText('Tracking: ' + str(self.scope.tracking.isTracking))
-        self.labelGeneralInformtionStatus.setText('Status: ' + str(self.scope.systemStatus.description))
-        self.labelGeneralInformationTime.setText('Time Source: ' + str(self.scope.timeSource.description))
-        if self.scope.timeSource.description == 'GPS':
+        '''This Method starts the periodical, timer controlled refresh of the mounts
+           coordinates as one job on the I/O worker thread. The widgets are updated
+           when the results arrive.'''
+        if self.pollFuture is not None and not self.pollFuture.done():
+            return                              # last poll still running, skip this cycle
+        if self.timerPollingOffset != 0:
+            self.t3 = perf_counter()
+            if self.timerPollingOffset == self.timerCycle:
+                self.timerCycle = 0
+                self.pollFuture = self.scope.submit(self.scope.refreshAllMountInformations)
+                self.pollFuture.add_done_callback(self.mountSignals.allInformationsPolled.emit)
+            else:
+                self.timerCycle = self.timerCycle + 1
+                self.pollFuture = self.scope.submit(self.scope.refreshCoordinates)
+                self.pollFuture.add_done_callback(self.mountSignals.coordinatesPolled.emit)
+
+    def coordinatesPolled(self, future):
+        '''This Method is called in the GUI thread, when a coordinates poll is done.'''
+        if self.scope is None or future.cancelled():
+            return
+        self.renderConnectionStatus()
+        if future.exception() is not None:
+            logging.error('coordinates poll failed: ' + str(future.exception()))
+            return
+        self.t4 = perf_counter()
+        metrics.recordCycle('coordinatesPoll', self.t4 - self.t3)
+
+    def allInformationsPolled(self, future):
+        '''This Method is called in the GUI thread, when a full poll is done.'''
+        if self.scope is None or future.cancelled():
+            return
+        self.renderConnectionStatus()
+        if future.exception() is not None:
+            logging.error('mount informations poll failed: ' + str(future.exception()))
+            return
+        self.renderAllMountInformations()
+        self.t4 = perf_counter()
+        metrics.recordCycle('allInformationsPoll', self.t4 - self.t3)
+
+    def renderConnectionStatus(self):
+        '''This Method shows whether the mount is online or the connection is lost and
+           the I/O worker reconnects. The widgets stay usable meanwhile.'''
+        self.renderText(self.labelGeneralInformtionMountStatus, 'Mount Status: ' +
+                        self.scope.myMount.connectionStatus + ', ' + self.scope.mountConnectionType)
+
+    def showConnectionError(self, error):
+        '''This Method shows that a command did not reach the mount because the connection
+           is lost. The I/O worker reconnects meanwhile, the GUI stays usable.'''
+        logging.warning('command not sent: ' + str(error))
+        self.renderConnectionStatus()
+        PopupDialog('ERROR: connection', 'The mount is not connected, try again.', 20, self.colScheme).show()
+
+    def renderText(self, widget, text):
+        '''This Method shows text in a label or line edit, unless the widget shows it
+           already, so unchanged widgets are not laid out and painted again.'''
+        if self.renderedTexts.get(widget) != text:
+            self.renderedTexts[widget] = text
+            widget.setText(text)
+
+    def mountChanged(self, change):
+        '''This Method is called in the GUI thread for each value of the mount that
+           changed, see Ioptron.subscribe. Only the widgets of the value are rendered.'''
+        if self.scope is None:
+            return
+        self.changeRenderers[change.field](change.snapshot)
+
+    def renderFrame(self):
+        '''This Method renders RA and DEC every FRAME_INTERVAL ms. Between two polls they
+           are moved on by the tracking rate or the slewing speed, see predictRaAndDec.'''
+        if self.scope is None:
+            return
+        prediction = self.scope.predictRaAndDec(monotonic())
+        if prediction is not None:
+            self.renderRightAscension(prediction[0])
+            self.renderDeclination(prediction[1])
+
+    def renderRightAscension(self, arcseconds):
+        hours, minutes, seconds = convertArcSecondsToHms(arcseconds)
+        d = f"{hours:02d}"
+        m = f"{minutes:02d}"
+        s = f"{seconds:02.0f}"
+        self.renderText(self.lineEditRA, d + 'h' + m + 'min' + s + 's')
+
+    def renderDeclination(self, arcseconds):
+        degrees, minutes, seconds = convertArcSecondsToDms(arcseconds)
+        d = f"{degrees:02d}"
+        m = f"{minutes:02d}"
+        s = f"{seconds:02.0f}"
+        self.renderText(self.lineEditDEC, d + '°' + m + '\'' + s + '\"')
+
+    def renderAltitude(self, snapshot):
+        degrees, minutes, seconds = snapshot.altitudeDms
+        d = f"{degrees:02d}"
+        m = f"{minutes:02d}"
+        s = f"{seconds:02.0f}"
+        self.renderText(self.lineEditALT, d + '°' + m + '\'' + s + '\"')
+
+    def renderAzimuth(self, snapshot):
+        degrees, minutes, seconds = snapshot.azimuthDms
+        d = f"{degrees:03d}"
+        m = f"{minutes:02d}"
+        s = f"{seconds:02.0f}"
+        self.renderText(self.lineEditAZI, d + '°' + m + '\'' + s + '\"')
+
+    def renderTime(self, snapshot):
+        dateAndTime = snapshot.formattedTime
+        self.renderText(self.lineEditDate, dateAndTime[0:10])
+        self.renderText(self.lineEditTime, dateAndTime[12:20])
+
+    def renderSummerTime(self, snapshot):
+        self.renderText(self.lineEditSummerTime, str(snapshot.dst))
+
+    def renderPierSide(self, snapshot):
+        self.renderText(self.lineEditPier, snapshot.pierSide)
+
+    def renderPointingState(self, snapshot):
+        self.renderText(self.lineEditPointingState, snapshot.counterweightDirection)
+
+    def renderSystemStatus(self, snapshot):
+        description, isSlewing, isTracking, pecEnabled, isParked = snapshot.status.systemState
+        if description is not None:
+            self.renderText(self.labelGeneralInformtionStatus, 'Status: ' + description)
+        self.renderText(self.labelGeneralInformationTracking, 'Tracking: ' + str(self.scope.tracking.isTracking))
+
+    def renderTimeSource(self, snapshot):
+        description = snapshot.status.timeSourceDescription
+        self.renderText(self.labelGeneralInformationTime, 'Time Source: ' + str(description))
+        if description == 'GPS':
             self.groupBoxDateAndTime.setEnabled(False)
             self.pushButtonSetDateAndTimeFromPC.setEnabled(False)
             self.labelGPSActiv.setVisible(True)
         else:
             self.pushButtonSetDateAndTimeFromPC.setEnabled(True)
-        self.labelGeneralInformtionGPS.setText('GPS: ' + str(self.scope.location.gpsAvailable))
-        self.labelGeneralInformtionHemisphere.setText('Hemisphere: ' + self.scope.hemisphere.location)
 
-        # Location
-        if self.scope.hemisphere.location =='north':
+    def renderGps(self, snapshot):
+        self.renderText(self.labelGeneralInformtionGPS, 'GPS: ' + str(snapshot.status.gpsAvailable))
+
+    def renderLocation(self, snapshot):
+        status = snapshot.status
+        self.renderText(self.labelGeneralInformtionHemisphere, 'Hemisphere: ' + str(status.hemisphereLocation))
+        if status.hemisphereLocation == 'north':
             hemi = 'N'
         else:
             hemi = 'S'
-        if self.scope.location.longitude > 0:
+        if status.longitude > 0:
             longi = 'E'
         else:
             longi = 'W'
-        self.lineEditLatitude.selectAll()
-        lati = convertDegreesToDms(self.scope.location.latitude)
-        self.lineEditLatitude.insert(hemi + str(lati[0]) + '°' + str(lati[1]) + '\'' + str(round(lati[2],1)) + '\"')
-        self.lineEditLongitude.selectAll()
-        long = convertDegreesToDms(self.scope.location.longitude)
-        self.lineEditLongitude.insert(longi + str(long[0]) + '°' + str(long[1]) + '\'' + str(round(long[2],1)) + '\"')
-        # RA, DEC, ALT, AZI and Time
-        self.refreshCoordinates()
+        lati = convertDegreesToDms(status.latitude)
+        self.renderText(self.lineEditLatitude, hemi + str(lati[0]) + '°' + str(lati[1]) + '\'' + str(round(lati[2],1)) + '\"')
+        long = convertDegreesToDms(status.longitude)
+        self.renderText(self.lineEditLongitude, longi + str(long[0]) + '°' + str(long[1]) + '\'' + str(round(long[2],1)) + '\"')
+
+    def renderTrackingRate(self, snapshot):
+        button = {'0': self.radioButtonTrackingSideral, '1': self.radioButtonTrackingLunar,
+                  '2': self.radioButtonTrackingSolar, '3': self.radioButtonTrackingKing,
+                  '4': self.radioButtonTrackingCustom}.get(snapshot.status.trackingRate)
+        if button is not None:
+            button.setChecked(True)
+
+    def renderMovingSpeed(self, snapshot):
+        button = {'1': self.radioButton1x, '2': self.radioButton2x, '3': self.radioButton8x,
+                  '4': self.radioButton16x, '5': self.radioButton64x, '6': self.radioButton128x,
+                  '7': self.radioButton256x, '8': self.radioButton512x,
+                  '9': self.radioButtonMax}.get(snapshot.status.movingSpeed)
+        if button is not None:
+            button.setChecked(True)
+
+    def renderAllMountInformations(self):
+        '''This Method writes the settings and the firmware of the last full poll to the
+           widgets. The polled values are rendered when they change, see mountChanged.'''
+        self.renderText(self.labelGeneralInformtionModel, 'Mount Model: ' + str(self.scope.mountVersion))
+        self.renderText(self.labelGeneralInformtionMountStatus, 'Mount Status: ' + self.scope.myMount.connectionStatus + ', ' + self.scope.mountConnectionType)
+        self.renderText(self.labelGeneralInformationEncoders, 'Encoders: ' + ('yes' if self.scope.capabilities.encoders else 'no'))
         # Other Informations
-        self.lineEditSavedTR.selectAll()
-        self.lineEditSavedTR.insert(str(format(self.scope.tracking.custom,'.4f')))
-        self.lineEditSummerTime.selectAll()
-        self.lineEditSummerTime.insert(str(self.scope.time.dst))
-        self.lineEditPier.selectAll()
-        self.lineEditPier.insert(self.scope.pierSide)
-        self.lineEditPointingState.selectAll()
-        self.lineEditPointingState.insert(self.scope.counterweightDirection)
-        self.scope.getAltitudeLimit()
-        self.lineEditAltitudeLimitInfo.selectAll()
-        self.lineEditAltitudeLimitInfo.insert(str(self.scope.altitude.limit) + '°')
-        self.scope.getmeridianTreatment()
+        self.renderText(self.lineEditSavedTR, str(format(self.scope.tracking.custom,'.4f')))
+        self.renderText(self.lineEditAltitudeLimitInfo, str(self.scope.altitude.limit) + '°')
         if self.scope.meridian.code == 0:
             action = 'stop'
         else:
             action = 'flip'
-        self.lineEditTreatmentStopFlip.selectAll()
-        self.lineEditTreatmentStopFlip.insert(str(action))
-        self.lineEditTreatmentValue.selectAll()
-        self.lineEditTreatmentValue.insert(str(self.scope.meridian.degreeLimit) + '°')
-        self.lineEditFirmwareMainboard.selectAll()
-        self.lineEditFirmwareMainboard.insert(self.scope.firmware.mainboard)
-        self.lineEditFirmwareHandcontroller.selectAll()
-        self.lineEditFirmwareHandcontroller.insert(self.scope.firmware.handController)
-        self.lineEditFirmwareMotorRA.selectAll()
-        self.lineEditFirmwareMotorRA.insert(self.scope.firmware.rightAscention)
-        self.lineEditFirmwareMotorDEC.selectAll()
-        self.lineEditFirmwareMotorDEC.insert(self.scope.firmware.declination)
-        if self.scope.tracking.code == '0':
-            self.radioButtonTrackingSideral.setChecked(True)
-        elif self.scope.tracking.code == '1':
-            self.radioButtonTrackingLunar.setChecked(True)
-        elif self.scope.tracking.code == '2':
-            self.radioButtonTrackingSolar.setChecked(True)
-        elif self.scope.tracking.code == '3':
-            self.radioButtonTrackingKing.setChecked(True)
-        elif self.scope.tracking.code == '4':
-            self.radioButtonTrackingCustom.setChecked(True)
-        if self.scope.movingSpeed.code == '1':
-            self.radioButton1x.setChecked(True)
-        elif self.scope.movingSpeed.code == '2':
-            self.radioButton2x.setChecked(True)
-        elif self.scope.movingSpeed.code == '3':
-            self.radioButton8x.setChecked(True)
-        elif self.scope.movingSpeed.code == '4':
-            self.radioButton16x.setChecked(True)
-        elif self.scope.movingSpeed.code == '5':
-            self.radioButton64x.setChecked(True)
-        elif self.scope.movingSpeed.code == '6':
-            self.radioButton128x.setChecked(True)
-        elif self.scope.movingSpeed.code == '7':
-            self.radioButton256x.setChecked(True)
-        elif self.scope.movingSpeed.code == '8':
-            self.radioButton512x.setChecked(True)
-        elif self.scope.movingSpeed.code == '9':
-            self.radioButtonMax.setChecked(True)
-        self.lineEditTrackingRateValue.selectAll()
-        self.lineEditTrackingRateValue.insert(str(format(self.scope.tracking.custom,'.4f')))
+        self.renderText(self.lineEditTreatmentStopFlip, str(action))
+        self.renderText(self.lineEditTreatmentValue, str(self.scope.meridian.degreeLimit) + '°')
+        self.renderText(self.lineEditFirmwareMainboard, self.scope.firmware.mainboard)
+        self.renderText(self.lineEditFirmwareHandcontroller, self.scope.firmware.handController)
+        self.renderText(self.lineEditFirmwareMotorRA, self.scope.firmware.rightAscention)
+        self.renderText(self.lineEditFirmwareMotorDEC, self.scope.firmware.declination)
+        self.renderText(self.lineEditTrackingRateValue, str(format(self.scope.tracking.custom,'.4f')))
         #Settings 2
         if self.scope.time.summerTime == 1:
             self.comboBoxOthersSummerTime.setCurrentIndex(0)
         else:
             self.comboBoxOthersSummerTime.setCurrentIndex(1)
-        self.lineEditOthersAltitudeLimit.selectAll()
-        self.lineEditOthersAltitudeLimit.insert(str(self.scope.altitude.limit) + '°')
+        self.renderText(self.lineEditOthersAltitudeLimit, str(self.scope.altitude.limit) + '°')
         if self.scope.meridian.code == 0:
             self.comboBoxOthersMeridianTreatmentStopFlip.setCurrentIndex(0)
         else:
             self.comboBoxOthersMeridianTreatmentStopFlip.setCurrentIndex(1)
-        self.lineEditOthersMeridianTreatmentValue.selectAll()
-        self.lineEditOthersMeridianTreatmentValue.insert(str(self.scope.meridian.degreeLimit) + '°')
+        self.renderText(self.lineEditOthersMeridianTreatmentValue, str(self.scope.meridian.degreeLimit) + '°')
 
-    def buttonWriteDateTime(self):
-        '''This Method refreshes the all mount informations periodical timer controlled.'''
+    @asyncSlot
+    async def buttonWriteDateTime(self):
+        '''This Method writes the date and time of the input fields to the mount.'''
+        scope = self.scope
         valueDate = self.lineEditSetDate.text()
         valueTime = self.lineEditSetTime.text()
         if checkValidFormat(valueDate,'zzpzzpzzzz') and checkValidFormat(valueTime,'zzpzzpzz'):
             valueDT = valueDate + valueTime
 #            print('Date/Time String: ',valueDT)
-            self.scope.setTime(valueDT)
-            info = PopupDialog('INFO: date and time', 'Date and Time are set.', 20, self.colScheme)
-            info.exec()
+            try:
+                await scope.call(scope.setTime, valueDT)
+            except IoConnectionError as error:
+                self.showConnectionError(error)
+                return
+            PopupDialog('INFO: date and time', 'Date and Time are set.', 20, self.colScheme).show()
         else:
-            info = PopupDialog('ERROR: input value', 'Input string date is invalid.', 20, self.colScheme)
-            info.exec()
+            PopupDialog('ERROR: input value', 'Input string date is invalid.', 20, self.colScheme).show()
 
     def buttonWriteTimeZone(self):
         info = PopupDialog('INFO: function', 'Time zone set function is just not implemented.', 20, self.colScheme)
@@ -1689,85 +1873,85 @@ class Ui_MainWindow(object):
         info = PopupDialog('INFO: function', 'Longitude set function is just not implemented.', 20, self.colScheme)
         info.exec()
 
-    def buttonWriteRaDec(self):
-        value = self.lineEditSetRA.text()
-        if checkValidFormat(value,'zzhzzmzzs'):
-            self.scope.setCommandedRightAscension(int(value[0:2]), int(value[3:5]), int(value[6:8]))
-            value = self.lineEditSetDEC.text()
-            if checkValidFormat(value,'vzz°zz\'zz\"'):
-                self.scope.setCommandedDeclination(int(value[0:3]), int(value[4:6]), int(value[7:9]))
-                if self.scope.moveToDefinedRaAndDec():
-                    info = PopupDialog('Information: move', 'The mount move to alt, azi.', 20, self.colScheme)
-                    info.exec()
-                else:
-                    info = PopupDialog('ERROR: move', 'A problem move asc, dec is occurred.', 20, self.colScheme)
-                    info.exec()
-            else:
-                info = PopupDialog('ERROR: input value', 'Input string DEC invalid.', 20, self.colScheme)
-                info.exec()
+    @asyncSlot
+    async def buttonWriteRaDec(self):
+        scope = self.scope
+        valueRa = self.lineEditSetRA.text()
+        valueDec = self.lineEditSetDEC.text()
+        if not checkValidFormat(valueRa,'zzhzzmzzs'):
+            PopupDialog('ERROR: input value', 'Input string RA invalid.', 20, self.colScheme).show()
+            return
+        await scope.call(scope.setCommandedRightAscension, int(valueRa[0:2]), int(valueRa[3:5]), int(valueRa[6:8]))
+        if not checkValidFormat(valueDec,'vzz°zz\'zz\"'):
+            PopupDialog('ERROR: input value', 'Input string DEC invalid.', 20, self.colScheme).show()
+            return
+        await scope.call(scope.setCommandedDeclination, int(valueDec[0:3]), int(valueDec[4:6]), int(valueDec[7:9]))
+        if await scope.call(scope.moveToDefinedRaAndDec, priority = ioProtocol.PRIORITY_MOTION):
+            PopupDialog('Information: move', 'The mount move to alt, azi.', 20, self.colScheme).show()
         else:
-            info = PopupDialog('ERROR: input value', 'Input string RA invalid.', 20, self.colScheme)
-            info.exec()
-
-    def buttonWriteAziAlt(self):
-        value = self.lineEditSetAZI.text()
-        if checkValidFormat(value,'zzz°zz\'zz\"'):
-            self.scope.setCommandedAzimuth(int(value[0:3]), int(value[4:6]), int(value[7:9]))
-            value = self.lineEditSetALT.text()
-            if checkValidFormat(value,'zz°zz\'zz\"'):
-                self.scope.setCommandedAltitude(int(value[0:2]), int(value[3:5]), int(value[6:8]))
-                if self.scope.moveToDefinedAltAndAz():
-                    info = PopupDialog('Information: move', 'The mount move to alt, azi.', 20, self.colScheme)
-                    info.exec()
-                else:
-                    info = PopupDialog('ERROR: move', 'A problem move alt, azi is occurred.', 20, self.colScheme)
-                    info.exec()
-            else:
-                info = PopupDialog('ERROR: input value', 'Input string ALT invalid.', 20, self.colScheme)
-                info.exec()
+            PopupDialog('ERROR: move', 'A problem move asc, dec is occurred.', 20, self.colScheme).show()
+
+    @asyncSlot
+    async def buttonWriteAziAlt(self):
+        scope = self.scope
+        valueAzi = self.lineEditSetAZI.text()
+        valueAlt = self.lineEditSetALT.text()
+        if not checkValidFormat(valueAzi,'zzz°zz\'zz\"'):
+            PopupDialog('ERROR: input value', 'Input string AZI invalid.', 20, self.colScheme).show()
+            return
+        await scope.call(scope.setCommandedAzimuth, int(valueAzi[0:3]), int(valueAzi[4:6]), int(valueAzi[7:9]))
+        if not checkValidFormat(valueAlt,'zz°zz\'zz\"'):
+            PopupDialog('ERROR: input value', 'Input string ALT invalid.', 20, self.colScheme).show()
+            return
+        await scope.call(scope.setCommandedAltitude, int(valueAlt[0:2]), int(valueAlt[3:5]), int(valueAlt[6:8]))
+        if await scope.call(scope.moveToDefinedAltAndAz, priority = ioProtocol.PRIORITY_MOTION):
+            PopupDialog('Information: move', 'The mount move to alt, azi.', 20, self.colScheme).show()
         else:
-            info = PopupDialog('ERROR: input value', 'Input string AZI invalid.', 20, self.colScheme)
-            info.exec()
+            PopupDialog('ERROR: move', 'A problem move alt, azi is occurred.', 20, self.colScheme).show()
 
     def buttonReadDateAndTimeFromPC(self):
         '''Method read date and time from PC and write ist to the lineEdit folders.'''
         datePC = strftime("%d.%m.%Y")
         timePC = strftime("%H:%M:%S")
-        self.lineEditDatePC.selectAll()
-        self.lineEditDatePC.insert(datePC)
-        self.lineEditTimePC.selectAll()
-        self.lineEditTimePC.insert(timePC)
+        self.renderText(self.lineEditDatePC, datePC)
+        self.renderText(self.lineEditTimePC, timePC)
 
-    def buttonSetDateAndTimeFromPC(self):
+    @asyncSlot
+    async def buttonSetDateAndTimeFromPC(self):
         '''Method write date and time to the mount if no GPS is present.'''
-        self.scope.setPCTime()
-        info = PopupDialog('INFO: date and time', 'Date and Time from PC are set.', 20, self.colScheme)
-        info.exec()
-
-    def buttonWriteSummerTime(self):
-        if self.comboBoxOthersSummerTime.currentIndex() == 0:
-            self.scope.setDaylightSavings(True)
-        else:
-            self.scope.setDaylightSavings(False)
-
-    def buttonWriteAltitudeLimit(self):
+        try:
+            await self.scope.call(self.scope.setPCTime)
+        except IoConnectionError as error:
+            self.showConnectionError(error)
+            return
+        PopupDialog('INFO: date and time', 'Date and Time from PC are set.', 20, self.colScheme).show()
+
+    @asyncSlot
+    async def buttonWriteSummerTime(self):
+        try:
+            await self.scope.call(self.scope.setDaylightSavings, self.comboBoxOthersSummerTime.currentIndex() == 0)
+        except IoConnectionError as error:
+            self.showConnectionError(error)
+
+    @asyncSlot
+    async def buttonWriteAltitudeLimit(self):
         value = self.lineEditOthersAltitudeLimit.text()
         if checkValidFormat(value,'vzz°'):
             valueNumber = value[1:3]
             if int(valueNumber) < 0 or int(valueNumber) > 45:
-                self.lineEditOthersAltitudeLimit.selectAll()
-                self.lineEditOthersAltitudeLimit.insert('error > +xx°')
-                info = PopupDialog('ERROR: value', 'Altitude limit not practical.', 20, self.colScheme)
-                info.exec()
+                self.renderText(self.lineEditOthersAltitudeLimit, 'error > +xx°')
+                PopupDialog('ERROR: value', 'Altitude limit not practical.', 20, self.colScheme).show()
             else:
-                if self.scope.setAltitudeLimit(value):
-                    info = PopupDialog('INFO: Altitude Limit', 'Altitude limit are set.', 20, self.colScheme)
-                    info.exec()
+                try:
+                    if await self.scope.call(self.scope.setAltitudeLimit, value[0:3]):
+                        PopupDialog('INFO: Altitude Limit', 'Altitude limit are set.', 20, self.colScheme).show()
+                except IoConnectionError as error:
+                    self.showConnectionError(error)
         else:
-            info = PopupDialog('ERROR: format', 'Try again.', 20, self.colScheme)
-            info.exec()
+            PopupDialog('ERROR: format', 'Try again.', 20, self.colScheme).show()
 
-    def buttonWriteMeridianTreatmentStopFlip(self):
+    @asyncSlot
+    async def buttonWriteMeridianTreatmentStopFlip(self):
         # treatment und limit vorher ermitteln
         if self.comboBoxOthersMeridianTreatmentStopFlip.currentIndex() == 0:
             treatment = '0'
@@ -1777,57 +1961,101 @@ class Ui_MainWindow(object):
         if checkValidFormat(value,'zz°'):
             limit = value[0:2]
             if int(limit) > 15:
-                self.lineEditOthersMeridianTreatmentValue.selectAll()
-                self.lineEditOthersMeridianTreatmentValue.insert('error > xx°')
-                info = PopupDialog('ERROR: value', 'Meridian treatment value not practical.', 20, self.colScheme)
-                info.exec()
+                self.renderText(self.lineEditOthersMeridianTreatmentValue, 'error > xx°')
+                PopupDialog('ERROR: value', 'Meridian treatment value not practical.', 20, self.colScheme).show()
             else:
-                if self.scope.setMeridianTreatment(treatment, limit): # Parameter str
-                    info = PopupDialog('INFO: Altitude Limit', 'Meridian treatment are set.', 20, self.colScheme)
-                    info.exec()
+                try:
+                    if await self.scope.call(self.scope.setMeridianTreatment, treatment, limit): # Parameter str
+                        PopupDialog('INFO: Altitude Limit', 'Meridian treatment are set.', 20, self.colScheme).show()
+                except IoConnectionError as error:
+                    self.showConnectionError(error)
         else:
-            info = PopupDialog('ERROR: format', 'Format invalid, try again.', 20, self.colScheme)
-            info.exec()
+            PopupDialog('ERROR: format', 'Format invalid, try again.', 20, self.colScheme).show()
 
         self.lineEditDatePC.selectAll()
 
 
 # **************************************************************************************
 # primary program part
-# log-files size check 
-
-errorFile = open('logfile.log', 'r+')
-errorData = errorFile.readlines()
-errorFile.close()
-
-if len(errorData) > 3000:                # max entrys in the log-file
-    errorFile = open('error.log', 'w')
-    errorData = errorData[len(errorData)-2000:len(errorData)]
-    errorFile.writelines(errorData)
-    errorFile.close()
-
-errorData = []
-
-
-# **************************************************************************************
-# Logger init
 
-logging.basicConfig(
-    filename='logfile.log',
-    filemode='a',
-    format='%(asctime)s %(levelname)s: %(message)s',
-    datefmt='%d.%m.%Y %H:%M:%S',
-    level=logging.DEBUG
-)
+def trimLogFile(path = 'logfile.log', maxLines = 3000, keepLines = 2000, blockSize = 65536):
+    '''Keep the last keepLines lines of the log-file once it has more than maxLines.
+       The file is read backwards from its end, at most maxLines lines of it.'''
+    try:
+        with open(path, 'rb') as logFile:
+            position = logFile.seek(0, os.SEEK_END)
+            tail = b''
+            while position > 0 and tail.count(b'\n') <= maxLines:
+                step = min(blockSize, position)
+                position -= step
+                logFile.seek(position)
+                tail = logFile.read(step) + tail
+    except OSError:
+        return
+    if tail.count(b'\n') <= maxLines:
+        return
+    with open(path + '.tmp', 'wb') as logFile:
+        logFile.writelines(tail.splitlines(keepends = True)[-keepLines:])
+    os.replace(path + '.tmp', path)
+
+def setupLogging():
+    '''Trim the log-file if it got too long and log to it. Called when the GUI
+       starts, so importing the mount model or the GUI leaves the logging alone.'''
+    trimLogFile()
+
+    # Logger init
+    logging.basicConfig(
+        filename='logfile.log',
+        filemode='a',
+        format='%(asctime)s %(levelname)s: %(message)s',
+        datefmt='%d.%m.%Y %H:%M:%S',
+        level=logging.DEBUG
+    )
+
+
+class StartupProfile(QtCore.QObject):
+    '''Reports the startup times of the GUI once the main window painted first.
+       Enabled with --profile or the environment variable LIOMOCO_PROFILE=1.'''
+    def __init__(self, window):
+        super().__init__()
+        self.marks = [('imports', importFinished)]
+        self.window = window
+        window.installEventFilter(self)
+
+    def mark(self, name):
+        self.marks.append((name, perf_counter()))
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Paint:
+            self.window.removeEventFilter(self)
+            self.mark('first paint')
+            self.report()
+        return False
+
+    def report(self):
+        lines = ['Startup profile (s):']
+        last = importStarted
+        for name, moment in self.marks:
+            lines.append('  {:<14}{:8.3f}{:8.3f}'.format(name, moment - last, moment - importStarted))
+            last = moment
+        print('\n'.join(lines), file = sys.stderr)
+        logging.info('\n'.join(lines))
 
 # **************************************************************************************
 # Main Programm part
 
 if __name__ == "__main__":
 # **************************************************************************************
+    setupLogging()
     app = QtWidgets.QApplication(sys.argv)
     MainWindow = QtWidgets.QMainWindow()
+    profile = None
+    if '--profile' in sys.argv or os.environ.get('LIOMOCO_PROFILE') == '1':
+        profile = StartupProfile(MainWindow)
+        profile.mark('application')
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
+    if profile is not None:
+        profile.mark('setupUi')
     MainWindow.show()
     sys.exit(app.exec_())
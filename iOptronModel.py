@@ -11,14 +11,13 @@ rewritten and adapted: @author - Wolfgang Rafelt, 2023
 # Imports
 import time
 import logging
-import configparser
-from   dataclasses       import dataclass
-from   serial.serialutil import SerialException
-from   datetime          import datetime
-from   dialoges          import PopupDialog
-import iOptronGUI
+import itertools
+import collections
+from   dataclasses       import dataclass, field, asdict
 import utilities
 import ioUtilities
+import ioProtocol
+import ioIdentity
 
 
 # Data classes
@@ -140,8 +139,8 @@ class MovingSpeed:
 class Parking:
     """Contains information and location of parking."""
     isParked: bool = None
-    altitude: Altitude = Altitude()
-    azimuth: Azimuth = Azimuth()
+    altitude: Altitude = field(default_factory = Altitude)
+    azimuth: Azimuth = field(default_factory = Azimuth)
 
 @dataclass
 class Pec:
@@ -173,31 +172,108 @@ class Hemisphere:
     code: int = None
     location: str = None
 
+@dataclass(frozen=True, slots=True)
+class MountSnapshot:
+    """State of the mount after one poll. A new snapshot replaces Ioptron.snapshot
+    after each poll and is never changed, so readers on other threads always see
+    the values of one poll. Angles are in 0.01 arc seconds like in the replies."""
+    sequence: int
+    timestamp: float                # time.monotonic() when the poll was parsed
+    rightAscension: float
+    declination: float
+    altitude: float
+    azimuth: float
+    pierSide: str
+    counterweightDirection: str
+    localTime: float                # Unix time of the mount clock with its UTC offset
+    utcOffset: int
+    dst: bool
+    status: ioProtocol.MountStatus  # Last decoded :GLS# reply or None
+
+    @property
+    def rightAscensionHms(self):
+        return utilities.convertArcSecondsToHms(self.rightAscension)
+
+    @property
+    def declinationDms(self):
+        return utilities.convertArcSecondsToDms(self.declination)
+
+    @property
+    def altitudeDms(self):
+        return utilities.convertArcSecondsToDms(self.altitude)
+
+    @property
+    def azimuthDms(self):
+        return utilities.convertArcSecondsToDms(self.azimuth)
+
+    @property
+    def formattedTime(self):
+        return utilities.convertUnixToFormatted(self.localTime)
+
+# Snapshots kept in Ioptron.history, one hour at one poll per second
+SNAPSHOT_HISTORY = 3600
+
+@dataclass(frozen=True, slots=True)
+class MountChange:
+    """A value of the mount that changed, passed to the callbacks of Ioptron.subscribe.
+       field    = name in CHANGE_FIELDS, e.g. 'pierSide' or 'trackingRate'
+       old      = the value reported before, None for the first snapshot
+       new      = the value now
+       snapshot = the MountSnapshot with the new value"""
+    field: str
+    old: object
+    new: object
+    snapshot: MountSnapshot
+
+# Values compared between snapshots, with the least change reported (0 reports every change).
+# Angles are in 0.01 arc seconds, so 100 is one arc second; the time is in seconds.
+CHANGE_FIELDS = {
+    'rightAscension': 100, 'declination': 100, 'altitude': 100, 'azimuth': 100,
+    'localTime': 1, 'utcOffset': 0, 'dst': 0, 'pierSide': 0, 'counterweightDirection': 0,
+    # Fields of MountSnapshot.status
+    'longitude': 0, 'latitude': 0, 'gpsState': 0, 'systemStatus': 0, 'trackingRate': 0,
+    'movingSpeed': 0, 'timeSource': 0, 'hemisphere': 0,
+}
+STATUS_FIELDS = frozenset(('longitude', 'latitude', 'gpsState', 'systemStatus', 'trackingRate',
+                           'movingSpeed', 'timeSource', 'hemisphere'))
+
+# Rates for predictRaAndDec, in arc seconds per second. The tracking rates are those of the
+# :GLS# codes sidereal, lunar, solar and King; custom (None) is Tracking.custom times sidereal.
+SIDEREAL_RATE = 15.041067
+TRACKING_SPEEDS = (SIDEREAL_RATE, 14.685, 15.0, 15.0369, None)
+FULL_CIRCLE = 129600000             # 360° in 0.01 arc seconds
+QUARTER_CIRCLE = 32400000
+PREDICTION_LIMIT = 60.0             # Seconds RA and DEC are moved on without a new snapshot
+SLEWING_RATE = 100                  # Least speed off the drift taken for slewing, 1 arc second/s
+
+def snapshotValue(snapshot, name):
+    """Value of a field of CHANGE_FIELDS in a snapshot."""
+    if name in STATUS_FIELDS:
+        return None if snapshot.status is None else getattr(snapshot.status, name)
+    return getattr(snapshot, name)
+
 class Ioptron:
-    """A class to interact with iOptron mounts using Python."""
-    def __init__(self):
+    """A class to interact with iOptron mounts using Python. A connection, like
+    ioUtilities.IoConnectionReplay, can be given in place of the configured one."""
+    def __init__(self, connection = None):
         self.myMount = Mount()
         self.config = utilities.readConfig()
 
-        if self.config['ConType'] == 'USB':
-            if self.config['SerPort'] != '' and self.config['SerPort'] != 'WLAN':
-                self.scope = ioUtilities.IoConnectionUSB(self.config['SerPort'],self.config['SerSpeed'])
-                if self.scope.isOpen():
-                    info = PopupDialog('INFO: USB', 'Mount is USB serial connected.', 10, 'gray')
-                    info.exec()
-                    self.myMount.connectionStatus = 'online'
-                    self.mountConnectionType = self.config['ConType']
-                else:
-                    print('Serial Problem')
-            else:
-                raise SerialException
-        elif self.config['ConType'] == 'WLAN':
-            if self.config['WLanPort'] != '' and self.config['IpAddress'] != '':
-                self.scope = ioUtilities.IoConnectionWlan(self.config['IpAddress'], self.config['WLanPort'])
-                self.myMount.connectionStatus = 'online'
-                self.mountConnectionType = self.config['ConType']
-                info = PopupDialog('INFO: WLAN', 'Mount is WLAN connected.', 10, 'gray')
-                info.exec()
+        if connection is not None:
+            self.scope = connection
+        else:
+            self.scope = ioUtilities.openConnection(self.config)
+        self.myMount.connectionStatus = 'online'
+        self.mountConnectionType = self.config['ConType']
+
+        # Record the traffic with the mount if a session file is set
+        if self.config['RecordSession'] != '':
+            self.scope = ioUtilities.IoConnectionRecorder(self.scope, self.config['RecordSession'])
+
+        # All exchanges with the mount run on one I/O worker thread
+        self.scope = ioUtilities.IoWorker(self.scope)
+        # Rarely changing settings are queried once, until a set command changes them
+        self.cache = ioUtilities.QueryCache(self.scope)
 
         self.movingSpeed = MovingSpeed()
         self.movingSpeed.description = self.config['StartSpeed']
@@ -219,16 +295,36 @@ class Ioptron:
             self.movingSpeed.code = 8
         elif self.config['StartSpeed'] == 'Max':
             self.movingSpeed.code = 9
-        self.setMovingSpeed(self.movingSpeed.code)
 
-        # Assign default values
+        # Identify the mount. A mount connected before is taken from the identity
+        # cache, only the start speed is sent, and it is checked in the background.
+        # A recorded session always starts with the identity queries, so that it
+        # can be replayed without the cache.
         self.location = Location()
-        mainFwInfo = self.getMainFirmwares()
-        motorFwInfo = self.getMotorFirmwares()
-        self.mountVersion = self.getMountVersion()
-        self.firmware = Firmwares(mainboard=mainFwInfo[0], handController=mainFwInfo[1], \
-            rightAscention=motorFwInfo[0], declination=motorFwInfo[1])
-        self.handControllerAttached = False if 'xx' in self.firmware.handController else True
+        self.identityCache = ioIdentity.IdentityCache()
+        self.identityKey = self.connectionKey() if connection is None else None
+        identity = None
+        if self.identityKey and self.config['RecordSession'] == '':
+            identity = self.identityCache.load(self.identityKey)
+        if identity is not None:
+            try:
+                capabilities = ioProtocol.Capabilities(**identity['capabilities'])
+                mainFwInfo = (identity['mainboard'], identity['handController'])
+                motorFwInfo = (identity['rightAscention'], identity['declination'])
+                model = identity['model']
+            except (KeyError, TypeError):
+                model = None
+            if model not in ioProtocol.MODEL_CAPABILITIES:
+                logging.info('Mount identity in the cache not usable, the mount is identified again')
+                identity = None
+        if identity is None:
+            self.applyIdentity(*self.identifyMount())
+            self.storeIdentity()
+        else:
+            self.setMovingSpeed(self.movingSpeed.code)
+            self.applyIdentity(mainFwInfo, motorFwInfo, model, capabilities)
+        # Assign default values
+        self.mountStatus = None             # Last ioProtocol.MountStatus
         self.systemStatus = SystemStatus()
         self.tracking = Tracking()
         self.timeSource = TimeSource()
@@ -253,9 +349,21 @@ class Ioptron:
         # Parking
         self.parking = Parking()
 
+        # Snapshots published by the polls
+        self.snapshot = None
+        self.snapshotSequence = itertools.count(1)
+        self.history = collections.deque(maxlen = SNAPSHOT_HISTORY)
+        self.subscribers = []               # (fields or None, callback), replaced on change
+        self.reportedValues = {}            # field -> value of the last MountChange
+
         # Set the update time to null
         self.lastUpdate = 0
 
+        # Replay the settings when the I/O worker has reconnected
+        self.scope.connectionHandlers.append(self.connectionChanged)
+        if identity is not None:
+            self.scope.submitCall(self.revalidateIdentity)
+
     # Destructor that gets called when the object is destroyed
     def __del__(self):
         try:
@@ -269,15 +377,10 @@ class Ioptron:
         Setting to True enables PEC playback, setting to False disables playback.
         Only available on eq mountd without encoders. Returns True when command sent
         and response is received, otherwise returns False."""
-        if self.config['MountType'] != "equatorial" or \
-            self.config['Encoders'] is True:
+        if not (self.capabilities.equatorial and self.capabilities.pec):
             return False
         self.myMount.isInIoProzess = True
-        if enabled is True:
-            self.scope.send(":SPP1#")
-        if enabled is False:
-            self.scope.send(":SPP0#")
-        if self.scope.recv() == '1':
+        if self.scope.query(":SPP1#" if enabled is True else ":SPP0#") == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -287,131 +390,28 @@ class Ioptron:
     # To get the joke here, read the official protocol docs
     def getAllKindsOfStatus(self):
         """Get (a lot) of status from the mount. Get location, GPS state, status, movement
-        and tracking information, and time data."""
+        and tracking information, and time data. Returns False if the reply is invalid."""
         self.myMount.isInIoProzess = True
-        self.scope.send(":GLS#")
-        responseData = self.scope.recv()
-        if not utilities.checkValidFormat(responseData, 'vzzzzzzzzzzzzzzzzzzzzzz#'):
-            return
-
-        # Parse latitude and longitude
-        self.location.longitude = utilities.convertArcSecondsToDegrees(int(responseData[0:9]))
-        self.location.latitude = utilities.convertArcSecondsToDegrees(\
-            int(responseData[9:17])) - 90 # Val is +90
-
-        # Parse GPS state
-        gpsState = responseData[17:18]
-        if gpsState == '0':
-            self.location.gpsAvailable = False
-        elif gpsState == '1':
-            self.location.gpsAvailable = True
-            self.location.gpsLocked = False
-        elif gpsState == '2':
-            self.location.gpsAvailable = True
-            self.location.gpsLocked = True
-
-        # Parse the system status
-        statusCode = responseData[18:19]
-        self.systemStatus.code = statusCode
-        if statusCode == '0':
-            self.systemStatus.description = "stopped at non-zero position"
-            self.isSlewing = False
-            self.tracking.isTracking = False
-        elif statusCode == '1':
-            self.systemStatus.description = "tracking with periodic error correction disabled"
-            self.isSlewing = False
-            self.tracking.isTracking = True
-            self.pec.enabled = False
-        elif statusCode == '2':
-            self.systemStatus.description = "slewing"
-            self.isSlewing = True
-            self.tracking.isTracking = False
-        elif statusCode == '3':
-            self.systemStatus.description = "auto-guiding"
-            self.isSlewing = False
-            self.tracking.isTracking = True
-        elif statusCode == '4':
-            self.systemStatus.description = "meridian flipping"
-            self.isSlewing = True
-        elif statusCode == '5':
-            self.systemStatus.description = "tracking with periodic error correction enabled"
-            self.isSlewing = False
-            self.tracking.isTracking = True
-            self.pec.enabled = True
-        elif statusCode == '6':
-            self.systemStatus.description = "parked"
-            self.isSlewing = False
-            self.tracking.isTracking = False
-            self.parking.isParked = True
-        elif statusCode == '7':
-            self.systemStatus.description = "stopped at zero position (home position)"
-            self.isSlewing = False
-            self.tracking.isTracking = False
-
-        # Parse tracking rate
-        trackingRate = responseData[19:20]
-        self.tracking.code = trackingRate
-
-        # Parse moving speed
-        movingSpeed = responseData[20:21]
-        self.movingSpeed.code = movingSpeed
-
-        # Parse the time source
-        timeSource = responseData[21:22]
-        self.timeSource.code = timeSource
-        if timeSource == '1':
-            self.timeSource.description = "local - RS232 or ethernet"
-        elif timeSource == '2':
-            self.timeSource.description = "hand controller"
-        elif timeSource == '3':
-            self.timeSource.description = "GPS"
-
-        # Parse the hemisphere
-        hemisphere = responseData[22:23]
-        self.hemisphere.code = hemisphere
-        if hemisphere == '0':
-            self.hemisphere.location = 'south'
-        if hemisphere == '1':
-            self.hemisphere.location = 'north'
+        responseData = self.scope.query(':GLS#')
         self.myMount.isInIoProzess = False
+        return self.parseAllKindsOfStatus(responseData)
 
     def getAltAndAz(self):
-        """Get the altitude and azimuth of the mount's current direction."""
+        """Get the altitude and azimuth of the mount's current direction.
+        Returns False if the reply is invalid."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':GAC#')
-        returnedData = self.scope.recv()
-        if not utilities.checkValidFormat(returnedData, 'vzzzzzzzzzzzzzzzzz#'):
-            return
-
-        # Altitude
-        altitude = returnedData[0:9]
-        try:
-            float(altitude)
-        except ValueError:
-            pass
-        else:
-            self.altitude.arcseconds = float(altitude)
-            self.setDataclassDmsFromArcseconds(self.altitude)
-
-        # Azimuth
-        azimuth = returnedData[9:18]
-        try:
-            float(azimuth)
-        except ValueError:
-            pass
-        else:
-            self.azimuth.arcseconds = float(azimuth)
-            self.setDataclassDmsFromArcseconds(self.azimuth)
-            self.myMount.isInIoProzess = False
+        returnedData = self.scope.query(':GAC#')
+        self.myMount.isInIoProzess = False
+        return self.parseAltAndAz(returnedData)
 
     def getAltitudeLimit(self):
         """Get the altitude limt currently set. Applies to tracking and slewing. Motion will
         stop if it exceeds this value."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':GAL#')
-        returnedData = self.scope.recv()
+        fields = ioProtocol.splitReply('GAL', self.cache.query(':GAL#'))
         self.myMount.isInIoProzess = False
-        self.altitude.limit = returnedData[0:3]
+        if fields is not None:
+            self.altitude.limit = fields['limit']
         return self.altitude.limit
 
     def getCoordinateMemory(self):
@@ -419,40 +419,41 @@ class Ioptron:
         do not exceed limits (altitude, mechanical, and flip.) Will return an int
         between 0 and 2. Only returns a value on eq mounts, otherwise None."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':QAP#')
-        self.tracking.memoryStore = self.scope.recv()[0:1]
+        fields = ioProtocol.splitReply('QAP', self.scope.query(':QAP#'))
+        if fields is not None:
+            self.tracking.memoryStore = fields['memoryStore']
         self.myMount.isInIoProzess = False
         return self.tracking.memoryStore
 
     def getCustomTrackingRate(self):
         """Get the custom tracking rate, if it is set. Otherwise will be 1.000."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':GTR#')
-        returnedData = self.scope.recv()
+        fields = ioProtocol.splitReply('GTR', self.cache.query(':GTR#'))
         self.myMount.isInIoProzess = False
-        # Set the value and strip the control '#' at the end (response is d{5})
-        self.tracking.custom = format((float(returnedData[:5]) * 0.0001), '.4f')
+        if fields is None:
+            return
+        # Set the value without the control '#' at the end (response is d{5}), n.nnnn of sidereal
+        self.tracking.custom = round(float(fields['rate']) * 0.0001, 4)
 
     def getGuidingRate(self):
         """Get the current RA and DEC guiding rates. They are 0.01 - 0.99 * siderial."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':AG#')
-        returnedData = self.scope.recv()
+        fields = ioProtocol.splitReply('AG', self.cache.query(':AG#'))
         self.myMount.isInIoProzess = False
+        if fields is None:
+            return
         # Convert values to 0.01 - 0.9
-        self.guiding.rightAscentionRate = float(returnedData[0:2]) * 0.01
-        self.guiding.declinationRate = float(returnedData[2:4])*  0.01
+        self.guiding.rightAscentionRate = float(fields['rightAscentionRate']) * 0.01
+        self.guiding.declinationRate = float(fields['declinationRate'])*  0.01
 
     def getPecIntegrity(self):
         """Get the integrity of the PEC. Returns (and sets) if it is complete or incomplete.
         Only available with eq mounts without encoders"""
-        if self.config['MountType'] != "equatorial" or \
-            self.config['Encoders'] is True:
+        if not (self.capabilities.equatorial and self.capabilities.pec):
             return
         # Continue - is an EQ mount without encoders
         self.myMount.isInIoProzess = True
-        self.scope.send(':GPE#')
-        returnedData = self.scope.recv()
+        returnedData = self.scope.query(':GPE#')
         self.myMount.isInIoProzess = False
         if returnedData == "0":
             self.pec.integrityComplete = False
@@ -462,13 +463,11 @@ class Ioptron:
     def getPecRecordingStatus(self):
         """Get the status of the PEC recording. Returns (and sets) if it is stopped or recording.
         Only available with eq mounts without encoders"""
-        if self.config['MountType'] != "equatorial" or \
-            self.config['Encoders'] is True:
+        if not (self.capabilities.equatorial and self.capabilities.pec):
             return
         # Continue - is an EQ mount without encoders
         self.myMount.isInIoProzess = True
-        self.scope.send(':GPR#')
-        returnedData = self.scope.recv()
+        returnedData = self.scope.query(':GPR#')
         self.myMount.isInIoProzess = False
         if returnedData == "0":
             self.pec.recording = False
@@ -478,8 +477,7 @@ class Ioptron:
     def getMaxSlewingSpeed(self):
         """Get the maximum slewing speed for this mount and returns a factor of siderial (eg 8x)."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':GSR#')
-        returnedData = self.scope.recv()
+        returnedData = self.cache.query(':GSR#')
         self.myMount.isInIoProzess = False
 
         # Response depends on mount model
@@ -494,131 +492,149 @@ class Ioptron:
         """Get the treatment of the meridian - stop below limit or flip at limit along
         with the position limit in degrees past meridian. Only used for equitorial mounts."""
         # This works for eq mounts only
-        if self.config['MountType'] != 'equatorial':
+        if not self.capabilities.equatorial:
             return
         # This is an eq mount
         self.myMount.isInIoProzess = True
-        self.scope.send(':GMT#')
-        returnedData = self.scope.recv()
+        fields = ioProtocol.splitReply('GMT', self.cache.query(':GMT#'))
         self.myMount.isInIoProzess = False
-        code = returnedData[0:1]
-        degrees = returnedData[1:3]
-        self.meridian.code = int(code)
-        self.meridian.degreeLimit = int(degrees)
+        if fields is None:
+            return
+        self.meridian.code = int(fields['code'])
+        self.meridian.degreeLimit = int(fields['degreeLimit'])
 
     def getMainFirmwares(self):
         """Get the firmware(s) of the mount and hand controller, if it is attached, otherwise
         a null value (xxxxxx) is used for the HC firmware."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':FW1#')
-        returnedData = self.scope.recv()
+        fields = ioProtocol.splitReply('FW1', self.scope.query(':FW1#'))
         self.myMount.isInIoProzess = False
-        mainFw = returnedData[0:6]
-        hcFw = returnedData[6:12]
-        return (mainFw, hcFw)
+        if fields is None:
+            return ('', '')
+        return (fields['mainboard'], fields['handController'])
 
     def getMotorFirmwares(self):
         """Get the firmware of the motors (ra and dec)."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':FW2#')
-        returnedData = self.scope.recv()
+        fields = ioProtocol.splitReply('FW2', self.scope.query(':FW2#'))
         self.myMount.isInIoProzess = False
-        rightAsc = returnedData[0:6]
-        dec = returnedData[6:12]
-        return (rightAsc, dec)
+        if fields is None:
+            return ('', '')
+        return (fields['rightAscention'], fields['declination'])
 
     def getMountVersion(self):
         """Get the model / version of the mount. Returns the model number."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':MountInfo#')
-        mountVer = self.scope.recv()
+        mountVer = self.scope.query(':MountInfo#')
         self.myMount.isInIoProzess = False
         return mountVer
 
+    def connectionChanged(self, connected):
+        """Called on the I/O worker thread when the connection is lost or back. After
+        a reconnect the moving speed and the tracking rate are sent again."""
+        if not connected:
+            self.myMount.connectionStatus = 'reconnecting'
+            return
+        self.myMount.connectionStatus = 'online'
+        self.scope.query(':SR' + str(self.movingSpeed.code) + '#')
+        if self.tracking.code is not None:
+            self.scope.query(':RT' + str(self.tracking.code) + '#')
+        logging.info('Moving speed and tracking rate sent again after reconnect')
+
+    def identifyMount(self):
+        """Set the start speed and read the firmwares and the model with one write, so
+        connecting waits for one round trip instead of four. Returns the main and the
+        motor firmwares, as getMainFirmwares() and getMotorFirmwares(), and the model."""
+        self.myMount.isInIoProzess = True
+        replies = self.scope.queryBatch([':SR' + str(self.movingSpeed.code) + '#', ':FW1#', ':FW2#', ':MountInfo#'])
+        self.myMount.isInIoProzess = False
+        return self.parseIdentity(replies[1:])
+
+    def parseIdentity(self, replies):
+        """PRIVATE: Parse the replies to :FW1#, :FW2# and :MountInfo#."""
+        mainFields = ioProtocol.splitReply('FW1', replies[0])
+        motorFields = ioProtocol.splitReply('FW2', replies[1])
+        mainFwInfo = ('', '') if mainFields is None else (mainFields['mainboard'], mainFields['handController'])
+        motorFwInfo = ('', '') if motorFields is None else (motorFields['rightAscention'], motorFields['declination'])
+        return mainFwInfo, motorFwInfo, replies[2]
+
+    def applyIdentity(self, mainFwInfo, motorFwInfo, model, capabilities = None):
+        """PRIVATE: Take over the firmwares and the model. Without capabilities given
+        they are looked up by the model, for unknown models taken from setup.ini."""
+        self.mountVersion = model
+        self.scope.pacing.useModel(model)
+        self.firmware = Firmwares(mainboard=mainFwInfo[0], handController=mainFwInfo[1], \
+            rightAscention=motorFwInfo[0], declination=motorFwInfo[1])
+        self.handControllerAttached = False if 'xx' in self.firmware.handController else True
+        if capabilities is None:
+            capabilities = ioProtocol.capabilitiesOf(model, ioProtocol.Capabilities.fromConfig(self.config))
+        self.capabilities = capabilities
+        self.scope.capabilities = capabilities
+
+    def connectionKey(self):
+        """PRIVATE: Key of the configured connection in the identity cache."""
+        if self.config['ConType'] == 'USB':
+            return 'USB ' + self.config['SerPort']
+        return self.config['ConType'] + ' ' + self.config['IpAddress'] + ':' + self.config['WLanPort']
+
+    def storeIdentity(self):
+        """PRIVATE: Store the identity in the cache, if a known model was read."""
+        if self.identityKey is None or self.mountVersion not in ioProtocol.MODEL_CAPABILITIES or \
+            not ioProtocol.replyIsValid(ioProtocol.commandSpec(':MountInfo#'), self.mountVersion):
+            return
+        identity = asdict(self.firmware)
+        identity['model'] = self.mountVersion
+        identity['capabilities'] = asdict(self.capabilities)
+        self.identityCache.store(self.identityKey, identity)
+
+    def revalidateIdentity(self):
+        """Read the firmwares and the model of a mount taken from the identity cache
+        again, as a poll job of the I/O worker. If the mount was changed or updated,
+        the new identity is taken over and stored."""
+        mainFwInfo, motorFwInfo, model = self.parseIdentity(self.scope.queryBatch([':FW1#', ':FW2#', ':MountInfo#']))
+        if not ioProtocol.replyIsValid(ioProtocol.commandSpec(':MountInfo#'), model):
+            return
+        if model == self.mountVersion and mainFwInfo == (self.firmware.mainboard, self.firmware.handController) \
+            and motorFwInfo == (self.firmware.rightAscention, self.firmware.declination):
+            return
+        logging.info('Mount identity changed: model ' + model + ', firmwares ' + str(mainFwInfo + motorFwInfo))
+        self.applyIdentity(mainFwInfo, motorFwInfo, model)
+        self.storeIdentity()
+
     def getParkingPosition(self):
         """Get the current parking position of the mount. """
         self.myMount.isInIoProzess = True
-        self.scope.send(':GPC#')
-        returnedData = self.scope.recv()
+        fields = ioProtocol.splitReply('GPC', self.cache.query(':GPC#'))
         self.myMount.isInIoProzess = False
+        if fields is None:
+            return
 
         # Altitude
-        altitude = returnedData[0:8]
+        altitude = fields['altitude']
         self.parking.altitude.arcseconds = float(altitude)
         self.setDataclassDmsFromArcseconds(self.parking.altitude)
 
         # Azimuth
-        azimuth = returnedData[8:17]
+        azimuth = fields['azimuth']
         self.parking.azimuth.arcseconds = float(azimuth)
         self.setDataclassDmsFromArcseconds(self.parking.azimuth)
 
     def getRaAndDec(self):
-        """Get the RA and DEC of the telescope's current pointing position."""
+        """Get the RA and DEC of the telescope's current pointing position.
+        Returns False if the reply is invalid."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':GEP#')
-        returnedData = self.scope.recv()
-        if not utilities.checkValidFormat(returnedData, 'vzzzzzzzzzzzzzzzzzzz#'):
-            return
-        # RA
-        rightAsc = returnedData[9:18]
-        try:
-            float(rightAsc)
-        except ValueError:
-            print('Value ERROR float rightASC')
-        else:
-            self.rightAscension.arcseconds = float(rightAsc)
-            self.rightAscension.degrees = \
-                utilities.convertArcSecondsToDegrees(self.rightAscension.arcseconds)
-            hms = utilities.convertArcSecondsToHms(rightAsc)
-            self.rightAscension.hours = hms[0]
-            self.rightAscension.minutes = hms[1]
-            self.rightAscension.seconds = hms[2]
-
-        # Declination
-        declination = returnedData[0:9]
-        try:
-            float(declination)
-        except ValueError:
-            print('Value ERROR float rightASC')
-        else:
-            self.declination.arcseconds = float(declination)
-            dms = utilities.convertArcSecondsToDms(self.declination.arcseconds)
-            self.declination.degrees = dms[0]
-            self.declination.minutes = dms[1]
-            self.declination.seconds = dms[2]
-
-        # The following only works for eq mounts
-        result = ''
-        if self.config['MountType'] == "equatorial":
-            # Pier side
-            pierSide = returnedData[18:19]
-            if pierSide == '0':
-                result = 'west'
-            elif pierSide == '1':
-                result = 'east'
-            elif pierSide == '2':
-                result = 'indeterminate'
-            self.pierSide = result
-
-            # Counterweight direction
-            counterweightDirection = returnedData[19:20]
-            if counterweightDirection == '0':
-                result = 'up'
-            if counterweightDirection == '1':
-                result = 'normal'
-            self.counterweightDirection = result
+        returnedData = self.scope.query(':GEP#')
         self.myMount.isInIoProzess = False
+        return self.parseRaAndDec(returnedData)
 
     def getRaGuidingFilterStatus(self):
         """Get the status of the RA guiding filter for mounts with encoders."""
         # Only available for eq mounts with encoders
-        if self.config['MountType'] != "equatorial" or \
-            self.config['Encoders'] is False:
+        if not (self.capabilities.equatorial and self.capabilities.encoders):
             return None
         self.myMount.isInIoProzess = True
         self.guiding.hasRaFilter = True
-        self.scope.send(':GGF#')
-        returnedData = self.scope.recv()
+        returnedData = self.cache.query(':GGF#')
         self.myMount.isInIoProzess = False
         if returnedData == "0":
             self.guiding.raFilterEnabled = False
@@ -628,41 +644,26 @@ class Ioptron:
 
     def getTimeInformation(self):
         """Get all time information from the mount, including it's time,
-        timezone, and DST setting."""
+        timezone, and DST setting. Returns False if the reply is invalid."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':GUT#')
-        responseData = self.scope.recv()
-        if not utilities.checkValidFormat(responseData, 'vzzzzzzzzzzzzzzzzz#'):
-            return
+        responseData = self.scope.query(':GUT#')
         self.myMount.isInIoProzess = False
-        self.time.utcOffset = int(responseData[0:4])
-        self.time.summerTime = int(responseData[0:4])
-        self.time.dst = False if responseData[4:5] == '0' else True
-        self.time.julianDate = int(responseData[5:18].lstrip("0"))
-        self.time.unixUtc = utilities.convertJ2kToUnixUtc(self.time.julianDate, self.time.utcOffset)
-        self.time.unixOffset = utilities.offsetUtcTime(self.time.unixUtc, self.time.utcOffset)
-        self.time.formatted = utilities.convertUnixToFormatted(self.time.unixOffset)
+        return self.parseTimeInformation(responseData)
 
     def goToZeroPosition(self):
         """Go to the mount's zero position."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':MH#')
+        self.scope.query(':MH#')
         self.isSlewing = True
-        # Get the response; do nothing with it
-        self.scope.recv()
         self.myMount.isInIoProzess = False
 
     def goToMechanicalZeroPosition(self):
         """Search and go to the *mechanical* zero position.
         Only supported by some mounts."""
-        ## TODO: This is a good place to log a WARN
-        # ['0040', '0041', '0043', '0044', '0070', '0071','0120', '0121', '0122']
         self.myMount.isInIoProzess = True
-        if self.config['mechanicalZero'] is True:
-            self.scope.send(':MSH#')
+        if self.capabilities.mechanicalZero:
+            self.scope.query(':MSH#')
             self.isSlewing = True
-            # Get the response; do nothing with it
-            self.scope.recv()
         self.myMount.isInIoProzess = False
         # Maybe worth throwing an exception
 
@@ -694,7 +695,7 @@ class Ioptron:
         directions = {'north': "mn", 'east': 'me', 'south': 'ms', 'west': 'mw'}
         assert direction.lower() in directions
         moveCommand = ":" + directions[direction.lower()] + "#"
-        self.scope.send(moveCommand)
+        self.scope.query(moveCommand)
         self.myMount.isInIoProzess = False
         return True
 
@@ -710,8 +711,7 @@ class Ioptron:
         assert 0 <= seconds <= 99999
         # Form and send the move command
         moveCommand = ":" + directions[direction.lower()] + seconds + "#"
-        self.scope.send(moveCommand)
-#        self.scope.recv() # No output is returned
+        self.scope.query(moveCommand) # No output is returned
         self.myMount.isInIoProzess = False
         return True
 
@@ -742,8 +742,7 @@ class Ioptron:
         return False."""
         self.myMount.isInIoProzess = True
         moveCommand = ":MSS#"
-        self.scope.send(moveCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(moveCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         self.myMount.isInIoProzess = False
@@ -756,8 +755,7 @@ class Ioptron:
         return False."""
         self.myMount.isInIoProzess = True
         moveCommand = ":MS1#"
-        self.scope.send(moveCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(moveCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         self.myMount.isInIoProzess = False
@@ -783,8 +781,7 @@ class Ioptron:
         """Park the mount at the most recently defined parking position.
         Returns a true if successful or false if parking failed."""
         self.myMount.isInIoProzess = True
-        self.scope.send(':MP1#')
-        response = self.scope.recv()
+        response = self.scope.query(':MP1#')
         self.myMount.isInIoProzess = False
         if response == "1":
             # Mount parked OK
@@ -794,15 +791,158 @@ class Ioptron:
             self.parking.isParked = False
         return self.parking.isParked
 
+    def parseAllKindsOfStatus(self, responseData):
+        """PRIVATE: Parse a :GLS# reply into the location, GPS, system status, tracking,
+        moving speed, time source and hemisphere. Returns False if the reply is invalid."""
+        status = ioProtocol.parseStatus(responseData)
+        if status is None:
+            return False
+        self.mountStatus = status
+
+        self.location.longitude = status.longitude
+        self.location.latitude = status.latitude
+        self.location.gpsAvailable = status.gpsAvailable
+        if status.gpsAvailable:
+            self.location.gpsLocked = status.gpsLocked
+
+        # System status, values of None are left as they are
+        description, isSlewing, isTracking, pecEnabled, isParked = status.systemState
+        self.systemStatus.code = status.systemStatus
+        if description is not None:
+            self.systemStatus.description = description
+            self.isSlewing = isSlewing
+        if isTracking is not None:
+            self.tracking.isTracking = isTracking
+        if pecEnabled is not None:
+            self.pec.enabled = pecEnabled
+        if isParked is not None:
+            self.parking.isParked = isParked
+
+        self.tracking.code = status.trackingRate
+        self.movingSpeed.code = status.movingSpeed
+        self.timeSource.code = status.timeSource
+        if status.timeSourceDescription is not None:
+            self.timeSource.description = status.timeSourceDescription
+        self.hemisphere.code = status.hemisphere
+        if status.hemisphereLocation is not None:
+            self.hemisphere.location = status.hemisphereLocation
+        return True
+
+    def parseAltAndAz(self, returnedData):
+        """PRIVATE: Parse a :GAC# reply into altitude and azimuth.
+        Returns False if the reply is invalid."""
+        fields = ioProtocol.splitReply('GAC', returnedData)
+        if fields is None:
+            return False
+
+        # Altitude
+        altitude = fields['altitude']
+        try:
+            float(altitude)
+        except ValueError:
+            pass
+        else:
+            self.altitude.arcseconds = float(altitude)
+            self.setDataclassDmsFromArcseconds(self.altitude)
+
+        # Azimuth
+        azimuth = fields['azimuth']
+        try:
+            float(azimuth)
+        except ValueError:
+            pass
+        else:
+            self.azimuth.arcseconds = float(azimuth)
+            self.setDataclassDmsFromArcseconds(self.azimuth)
+        return True
+
     def parseMovingSpeed(self, rate):
         """Return the mount's current tracking speed in factors of sidarial rate."""
         return str(self.config['trackingSpeeds'][rate]) + 'x'
 
+    def parseRaAndDec(self, returnedData):
+        """PRIVATE: Parse a :GEP# reply into RA, DEC, pier side and counterweight
+        direction. Returns False if the reply is invalid."""
+        fields = ioProtocol.splitReply('GEP', returnedData)
+        if fields is None:
+            return False
+        # RA
+        rightAsc = fields['rightAscension']
+        try:
+            float(rightAsc)
+        except ValueError:
+            print('Value ERROR float rightASC')
+        else:
+            self.rightAscension.arcseconds = float(rightAsc)
+            self.rightAscension.degrees = \
+                utilities.convertArcSecondsToDegrees(self.rightAscension.arcseconds)
+            hms = utilities.convertArcSecondsToHms(rightAsc)
+            self.rightAscension.hours = hms[0]
+            self.rightAscension.minutes = hms[1]
+            self.rightAscension.seconds = hms[2]
+
+        # Declination
+        declination = fields['declination']
+        try:
+            float(declination)
+        except ValueError:
+            print('Value ERROR float rightASC')
+        else:
+            self.declination.arcseconds = float(declination)
+            dms = utilities.convertArcSecondsToDms(self.declination.arcseconds)
+            self.declination.degrees = dms[0]
+            self.declination.minutes = dms[1]
+            self.declination.seconds = dms[2]
+
+        # The following only works for eq mounts
+        result = ''
+        if self.capabilities.equatorial:
+            # Pier side
+            pierSide = fields['pierSide']
+            if pierSide == '0':
+                result = 'west'
+            elif pierSide == '1':
+                result = 'east'
+            elif pierSide == '2':
+                result = 'indeterminate'
+            self.pierSide = result
+
+            # Counterweight direction
+            counterweightDirection = fields['counterweight']
+            if counterweightDirection == '0':
+                result = 'up'
+            if counterweightDirection == '1':
+                result = 'normal'
+            self.counterweightDirection = result
+        return True
+
+    def parseTimeInformation(self, responseData):
+        """PRIVATE: Parse a :GUT# reply into the time information.
+        Returns False if the reply is invalid."""
+        fields = ioProtocol.splitReply('GUT', responseData)
+        if fields is None:
+            return False
+        self.time.utcOffset = int(fields['utcOffset'])
+        self.time.summerTime = int(fields['utcOffset'])
+        self.time.dst = False if fields['dst'] == '0' else True
+        self.time.julianDate = int(fields['julianDate'].lstrip("0"))
+        self.time.unixUtc = utilities.convertJ2kToUnixUtc(self.time.julianDate, self.time.utcOffset)
+        self.time.unixOffset = utilities.offsetUtcTime(self.time.unixUtc, self.time.utcOffset)
+        self.time.formatted = utilities.convertUnixToFormatted(self.time.unixOffset)
+        return True
+
+    def refreshAllMountInformations(self):
+        """Refresh the status, the coordinates and the rarely changing settings
+        (altitude limit and meridian treatment, queried once by the cache) in one go."""
+        self.refreshStatusBatch(withStatus = True)
+        self.getAltitudeLimit()
+        self.getmeridianTreatment()
+
     def resetSettings(self, confirm: bool):
         """Reset all settings to default. Only applies if True is specified to indicate
         the reset is really wanted. Does not reset any time-based information."""
         if confirm is True:
-            self.scope.send(':RAS#')
+            self.scope.query(':RAS#')
             self.getAllKindsOfStatus()
             self.getTimeInformation()
             self.getRaAndDec()
@@ -812,9 +952,117 @@ class Ioptron:
         """Performs a refresh of the 4 basic mount status commands. These are the 4 updates
         the iOptron driver performs very refresh cycle. Only perform if last update > 1
         second ago to avoid flooding the mount."""
-        self.getAltAndAz()
-        self.getRaAndDec()
-        self.getTimeInformation()
+        self.refreshStatusBatch()
+
+    def refreshStatusBatch(self, withStatus: bool = False):
+        """Send :GEP#, :GAC# and :GUT# (and :GLS# if withStatus is True) in one write
+        and parse the replies, which the mount sends back in order. Saves a round
+        trip per command. Returns True if all replies were valid."""
+        commands = [':GEP#', ':GAC#', ':GUT#']
+        parsers = [self.parseRaAndDec, self.parseAltAndAz, self.parseTimeInformation]
+        if withStatus is True:
+            commands.insert(0, ':GLS#')
+            parsers.insert(0, self.parseAllKindsOfStatus)
+        self.myMount.isInIoProzess = True
+        replies = self.scope.queryBatch(commands)
+        self.myMount.isInIoProzess = False
+        # Parse all replies, even after an invalid one
+        results = [parse(reply) for parse, reply in zip(parsers, replies)]
+        if all(results):
+            self.publishSnapshot()
+        return all(results)
+
+    def publishSnapshot(self):
+        """PRIVATE: Publish the values of the last poll as a new MountSnapshot in
+        self.snapshot and self.history. Returns the snapshot."""
+        snapshot = MountSnapshot(next(self.snapshotSequence), time.monotonic(),
+                                 self.rightAscension.arcseconds, self.declination.arcseconds,
+                                 self.altitude.arcseconds, self.azimuth.arcseconds,
+                                 self.pierSide, self.counterweightDirection,
+                                 self.time.unixOffset, self.time.utcOffset, self.time.dst,
+                                 self.mountStatus)
+        self.history.append(snapshot)
+        self.snapshot = snapshot
+        self.notifyChanges(snapshot)
+        return snapshot
+
+    def predictRaAndDec(self, at):
+        """RA and DEC in 0.01 arc seconds at the time.monotonic() value at, moved on from
+        the last snapshot, for displays refreshed more often than the mount is polled.
+        They move with the turning sky less the tracking rate, or, while the last two
+        snapshots show the mount slewing, with their speed and at most as far as they
+        are apart. Returns None before the first snapshot."""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        elapsed = max(0.0, min(at - snapshot.timestamp, PREDICTION_LIMIT))
+        rightAscensionRate = self.driftRate(snapshot)
+        declinationRate = 0.0
+        previous = self.history[-2] if len(self.history) > 1 else None
+        if previous is not None and previous.sequence == snapshot.sequence - 1:
+            interval = snapshot.timestamp - previous.timestamp
+            moved = (snapshot.rightAscension - previous.rightAscension + FULL_CIRCLE / 2) % FULL_CIRCLE - FULL_CIRCLE / 2
+            slewRate = moved / interval
+            slewDeclinationRate = (snapshot.declination - previous.declination) / interval
+            if abs(slewRate - rightAscensionRate) > SLEWING_RATE or abs(slewDeclinationRate) > SLEWING_RATE:
+                rightAscensionRate, declinationRate = slewRate, slewDeclinationRate
+                elapsed = min(elapsed, interval)
+        rightAscension = (snapshot.rightAscension + rightAscensionRate * elapsed) % FULL_CIRCLE
+        declination = snapshot.declination + declinationRate * elapsed
+        return rightAscension, max(-QUARTER_CIRCLE, min(QUARTER_CIRCLE, declination))
+
+    def driftRate(self, snapshot):
+        """PRIVATE: Change of the RA in 0.01 arc seconds per second while the mount is
+        not slewing: the sky turns at the sidereal rate, the mount follows at the
+        tracking rate. 0 if the state of the mount is unknown."""
+        isTracking = None if snapshot.status is None else snapshot.status.systemState[2]
+        if isTracking is None:
+            return 0.0
+        if not isTracking:
+            return SIDEREAL_RATE * 100
+        code = int(snapshot.status.trackingRate)
+        speed = TRACKING_SPEEDS[code] if code < len(TRACKING_SPEEDS) else SIDEREAL_RATE
+        if speed is None:
+            speed = SIDEREAL_RATE * self.tracking.custom
+        return (SIDEREAL_RATE - speed) * 100
+
+    def subscribe(self, callback, fields = None):
+        """Call callback(MountChange) when one of the fields of CHANGE_FIELDS changes,
+        of all of them if fields is None. The callbacks run on the thread that polled,
+        the I/O worker. Fields known already are reported at once. Returns a function
+        that ends the subscription."""
+        entry = (None if fields is None else frozenset(fields), callback)
+        self.subscribers = self.subscribers + [entry]
+        snapshot = self.snapshot
+        if snapshot is not None:
+            for name, value in list(self.reportedValues.items()):
+                if value is not None and (entry[0] is None or name in entry[0]):
+                    callback(MountChange(name, None, value, snapshot))
+
+        def unsubscribe():
+            self.subscribers = [other for other in self.subscribers if other is not entry]
+        return unsubscribe
+
+    def notifyChanges(self, snapshot):
+        """PRIVATE: Compare a snapshot with the values reported before and pass the
+        changes to the subscribers. Small moves add up until they reach the threshold."""
+        changes = []
+        for name, threshold in CHANGE_FIELDS.items():
+            new = snapshotValue(snapshot, name)
+            old = self.reportedValues.get(name)
+            if new == old:
+                continue
+            if threshold and old is not None and new is not None and abs(new - old) < threshold:
+                continue
+            self.reportedValues[name] = new
+            changes.append(MountChange(name, old, new, snapshot))
+        for fields, callback in self.subscribers:
+            for change in changes:
+                if fields is None or change.field in fields:
+                    try:
+                        callback(change)
+                    except Exception:
+                        logging.exception('change subscriber failed')
 
     def setAltitudeLimit(self, limit: str):
         """Set the maximum altitude limt, in degrees. Applies to tracking and slewing. Motion will
@@ -822,9 +1070,7 @@ class Ioptron:
         self.altitude.limit = limit
         self.myMount.isInIoProzess = True
         setCommand = ":SAL" + self.altitude.limit + "#" # Pad with 0's when single digit
-        self.scope.send(setCommand)
-        # Get the response; do nothing with it
-        self.scope.recv()
+        self.scope.query(setCommand)
         self.myMount.isInIoProzess = False
         return True
 
@@ -838,9 +1084,7 @@ class Ioptron:
         self.movingSpeed.description = self.config['StartSpeed']
         movementCommand = ":SR" + str(rate) + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(movementCommand)
-        # Get the response; do nothing with it
-        self.scope.recv()
+        self.scope.query(movementCommand)
         self.myMount.isInIoProzess = False
 
     def setCommandedAxisFromDms(self, degrees, minutes, seconds, axis):
@@ -852,8 +1096,7 @@ class Ioptron:
         assert axis in commandDict
         axisCommand = ":" + commandDict[axis] + arcseconds + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(axisCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(axisCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -889,8 +1132,7 @@ class Ioptron:
         a response is received. Otherwise returns False."""
         self.myMount.isInIoProzess = True
         szpCommand = ":SZP#"
-        self.scope.send(szpCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(szpCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -903,16 +1145,15 @@ class Ioptron:
         0.50 * siderial guiding. First argument is the RA, second argument is DEC
         Only works for equitorial mounts. Returns true once command is sent
         and a response received."""
-        assert self.config['MountType'] == 'equatorial' # only works on EQ mounts
+        assert self.capabilities.equatorial # only works on EQ mounts
         assert rightAscention >= 0.01 and rightAscention <= 0.90 \
             and declination >= 0.01 and declination <= 0.90
         self.guiding.rightAscentionRate = round(rightAscention, 2)
         self.guiding.declinationRate = round(declination, 2)
-        guidingRateCommand = ":RG" + f'{self.guiding.rightAscentionRate:<04n}' \
-            + f'{self.guiding.declinationRate:<04n}' + "#"
+        guidingRateCommand = ":RG" + f'{round(self.guiding.rightAscentionRate * 100):02d}' \
+            + f'{round(self.guiding.declinationRate * 100):02d}' + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(guidingRateCommand)
-        returnedData = self.scope.recv()
+        returnedData = self.scope.query(guidingRateCommand)
         assert returnedData == '1'
         self.myMount.isInIoProzess = False
         return True
@@ -922,18 +1163,15 @@ class Ioptron:
         This command may or may not be saved on mount restart - the docs are unclear.
         Returns True after the command is sent."""
         # Only available for eq mounts with encoders
-        if self.config['MountType'] != "equatorial" or \
-            self.config['Encoders'] is False:
+        if not (self.capabilities.equatorial and self.capabilities.encoders):
             return None
         self.myMount.isInIoProzess = True
         if enabled is True:
             self.guiding.raFilterEnabled = True
-            self.scope.send(":SGF1#")
+            self.scope.query(":SGF1#")
         if enabled is False:
             self.guiding.raFilterEnabled = False
-            self.scope.send(":SGF0#")
-        # Get the response; do nothing with it
-        self.scope.recv()
+            self.scope.query(":SGF0#")
         self.myMount.isInIoProzess = False
         return True
 
@@ -941,12 +1179,10 @@ class Ioptron:
         """Set a custom tracking rate to n.nnnn of the siderial rate. Only used
         when 'custom' tracking rate is being used. Returns True after command
         is sent."""
-        formattedRate = (f"{float(rate):.6f}")
+        formattedRate = f'{round(float(rate) * 10000):05d}'     # nnnnn, as :GTR# answers
         sendCommand = ":RR" + formattedRate + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(sendCommand)
-        # Get the response; do nothing with it
-        self.scope.recv()
+        self.scope.query(sendCommand)
         self.myMount.isInIoProzess = False
         return True
 
@@ -962,11 +1198,9 @@ class Ioptron:
         """Enables daylight savings time when true, disables it when false."""
         self.myMount.isInIoProzess = True
         if dst is True:
-            self.scope.send(':SDS1#')
+            self.scope.query(':SDS1#')
         else:
-            self.scope.send(':SDS0#')
-        # Get the response; do nothing with it
-        self.scope.recv()
+            self.scope.query(':SDS0#')
         self.myMount.isInIoProzess = False
 
         # Update time information after setting
@@ -979,8 +1213,7 @@ class Ioptron:
         hemisphere = 0 if direction[0:1] == 's' else 1
         command = ":SHE" + str(hemisphere) + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(command)
-        self.scope.recv()
+        self.scope.query(command)
         self.myMount.isInIoProzess = False
         return True
 
@@ -990,11 +1223,10 @@ class Ioptron:
         response reveived, otherwise False is returned."""
         assert -90.0 <= latitude <= 90.0
         self.location.latitude = latitude
-        arcseconds = f'{utilities.convertDegreesToArcSeconds(self.location.latitude):08d}'
-        latCommand = ":SLO" + arcseconds + "#"
+        arcseconds = f'{round(utilities.convertDegreesToArcSeconds(self.location.latitude)):+09d}'
+        latCommand = ":SLA" + arcseconds + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(latCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(latCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -1007,11 +1239,10 @@ class Ioptron:
         response reveived, otherwise False is returned."""
         assert -180.0 <= longitude <= 180.0
         self.location.longitude = longitude
-        arcseconds = f'{utilities.convertDegreesToArcSeconds(self.location.longitude):08d}'
+        arcseconds = f'{round(utilities.convertDegreesToArcSeconds(self.location.longitude)):+09d}'
         longCommand = ":SLO" + arcseconds + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(longCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(longCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -1031,9 +1262,7 @@ class Ioptron:
             speedBit = '8'
         speedCommand = ":MSR" + speedBit + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(speedCommand)
-        # Get the response; do nothing with it
-        self.scope.recv()
+        self.scope.query(speedCommand)
         self.myMount.isInIoProzess = False
         return True
 
@@ -1045,13 +1274,12 @@ class Ioptron:
         self.meridian.code = treatment
         self.meridian.degreeLimit = limit
         # This works for eq mounts only
-        if self.config['MountType'] != 'equatorial':
+        if not self.capabilities.equatorial:
             return False # only works on EQ mounts
         # This is an eq mount
         treatmentCmd = ":SMT" + self.meridian.code + self.meridian.degreeLimit + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(treatmentCmd)
-        if self.scope.recv() == '1':
+        if self.scope.query(treatmentCmd) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -1064,8 +1292,7 @@ class Ioptron:
         arcseconds = str(utilities.convertDmsToArcSeconds(degrees, minutes, seconds)).zfill(8)
         parkAltCommand = ":SPH" + arcseconds + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(parkAltCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(parkAltCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -1078,8 +1305,7 @@ class Ioptron:
         arcseconds = str(utilities.convertDmsToArcSeconds(degrees, minutes, seconds)).zfill(8)
         parkAltCommand = ":SPA" + arcseconds + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(parkAltCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(parkAltCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -1088,15 +1314,10 @@ class Ioptron:
 
     def setTime(self, dtString):
         """Set the current time on the mount to the current computer's time. Sets to UTC."""
-        j2kTime = datetime(2000, 1, 1, 12, 00)
-        # 0 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16 17
-        # z z p z z p z z z z|z  z  p  z  z  p  z  z
-        dtutc = datetime(int(dtString[6:10]),int(dtString[3:5]),int(dtString[0:2]),int(dtString[10:12]),int(dtString[13:15]),int(dtString[16:18]))
-        difference = dtutc - j2kTime
-        j2kTime = str(int(difference.total_seconds() * 1000))
+        j2kTime = str(utilities.convertFormattedToJ2k(dtString))
         timeCommand = ":SUT" + j2kTime + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(timeCommand)
+        self.scope.query(timeCommand)
         self.myMount.isInIoProzess = False
 
     def setPCTime(self):
@@ -1104,7 +1325,7 @@ class Ioptron:
         j2kTime = str(utilities.getUtcTimeInJ2k()).zfill(13)
         timeCommand = ":SUT" + j2kTime + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(timeCommand)
+        self.scope.query(timeCommand)
         self.myMount.isInIoProzess = False
 
     def setTimezoneOffset(self, offset = utilities.getUtcOffsetMin()):
@@ -1112,9 +1333,7 @@ class Ioptron:
         tzOffset = str(offset).zfill(3)
         tzCommand = ":SG" + tzOffset + "#" if offset < 0 else ":SG+" + tzOffset + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(tzCommand)
-        # Get the response; do nothing with it
-        self.scope.recv()
+        self.scope.query(tzCommand)
         self.myMount.isInIoProzess = False
 
     def setTrackingRate(self, rate):
@@ -1124,8 +1343,7 @@ class Ioptron:
         False is returned."""
         rateCommand = ":RT" + str(self.config[rate]) + "#"
         self.myMount.isInIoProzess = True
-        self.scope.send(rateCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(rateCommand) == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -1133,49 +1351,35 @@ class Ioptron:
             return False
 
     def togglePecRecording(self, turnOn: bool):
-        """PRIVATE method for toggling PEC recording on and off."""
+        """PRIVATE method for toggling PEC recording on and off. Returns the
+        response of the mount, or None if PEC recording is not usable."""
+        response = None
         self.myMount.isInIoProzess = True
-        if self.config['MountType'] == 'equatorial' and \
-            self.config['Pec'] is True and \
-            self.config['Encoders'] is False:
+        if self.capabilities.equatorial and self.capabilities.pec:
             # Default is off
             pecCommand = ":SPR1#" if turnOn is True else ":SPR0#"
-            self.scope.send(pecCommand)
+            response = self.scope.query(pecCommand)
         else:
             print("PEC recording not usable with this mount")
         self.myMount.isInIoProzess = False
+        return response
 
     def startRecordingPec(self):
         """Start recording the periodic error. Only used in eq mounts without encoders.
         Returns True if command was sent and response received, otherwise will return False."""
-        self.togglePecRecording(True)
-        self.myMount.isInIoProzess = True
-        if self.scope.recv() == '1':
-            self.myMount.isInIoProzess = False
-            return True
-        else:
-            self.myMount.isInIoProzess = False
-            return False
+        return self.togglePecRecording(True) == '1'
 
     def stopRecordingPec(self):
         """Stop recording the periodic error. Only used in eq mounts without encoders.
         Returns True if command was sent and response received, otherwise will return False."""
-        self.togglePecRecording(False)
-        self.myMount.isInIoProzess = True
-        if self.scope.recv() == '1':
-            self.myMount.isInIoProzess = False
-            return True
-        else:
-            self.myMount.isInIoProzess = False
-            return False
+        return self.togglePecRecording(False) == '1'
 
     def startTracking(self):
         """Commands the mount to start tracking. Returns True when command is sent and
         received, otherwise returns False."""
         self.myMount.isInIoProzess = True
         trackingCommand = ":ST1#"
-        self.scope.send(trackingCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(trackingCommand) == '1':
             self.tracking.isTracking = True
             self.myMount.isInIoProzess = False
             return True
@@ -1184,37 +1388,35 @@ class Ioptron:
             return False
 
     def stopAllMovement(self):
-        """Stop all slewing no matter the source of slewing or the direction(s)."""
-        self.myMount.isInIoProzess = True
-        self.scope.send(':Q#')
+        """Stop all slewing no matter the source of slewing or the direction(s).
+        The stop bypasses the I/O queue and is sent at once. Returns the time in
+        seconds it took until the command has left the computer."""
+        latency = self.scope.emergencyStop(':Q#')
         self.isSlewing = False
-        self.myMount.isInIoProzess = False
+        return latency
 
     def stopEOrWMovement(self):
         """Stop movement in the east or west directions. Useful when using the
         commands to slew in the specfic directions. Mimics the arrow buttons on
-        the hand controller."""
-        self.myMount.isInIoProzess = True
-        self.scope.send(':qR#')
+        the hand controller. The stop bypasses the I/O queue and is sent at once."""
+        latency = self.scope.emergencyStop(':qR#')
         self.isSlewing = False
-        self.myMount.isInIoProzess = False
+        return latency
 
     def stopNOrSMovement(self):
         """Stop movement in the north or south directions. Useful when using the
         commands to slew in the specfic directions. Mimics the arrow buttons on
-        the hand controller."""
-        self.myMount.isInIoProzess = True
-        self.scope.send(':qD#')
+        the hand controller. The stop bypasses the I/O queue and is sent at once."""
+        latency = self.scope.emergencyStop(':qD#')
         self.isSlewing = False
-        self.myMount.isInIoProzess = False
+        return latency
 
     def stopTracking(self):
         """Commands the mount to stop tracking. Returns True when command is sent and
         received, otherwise returns False."""
         trackingCommand = ":ST0#"
         self.myMount.isInIoProzess = True
-        self.scope.send(trackingCommand)
-        if self.scope.recv() == '1':
+        if self.scope.query(trackingCommand) == '1':
             self.tracking.isTracking = False
             self.myMount.isInIoProzess = False
             return True
@@ -1222,14 +1424,23 @@ class Ioptron:
             self.myMount.isInIoProzess = False
             return False
 
+    def submit(self, function, *args, priority = ioProtocol.PRIORITY_POLL):
+        """Run a method like refreshCoordinates as one job on the I/O worker
+        thread. Returns a concurrent.futures.Future of its result."""
+        return self.scope.submitCall(function, *args, priority = priority)
+
+    def call(self, function, *args, priority = ioProtocol.PRIORITY_SET):
+        """Run a method like park on the I/O worker thread, ahead of the polls.
+        Returns an asyncio future of its result, for coroutines of the GUI."""
+        return ioUtilities.awaitable(self.submit(function, *args, priority = priority))
+
     def synchronizeMount(self):
         """Synchrolizes the mount. The most recently defined RA and DEC, or ALT and AZ
         become the commanded values. Ignored is slewing is in progress. Only useful for
         initial calibration; not to be used when tracking. Returns True once command
         is sent and response received. Otherwise False is returned."""
         self.myMount.isInIoProzess = True
-        self.scope.send(":CM#")
-        if self.scope.recv() == '1':
+        if self.scope.query(":CM#") == '1':
             self.myMount.isInIoProzess = False
             return True
         else:
@@ -1239,7 +1450,7 @@ class Ioptron:
     def unpark(self):
         """Unpark the moint. If the mount is unparked already, this does nothing. """
         self.myMount.isInIoProzess = True
-        self.scope.send(':MP0#')
+        self.scope.query(':MP0#')
         # Always returns a 1
         self.parking.isParked = False
         self.myMount.isInIoProzess = False
@@ -1249,8 +1460,6 @@ class Ioptron:
         """Call all of the (4) update commands to get the latest status of the mount."""
         currentTime = time.time()
         if currentTime - self.lastUpdate > 1:
-            self.getAllKindsOfStatus()
-            self.getTimeInformation()
-            self.getRaAndDec()
+            self.refreshStatusBatch(withStatus = True)
         # Apply the latest update time
         self.lastUpdate = time.time()
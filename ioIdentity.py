@@ -0,0 +1,58 @@
+"""
+Module keeping the identities of the mounts connected before.
+
+The firmwares, the model code and the capabilities found on the first connect
+are stored in a JSON file, keyed by the connection the mount was found on, like
+'WLAN 10.10.100.254:8899' or 'USB /dev/ttyUSB0'. The next connect takes them
+from here and checks them in the background instead of waiting for the queries.
+The file is kept in the user's configuration directory, not in the working one.
+"""
+
+
+# Imports
+import os
+import json
+import logging
+import threading
+
+
+def defaultPath():
+    """Path of the identity file in the user's configuration directory, like
+    ~/.config/liomoco/mountIdentity.json or %APPDATA%\\liomoco\\mountIdentity.json."""
+    configDirectory = os.environ.get('XDG_CONFIG_HOME') or os.environ.get('APPDATA') \
+        or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(configDirectory, 'liomoco', 'mountIdentity.json')
+
+
+class IdentityCache:
+    """Mount identities by connection, stored in a JSON file."""
+    def __init__(self, path = None):
+        self.path = defaultPath() if path is None else path
+        self.lock = threading.Lock()
+
+    def read(self):
+        try:
+            with open(self.path) as identityFile:
+                return json.load(identityFile)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, key):
+        """Identity stored for key, a dict, or None if the mount is not known."""
+        with self.lock:
+            return self.read().get(key)
+
+    def store(self, key, identity):
+        """Store the identity (a dict) for key. The file is replaced as a whole,
+        so an interrupted write leaves the old one."""
+        with self.lock:
+            identities = self.read()
+            identities[key] = identity
+            temporaryPath = self.path + '.tmp'
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok = True)
+                with open(temporaryPath, 'w') as identityFile:
+                    json.dump(identities, identityFile, indent = 2)
+                os.replace(temporaryPath, self.path)
+            except OSError as error:
+                logging.error('mount identity not stored: ' + str(error))
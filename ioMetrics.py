@@ -0,0 +1,157 @@
+"""
+Module collecting transport metrics of the mount connection.
+
+Latencies are counted per command code in log-linear histograms like HdrHistogram,
+next to the bytes sent and received, reply timeouts, replies rejected by the
+command table and the durations of the poll cycles. The shared instance `metrics`
+is filled by ioUtilities, ioProtocol and the GUI, and can be exported as JSON.
+"""
+
+
+# Imports
+import json
+import time
+import threading
+
+
+class LatencyHistogram:
+    """Histogram of durations. Values are counted in microseconds, exact below 64 µs,
+    above in 32 buckets per power of two, so a percentile is off by 3 % at most.
+    Only used buckets are stored."""
+    subBucketBits = 5
+    subBucketCount = 1 << subBucketBits
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+
+    def bucketIndex(self, value):
+        shift = max(0, value.bit_length() - self.subBucketBits - 1)
+        return (shift << self.subBucketBits) + (value >> shift)
+
+    def bucketRange(self, index):
+        """Lowest value and width of the bucket with index."""
+        shift = max(0, (index >> self.subBucketBits) - 1)
+        return (index - (shift << self.subBucketBits)) << shift, 1 << shift
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1000000))
+        index = self.bucketIndex(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def percentile(self, percent):
+        """Value in microseconds below which percent of the recorded values are."""
+        if self.count == 0:
+            return None
+        wanted = max(1, self.count * percent / 100)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= wanted:
+                lowest, width = self.bucketRange(index)
+                return min(lowest + (width - 1) // 2, self.maximum)
+        return self.maximum
+
+    def toDict(self):
+        """Summary in milliseconds."""
+        if self.count == 0:
+            return {'count': 0}
+        return {'count': self.count,
+                'min': self.minimum / 1000, 'mean': round(self.total / self.count / 1000, 3),
+                'p50': self.percentile(50) / 1000, 'p90': self.percentile(90) / 1000,
+                'p99': self.percentile(99) / 1000, 'p99.9': self.percentile(99.9) / 1000,
+                'max': self.maximum / 1000}
+
+
+class IoMetrics:
+    """Counters and histograms of the connection to the mount. Thread safe, the
+    I/O worker records while the GUI reads."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.startTime = time.time()
+            self.latencies = {}         # command code -> LatencyHistogram
+            self.cycles = {}            # cycle name -> LatencyHistogram
+            self.timeouts = {}          # command code -> count
+            self.malformed = {}         # command code -> count
+            self.bytesOut = 0
+            self.bytesIn = 0
+
+    def recordExchange(self, code, seconds, bytesOut, bytesIn):
+        """Record one command with its reply. A batch of commands is recorded
+        under the codes joined by '+'."""
+        with self.lock:
+            self.latencies.setdefault(code, LatencyHistogram()).record(seconds)
+            self.bytesOut += bytesOut
+            self.bytesIn += bytesIn
+
+    def recordTimeout(self, code):
+        with self.lock:
+            self.timeouts[code] = self.timeouts.get(code, 0) + 1
+
+    def recordMalformed(self, code):
+        with self.lock:
+            self.malformed[code] = self.malformed.get(code, 0) + 1
+
+    def recordCycle(self, name, seconds):
+        """Record the duration of a poll cycle or another repeated task."""
+        with self.lock:
+            self.cycles.setdefault(name, LatencyHistogram()).record(seconds)
+
+    def snapshot(self):
+        """All metrics as a dict, latencies in milliseconds."""
+        with self.lock:
+            return {'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.startTime)),
+                    'seconds': round(time.time() - self.startTime, 1),
+                    'bytesOut': self.bytesOut,
+                    'bytesIn': self.bytesIn,
+                    'timeouts': dict(self.timeouts),
+                    'malformed': dict(self.malformed),
+                    'latencies': {code: histogram.toDict()
+                                  for code, histogram in sorted(self.latencies.items())},
+                    'cycles': {name: histogram.toDict()
+                               for name, histogram in sorted(self.cycles.items())}}
+
+    def toJson(self):
+        return json.dumps(self.snapshot(), indent = 2)
+
+    def exportJson(self, path):
+        with open(path, 'w') as jsonFile:
+            jsonFile.write(self.toJson())
+
+    def formatTable(self):
+        """Plain text table of the metrics for the diagnostics dialog."""
+        data = self.snapshot()
+        lines = ['since %s (%s s)   bytes out %d   bytes in %d' %
+                 (data['since'], data['seconds'], data['bytesOut'], data['bytesIn']), '',
+                 '%-20s %7s %9s %9s %9s %9s %9s %7s %7s' %
+                 ('command [ms]', 'count', 'mean', 'p50', 'p90', 'p99', 'max', 'timeout', 'invalid')]
+        codes = sorted(set(data['latencies']) | set(data['timeouts']) | set(data['malformed']))
+        for code in codes:
+            summary = data['latencies'].get(code, {'count': 0})
+            lines.append(self.formatRow(code, summary) + ' %7d %7d' %
+                         (data['timeouts'].get(code, 0), data['malformed'].get(code, 0)))
+        lines += ['', '%-20s %7s %9s %9s %9s %9s %9s' %
+                  ('cycle [ms]', 'count', 'mean', 'p50', 'p90', 'p99', 'max')]
+        for name, summary in data['cycles'].items():
+            lines.append(self.formatRow(name, summary))
+        return '\n'.join(lines)
+
+    def formatRow(self, name, summary):
+        if summary['count'] == 0:
+            return '%-20s %7d %9s %9s %9s %9s %9s' % (name, 0, '-', '-', '-', '-', '-')
+        return '%-20s %7d %9.3f %9.3f %9.3f %9.3f %9.3f' % (name, summary['count'], summary['mean'],
+            summary['p50'], summary['p90'], summary['p99'], summary['max'])
+
+
+metrics = IoMetrics()
@@ -0,0 +1,323 @@
+"""
+Module describing the replies of the iOptron® Mount RS-232 Command Language.
+
+One table lists every command used by iOptronModel together with the shape of its
+reply and the layout of the reply fields. The transports use it to read exactly
+one reply of the right size, the parsers use it to find the values in the reply.
+"""
+
+
+# Imports
+import re
+from   dataclasses import dataclass
+import utilities
+from   ioMetrics import metrics
+
+
+TERMINATOR = '#'
+
+# Priorities of the IoWorker queue, lowest value runs first
+PRIORITY_STOP = 0
+PRIORITY_MOTION = 1
+PRIORITY_SET = 2
+PRIORITY_POLL = 3
+
+# Time to live of a reply that only changes through a set command of this program
+SESSION = float('inf')
+
+
+@dataclass(frozen=True)
+class CommandSpec:
+    """Reply description of one command.
+       code        = command code between ':' and the arguments, e.g. 'GEP' or 'SR'
+       replyLength = fixed reply length in bytes with the terminator included,
+                     None if the reply is only framed by the '#' terminator,
+                     0 if no reply is read (the mount sends none, or it is dropped
+                     by the next command)
+       fields      = tuple of (name, start, stop) slices into the reply
+       validFormat = format string for utilities.checkValidFormat or None
+       priority    = queue priority of the command in the IoWorker
+       ttl         = seconds a reply may be reused from the QueryCache, 0 if never
+       invalidates = codes of the queries whose cached replies this command changes
+       requires    = capability the mount needs for the command, an attribute of
+                     Capabilities, or None"""
+    code: str
+    replyLength: int = None
+    fields: tuple = ()
+    validFormat: str = None
+    priority: int = PRIORITY_POLL
+    ttl: float = 0.0
+    invalidates: tuple = ()
+    requires: str = None
+
+
+COMMANDS = {spec.code: spec for spec in (
+    # Status and position queries
+    CommandSpec('GLS', 24, (('longitude', 0, 9), ('latitude', 9, 17), ('gpsState', 17, 18),
+                            ('systemStatus', 18, 19), ('trackingRate', 19, 20),
+                            ('movingSpeed', 20, 21), ('timeSource', 21, 22),
+                            ('hemisphere', 22, 23)),
+                'vzzzzzzzzzzzzzzzzzzzzzz#'),
+    CommandSpec('GEP', 21, (('declination', 0, 9), ('rightAscension', 9, 18),
+                            ('pierSide', 18, 19), ('counterweight', 19, 20)),
+                'vzzzzzzzzzzzzzzzzzzz#'),
+    CommandSpec('GAC', 19, (('altitude', 0, 9), ('azimuth', 9, 18)),
+                'vzzzzzzzzzzzzzzzzz#'),
+    CommandSpec('GUT', 19, (('utcOffset', 0, 4), ('dst', 4, 5), ('julianDate', 5, 18)),
+                'vzzzzzzzzzzzzzzzzz#'),
+    CommandSpec('GAL', 4, (('limit', 0, 3),), ttl = SESSION),
+    CommandSpec('GMT', 4, (('code', 0, 1), ('degreeLimit', 1, 3)), ttl = SESSION, requires = 'equatorial'),
+    CommandSpec('GPC', 18, (('altitude', 0, 8), ('azimuth', 8, 17)), ttl = SESSION),
+    CommandSpec('GTR', 6, (('rate', 0, 5),), ttl = SESSION),
+    CommandSpec('AG', 5, (('rightAscentionRate', 0, 2), ('declinationRate', 2, 4)), ttl = SESSION,
+                requires = 'equatorial'),
+    CommandSpec('GSR', 2, (('maxSpeed', 0, 1),), ttl = SESSION),
+    CommandSpec('QAP', 1, (('memoryStore', 0, 1),)),
+    CommandSpec('GPE', 1, requires = 'pec'),
+    CommandSpec('GPR', 1, requires = 'pec'),
+    CommandSpec('GGF', 1, ttl = SESSION, requires = 'encoders'),
+    # Identification
+    CommandSpec('FW1', 13, (('mainboard', 0, 6), ('handController', 6, 12))),
+    CommandSpec('FW2', 13, (('rightAscention', 0, 6), ('declination', 6, 12))),
+    CommandSpec('MountInfo', 4, (('model', 0, 4),), 'zzzz'),
+    # Motion
+    CommandSpec('MS1', 1, priority = PRIORITY_MOTION),
+    CommandSpec('MSS', 1, priority = PRIORITY_MOTION),
+    CommandSpec('MH', 1, priority = PRIORITY_MOTION),
+    CommandSpec('MSH', 1, priority = PRIORITY_MOTION, requires = 'mechanicalZero'),
+    CommandSpec('MP1', 1, priority = PRIORITY_MOTION),
+    CommandSpec('MP0', 0, priority = PRIORITY_MOTION),
+    CommandSpec('mn', 0, priority = PRIORITY_MOTION),
+    CommandSpec('me', 0, priority = PRIORITY_MOTION),
+    CommandSpec('ms', 0, priority = PRIORITY_MOTION),
+    CommandSpec('mw', 0, priority = PRIORITY_MOTION),
+    CommandSpec('ZS', 0, priority = PRIORITY_MOTION),
+    CommandSpec('ZQ', 0, priority = PRIORITY_MOTION),
+    CommandSpec('ZE', 0, priority = PRIORITY_MOTION),
+    CommandSpec('ZC', 0, priority = PRIORITY_MOTION),
+    # Stops are sent by sendNow, which does not wait for the '1', it is dropped by settleAfterStop
+    CommandSpec('Q', 1, priority = PRIORITY_STOP),
+    CommandSpec('qR', 1, priority = PRIORITY_STOP),
+    CommandSpec('qD', 1, priority = PRIORITY_STOP),
+    # Settings
+    CommandSpec('SR', 1, priority = PRIORITY_SET),
+    CommandSpec('SRA', 1, priority = PRIORITY_SET),
+    CommandSpec('Sds', 1, priority = PRIORITY_SET),
+    CommandSpec('Sas', 1, priority = PRIORITY_SET),
+    CommandSpec('Sz', 1, priority = PRIORITY_SET),
+    CommandSpec('SZP', 1, priority = PRIORITY_SET),
+    CommandSpec('SAL', 1, priority = PRIORITY_SET, invalidates = ('GAL',)),
+    CommandSpec('RG', 1, priority = PRIORITY_SET, invalidates = ('AG',), requires = 'equatorial'),
+    CommandSpec('SGF', 1, priority = PRIORITY_SET, invalidates = ('GGF',), requires = 'encoders'),
+    CommandSpec('RR', 1, priority = PRIORITY_SET, invalidates = ('GTR',)),
+    CommandSpec('RT', 1, priority = PRIORITY_SET),
+    CommandSpec('SDS', 1, priority = PRIORITY_SET),
+    CommandSpec('SHE', 1, priority = PRIORITY_SET),
+    CommandSpec('SLA', 1, priority = PRIORITY_SET),
+    CommandSpec('SLO', 1, priority = PRIORITY_SET),
+    CommandSpec('SG', 1, priority = PRIORITY_SET),
+    CommandSpec('MSR', 1, priority = PRIORITY_SET, invalidates = ('GSR',)),
+    CommandSpec('SMT', 1, priority = PRIORITY_SET, invalidates = ('GMT',), requires = 'equatorial'),
+    CommandSpec('SPH', 1, priority = PRIORITY_SET, invalidates = ('GPC',)),
+    CommandSpec('SPA', 1, priority = PRIORITY_SET, invalidates = ('GPC',)),
+    CommandSpec('SPR', 1, priority = PRIORITY_SET, requires = 'pec'),
+    CommandSpec('SPP', 1, priority = PRIORITY_SET, requires = 'pec'),
+    CommandSpec('ST', 1, priority = PRIORITY_SET),
+    CommandSpec('CM', 1, priority = PRIORITY_SET),
+    CommandSpec('SUT', 0, priority = PRIORITY_SET),
+    CommandSpec('RAS', 0, priority = PRIORITY_SET,
+                invalidates = ('GAL', 'GMT', 'GPC', 'GTR', 'AG', 'GSR', 'GGF')),
+)}
+
+@dataclass(frozen=True)
+class Capabilities:
+    """Features of a mount model.
+       encoders       = the axes have encoders, PEC is not needed
+       pec            = the periodic error can be recorded and played back
+       mechanicalZero = the mount can search its mechanical zero position
+       mountType      = 'equatorial' or 'altaz'"""
+    encoders: bool = False
+    pec: bool = True
+    mechanicalZero: bool = False
+    mountType: str = 'equatorial'
+
+    @property
+    def equatorial(self):
+        return self.mountType == 'equatorial'
+
+    def supports(self, spec):
+        """Can the mount execute the command of spec, see CommandSpec.requires."""
+        return spec.requires is None or getattr(self, spec.requires)
+
+    @classmethod
+    def fromConfig(cls, config):
+        """Capabilities set in setup.ini [CAPABILITIES], for models missing in
+        MODEL_CAPABILITIES. config is the dict of utilities.readConfig()."""
+        return cls(encoders = config['Encoders'] == 'True', pec = config['Pec'] == 'True',
+                   mechanicalZero = config['MechanicalZero'] == 'True', mountType = config['MountType'])
+
+
+# Capabilities by the model code of the :MountInfo# reply
+MODEL_CAPABILITIES = {
+    '0026': Capabilities(),                                                  # CEM26
+    '0027': Capabilities(encoders = True, pec = False),                      # CEM26EC
+    '0028': Capabilities(),                                                  # GEM28
+    '0029': Capabilities(encoders = True, pec = False),                      # GEM28EC
+    '0040': Capabilities(mechanicalZero = True),                             # CEM40
+    '0041': Capabilities(encoders = True, pec = False, mechanicalZero = True),  # CEM40EC
+    '0043': Capabilities(mechanicalZero = True),                             # GEM45
+    '0044': Capabilities(encoders = True, pec = False, mechanicalZero = True),  # GEM45EC
+    '0070': Capabilities(mechanicalZero = True),                             # CEM70
+    '0071': Capabilities(encoders = True, pec = False, mechanicalZero = True),  # CEM70EC
+    '0120': Capabilities(mechanicalZero = True),                             # CEM120
+    '0121': Capabilities(encoders = True, pec = False, mechanicalZero = True),  # CEM120EC
+    '0122': Capabilities(encoders = True, pec = False, mechanicalZero = True),  # CEM120EC2
+}
+
+
+def capabilitiesOf(model, default = None):
+    """Capabilities of a model code, default for models missing in the table."""
+    return MODEL_CAPABILITIES.get(model, Capabilities() if default is None else default)
+
+
+# Code lengths, longest first, so 'SRA' wins over 'SR' and 'SGF' over 'SG'
+_CODE_LENGTHS = sorted({len(code) for code in COMMANDS}, reverse = True)
+_specCache = {}
+
+
+def commandSpec(command):
+    """Return the CommandSpec of a complete command like ':SR5#'. Commands
+    missing in the table get a spec with a terminator framed reply."""
+    spec = _specCache.get(command)
+    if spec is not None:
+        return spec
+    body = command[1:] if command.startswith(':') else command
+    for length in _CODE_LENGTHS:
+        spec = COMMANDS.get(body[:length])
+        if spec is not None:
+            break
+    else:
+        spec = CommandSpec(body.rstrip(TERMINATOR))
+    if len(_specCache) < 256:
+        _specCache[command] = spec
+    return spec
+
+def replyIsValid(spec, reply):
+    """Has the reply the length and format of the command's CommandSpec."""
+    if spec.replyLength and len(reply) != spec.replyLength:
+        return False
+    if spec.replyLength is None and not reply.endswith(TERMINATOR):
+        return False
+    return spec.validFormat is None or utilities.checkValidFormat(reply, spec.validFormat)
+
+def splitReply(code, reply):
+    """Split a reply into its fields by the layout in the command table. Returns
+    a dict of field name and reply slice, or None if the reply has not the
+    expected length or format."""
+    spec = COMMANDS[code]
+    if not replyIsValid(spec, reply):
+        metrics.recordMalformed(code)
+        return None
+    return {name: reply[start:stop] for name, start, stop in spec.fields}
+
+
+# Regular expression of each character of CommandSpec.validFormat, see utilities.checkValidFormat
+_FORMAT_PATTERNS = {'v': '[+-]', 'z': '[0-9]', 'd': '°', 'h': 'h', 'm': "[m']", 's': '[s"]',
+                    'p': '[.:]', 'n': '[NS]', 'w': '[WE]'}
+
+
+def compileReply(code):
+    """Compile the layout of a command's replies into one regular expression. It
+    matches a valid reply as a whole and has one group per field, so a reply is
+    checked and split in a single pass."""
+    spec = COMMANDS[code]
+    characters = [_FORMAT_PATTERNS.get(character, re.escape(character)) for character in spec.validFormat]
+    pattern = ''
+    position = 0
+    for name, start, stop in spec.fields:
+        pattern += ''.join(characters[position:start]) + '(' + ''.join(characters[start:stop]) + ')'
+        position = stop
+    return re.compile(pattern + ''.join(characters[position:]))
+
+
+# Meaning of the :GLS# codes, indexed by the code.
+# System status: description, slewing, tracking, PEC enabled, parked; None leaves a value as it is
+SYSTEM_STATES = (
+    ("stopped at non-zero position", False, False, None, None),
+    ("tracking with periodic error correction disabled", False, True, False, None),
+    ("slewing", True, False, None, None),
+    ("auto-guiding", False, True, None, None),
+    ("meridian flipping", True, None, None, None),
+    ("tracking with periodic error correction enabled", False, True, True, None),
+    ("parked", False, False, None, True),
+    ("stopped at zero position (home position)", False, False, None, None),
+)
+UNKNOWN_STATE = (None, None, None, None, None)
+TIME_SOURCES = (None, "local - RS232 or ethernet", "hand controller", "GPS")
+HEMISPHERES = ('south', 'north')
+
+
+def _lookup(table, code, default = None):
+    """Entry of a code table, default for codes newer than the table."""
+    index = ord(code) - 48
+    return table[index] if index < len(table) else default
+
+
+@dataclass(frozen=True, slots=True)
+class MountStatus:
+    """Decoded :GLS# reply. The codes are kept as the reply characters, the
+    descriptions are looked up in the tables above.
+       longitude, latitude = degrees
+       gpsState            = 0 no GPS, 1 GPS without fix, 2 GPS locked
+       systemStatus        = '0' .. '7', see SYSTEM_STATES
+       trackingRate        = '0' .. '4', sidereal, lunar, solar, King, custom
+       movingSpeed         = '1' .. '9'
+       timeSource          = '1' .. '3', see TIME_SOURCES
+       hemisphere          = '0' south, '1' north"""
+    longitude: float
+    latitude: float
+    gpsState: int
+    systemStatus: str
+    trackingRate: str
+    movingSpeed: str
+    timeSource: str
+    hemisphere: str
+
+    @property
+    def gpsAvailable(self):
+        return self.gpsState > 0
+
+    @property
+    def gpsLocked(self):
+        return self.gpsState == 2
+
+    @property
+    def systemState(self):
+        return _lookup(SYSTEM_STATES, self.systemStatus, UNKNOWN_STATE)
+
+    @property
+    def description(self):
+        return self.systemState[0]
+
+    @property
+    def timeSourceDescription(self):
+        return _lookup(TIME_SOURCES, self.timeSource)
+
+    @property
+    def hemisphereLocation(self):
+        return _lookup(HEMISPHERES, self.hemisphere)
+
+
+_statusReply = compileReply('GLS')
+
+
+def parseStatus(reply):
+    """Decode a :GLS# reply into a MountStatus, or None if it is not valid."""
+    match = _statusReply.fullmatch(reply)
+    if match is None:
+        metrics.recordMalformed('GLS')
+        return None
+    longitude, latitude, gpsState, systemStatus, trackingRate, movingSpeed, timeSource, hemisphere = match.groups()
+    return MountStatus(utilities.convertArcSecondsToDegrees(int(longitude)),
+                       utilities.convertArcSecondsToDegrees(int(latitude)) - 90,    # Val is +90
+                       int(gpsState), systemStatus, trackingRate, movingSpeed, timeSource, hemisphere)
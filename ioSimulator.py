@@ -0,0 +1,543 @@
+"""
+Simulator of an iOptron® mount for testing and benchmarking without a mount.
+
+Answers the commands used by iOptronModel over a pseudo terminal, in place of the
+USB serial port, and over a local TCP port, in place of the 8899 WLAN bridge.
+Reply latency, jitter and slewing speed can be set, so changes to the transport
+and the polling loop can be measured offline.
+
+    python3 ioSimulator.py --tcp 8899 --pty --latency 0.005 --jitter 0.002
+
+Then enter the printed pty device as serial port, or 127.0.0.1 and the TCP port
+as WLAN address, in the setup dialog.
+"""
+
+
+# Imports
+import os
+import tty
+import math
+import time
+import random
+import socket
+import logging
+import argparse
+import threading
+from   dataclasses import dataclass
+import ioProtocol
+
+
+J2000_UNIX = 946728000.0          # 2000-01-01 12:00 UTC
+ARCSEC_PER_DEGREE = 360000        # Positions are in 0.01 arc seconds
+SIDEREAL_RATE = 15.041            # Arc seconds per second
+
+
+@dataclass
+class SimulatorConfig:
+    """Settings of the simulated mount.
+       latency   = delay in seconds before each reply
+       jitter    = random +/- part of the delay in seconds
+       slewRate  = slewing speed of both axes in degrees per second
+       model     = reply of :MountInfo#, 0026 is a CEM26"""
+    latency: float = 0.005
+    jitter: float = 0.002
+    slewRate: float = 4.0
+    model: str = '0026'
+    latitude: float = 50.0
+    longitude: float = 10.0
+    utcOffset: int = 60
+    mainboardFirmware: str = '210105'
+    handControllerFirmware: str = 'xxxxxx'
+    motorFirmware: str = '210105'
+
+
+class SimulatedMount:
+    """State of the simulated mount. Positions are held as RA and DEC in degrees,
+    ALT and AZ are computed from them for the configured location. Not thread
+    safe, MountSimulator serializes the calls."""
+
+    # Manual moving speeds of :SRn# as factors of sidereal, 9 is the slewing speed
+    movingSpeeds = {1: 1, 2: 2, 3: 8, 4: 16, 5: 64, 6: 128, 7: 256, 8: 512}
+
+    def __init__(self, config):
+        self.config = config
+        self.latitude = config.latitude
+        self.longitude = config.longitude
+        self.utcOffset = config.utcOffset
+        self.dst = '0'
+        self.statusCode = '7'           # Stopped at zero position
+        self.trackingRate = '0'         # Sidereal
+        self.movingSpeed = 5            # 64x
+        self.maxSpeed = '9'
+        self.altitudeLimit = '+00'
+        self.meridianCode = '1'
+        self.meridianLimit = '10'
+        self.guidingRates = '5050'
+        self.customRate = '10000'
+        self.guidingFilter = '0'
+        self.pecRecording = False
+        self.pecPlayback = False
+        self.parkAltitude = 0
+        self.parkAzimuth = 0
+        self.targetRa = None
+        self.targetDec = None
+        self.targetAlt = None
+        self.targetAz = None
+        self.slewTarget = None          # (ra, dec, status code on arrival)
+        self.raMotion = 0.0             # Manual motion in degrees per second
+        self.decMotion = 0.0
+        self.lastUpdate = time.time()
+        self.dec = 90.0
+        self.ra = self.localSiderealTime()
+
+    # Sky
+    def localSiderealTime(self, now = None):
+        """Local sidereal time in degrees."""
+        julianDate = (time.time() if now is None else now) / 86400.0 + 2440587.5
+        return (280.46061837 + 360.98564736629 * (julianDate - 2451545.0) + self.longitude) % 360
+
+    def altAzFromRaDec(self, ra, dec):
+        """Convert RA and DEC in degrees to ALT and AZ in degrees, AZ from north over east."""
+        hourAngle = math.radians(self.localSiderealTime() - ra)
+        dec = math.radians(dec)
+        lat = math.radians(self.latitude)
+        altitude = math.asin(math.sin(dec) * math.sin(lat) + math.cos(dec) * math.cos(lat) * math.cos(hourAngle))
+        azimuth = math.atan2(-math.sin(hourAngle) * math.cos(dec),
+                             math.cos(lat) * math.sin(dec) - math.sin(lat) * math.cos(dec) * math.cos(hourAngle))
+        return math.degrees(altitude), math.degrees(azimuth) % 360
+
+    def raDecFromAltAz(self, altitude, azimuth):
+        """Convert ALT and AZ in degrees to RA and DEC in degrees."""
+        altitude = math.radians(altitude)
+        azimuth = math.radians(azimuth)
+        lat = math.radians(self.latitude)
+        dec = math.asin(math.sin(altitude) * math.sin(lat) + math.cos(altitude) * math.cos(lat) * math.cos(azimuth))
+        hourAngle = math.atan2(-math.sin(azimuth) * math.cos(altitude),
+                               math.cos(lat) * math.sin(altitude) - math.sin(lat) * math.cos(altitude) * math.cos(azimuth))
+        return (self.localSiderealTime() - math.degrees(hourAngle)) % 360, math.degrees(dec)
+
+    # Motion
+    def isTracking(self):
+        return self.statusCode in ('1', '3', '5')
+
+    def update(self):
+        """Advance the axes to the current time."""
+        now = time.time()
+        elapsed = now - self.lastUpdate
+        self.lastUpdate = now
+        if not self.isTracking() and self.slewTarget is None:
+            # The sky moves on, the RA of a stopped mount grows
+            self.ra = (self.ra + elapsed * SIDEREAL_RATE / 3600) % 360
+        if self.slewTarget is not None:
+            targetRa, targetDec, arrivalCode = self.slewTarget
+            step = self.config.slewRate * elapsed
+            raDistance = (targetRa - self.ra + 180) % 360 - 180
+            decDistance = targetDec - self.dec
+            self.ra = (self.ra + max(-step, min(step, raDistance))) % 360
+            self.dec += max(-step, min(step, decDistance))
+            if abs(raDistance) <= step and abs(decDistance) <= step:
+                self.slewTarget = None
+                self.statusCode = arrivalCode
+        self.ra = (self.ra + self.raMotion * elapsed) % 360
+        self.dec = max(-90.0, min(90.0, self.dec + self.decMotion * elapsed))
+
+    def startSlew(self, ra, dec, arrivalCode):
+        """Slew to RA and DEC, the status code is set on arrival. Returns '0' if the
+        target is below the altitude limit."""
+        if self.altAzFromRaDec(ra, dec)[0] < int(self.altitudeLimit):
+            return '0'
+        if arrivalCode is None:
+            arrivalCode = '1' if self.isTracking() else '0'
+        self.slewTarget = (ra, dec, arrivalCode)
+        self.statusCode = '2'
+        return '1'
+
+    def manualRate(self):
+        """Manual moving speed in degrees per second."""
+        if self.movingSpeed in self.movingSpeeds:
+            return self.movingSpeeds[self.movingSpeed] * SIDEREAL_RATE / 3600
+        return self.config.slewRate
+
+    # Replies
+    def reply(self, command):
+        """Execute one command like ':GEP#' and return its reply, None if the mount
+        sends none."""
+        self.update()
+        code = ioProtocol.commandSpec(command).code
+        argument = command[1 + len(code):-1]
+        handler = getattr(self, 'command' + code, None)
+        if handler is None:
+            logging.debug('Simulator: unknown command ' + command)
+            return None
+        return handler(argument)
+
+    def commandGLS(self, argument):
+        longitude = round(self.longitude * ARCSEC_PER_DEGREE)
+        latitude = round((self.latitude + 90) * ARCSEC_PER_DEGREE)
+        hemisphere = '1' if self.latitude >= 0 else '0'
+        return f'{longitude:+09d}{latitude:08d}2{self.statusCode}{self.trackingRate}' \
+            f'{self.movingSpeed}1{hemisphere}#'
+
+    def commandGEP(self, argument):
+        hourAngle = (self.localSiderealTime() - self.ra) % 360
+        pierSide = '0' if hourAngle < 180 else '1'
+        counterweight = '1' if self.dec < 90 else '0'
+        return f'{round(self.dec * ARCSEC_PER_DEGREE):+09d}{round(self.ra * ARCSEC_PER_DEGREE):09d}' \
+            f'{pierSide}{counterweight}#'
+
+    def commandGAC(self, argument):
+        altitude, azimuth = self.altAzFromRaDec(self.ra, self.dec)
+        return f'{round(altitude * ARCSEC_PER_DEGREE):+09d}{round(azimuth * ARCSEC_PER_DEGREE):09d}#'
+
+    def commandGUT(self, argument):
+        j2kMs = int((time.time() - J2000_UNIX) * 1000)
+        return f'{self.utcOffset:+04d}{self.dst}{j2kMs:013d}#'
+
+    def commandGAL(self, argument):
+        return self.altitudeLimit + '#'
+
+    def commandGMT(self, argument):
+        return self.meridianCode + self.meridianLimit + '#'
+
+    def commandGPC(self, argument):
+        return f'{self.parkAltitude:08d}{self.parkAzimuth:09d}#'
+
+    def commandGTR(self, argument):
+        return self.customRate + '#'
+
+    def commandAG(self, argument):
+        return self.guidingRates + '#'
+
+    def commandGSR(self, argument):
+        return self.maxSpeed + '#'
+
+    def commandQAP(self, argument):
+        return '1'
+
+    def commandGPE(self, argument):
+        return '1'
+
+    def commandGPR(self, argument):
+        return '1' if self.pecRecording else '0'
+
+    def commandGGF(self, argument):
+        return self.guidingFilter
+
+    def commandFW1(self, argument):
+        return self.config.mainboardFirmware + self.config.handControllerFirmware + '#'
+
+    def commandFW2(self, argument):
+        return self.config.motorFirmware + self.config.motorFirmware + '#'
+
+    def commandMountInfo(self, argument):
+        return self.config.model
+
+    def commandMS1(self, argument):
+        if self.targetRa is None or self.targetDec is None:
+            return '0'
+        return self.startSlew(self.targetRa, self.targetDec, None)
+
+    def commandMSS(self, argument):
+        if self.targetAlt is None or self.targetAz is None:
+            return '0'
+        return self.startSlew(*self.raDecFromAltAz(self.targetAlt, self.targetAz), None)
+
+    def commandMH(self, argument):
+        self.slewTarget = (self.localSiderealTime(), 90.0, '7')
+        self.statusCode = '2'
+        return '1'
+
+    commandMSH = commandMH
+
+    def commandMP1(self, argument):
+        ra, dec = self.raDecFromAltAz(self.parkAltitude / ARCSEC_PER_DEGREE,
+                                      self.parkAzimuth / ARCSEC_PER_DEGREE)
+        self.slewTarget = (ra, dec, '6')
+        self.statusCode = '2'
+        return '1'
+
+    def commandMP0(self, argument):
+        if self.statusCode == '6':
+            self.statusCode = '0'
+        return '1'
+
+    def commandmn(self, argument):
+        self.decMotion = self.manualRate()
+
+    def commandms(self, argument):
+        self.decMotion = -self.manualRate()
+
+    def commandme(self, argument):
+        self.raMotion = -self.manualRate()
+
+    def commandmw(self, argument):
+        self.raMotion = self.manualRate()
+
+    def commandZS(self, argument):
+        self.raMotion = SIDEREAL_RATE / 3600 * int(self.guidingRates[:2]) / 100
+
+    def commandZQ(self, argument):
+        self.raMotion = -SIDEREAL_RATE / 3600 * int(self.guidingRates[:2]) / 100
+
+    def commandZE(self, argument):
+        self.decMotion = SIDEREAL_RATE / 3600 * int(self.guidingRates[2:]) / 100
+
+    def commandZC(self, argument):
+        self.decMotion = -SIDEREAL_RATE / 3600 * int(self.guidingRates[2:]) / 100
+
+    def commandQ(self, argument):
+        self.raMotion = 0.0
+        self.decMotion = 0.0
+        if self.slewTarget is not None:
+            self.slewTarget = None
+            self.statusCode = '0'
+        return '1'
+
+    def commandqR(self, argument):
+        self.raMotion = 0.0
+        return '1'
+
+    def commandqD(self, argument):
+        self.decMotion = 0.0
+        return '1'
+
+    def commandSR(self, argument):
+        self.movingSpeed = int(argument)
+        return '1'
+
+    def commandSRA(self, argument):
+        self.targetRa = int(argument) / ARCSEC_PER_DEGREE
+        return '1'
+
+    def commandSds(self, argument):
+        self.targetDec = int(argument) / ARCSEC_PER_DEGREE
+        return '1'
+
+    def commandSas(self, argument):
+        self.targetAlt = int(argument) / ARCSEC_PER_DEGREE
+        return '1'
+
+    def commandSz(self, argument):
+        self.targetAz = int(argument) / ARCSEC_PER_DEGREE
+        return '1'
+
+    def commandSZP(self, argument):
+        self.statusCode = '7'
+        return '1'
+
+    def commandSAL(self, argument):
+        self.altitudeLimit = argument
+        return '1'
+
+    def commandRG(self, argument):
+        self.guidingRates = argument
+        return '1'
+
+    def commandSGF(self, argument):
+        self.guidingFilter = argument
+        return '1'
+
+    def commandRR(self, argument):
+        self.customRate = argument
+        return '1'
+
+    def commandRT(self, argument):
+        self.trackingRate = argument
+        return '1'
+
+    def commandSDS(self, argument):
+        self.dst = argument
+        return '1'
+
+    def commandSHE(self, argument):
+        return '1'
+
+    def commandSLA(self, argument):
+        self.latitude = int(argument) / ARCSEC_PER_DEGREE
+        return '1'
+
+    def commandSLO(self, argument):
+        self.longitude = int(argument) / ARCSEC_PER_DEGREE
+        return '1'
+
+    def commandSG(self, argument):
+        self.utcOffset = int(argument)
+        return '1'
+
+    def commandMSR(self, argument):
+        self.maxSpeed = argument
+        return '1'
+
+    def commandSMT(self, argument):
+        self.meridianCode = argument[:1]
+        self.meridianLimit = argument[1:3]
+        return '1'
+
+    def commandSPH(self, argument):
+        self.parkAltitude = int(argument)
+        return '1'
+
+    def commandSPA(self, argument):
+        self.parkAzimuth = int(argument)
+        return '1'
+
+    def commandSPR(self, argument):
+        self.pecRecording = argument == '1'
+        return '1'
+
+    def commandSPP(self, argument):
+        self.pecPlayback = argument == '1'
+        if self.isTracking():
+            self.statusCode = '5' if self.pecPlayback else '1'
+        return '1'
+
+    def commandST(self, argument):
+        if argument == '1':
+            self.statusCode = '5' if self.pecPlayback else '1'
+        elif self.isTracking():
+            self.statusCode = '0'
+        return '1'
+
+    def commandCM(self, argument):
+        if self.targetRa is not None and self.targetDec is not None:
+            self.ra = self.targetRa
+            self.dec = self.targetDec
+        return '1'
+
+    def commandSUT(self, argument):
+        return '1'
+
+    def commandRAS(self, argument):
+        self.__init__(self.config)
+        return '1'
+
+
+class MountSimulator:
+    """Serves one SimulatedMount over a pseudo terminal and/or TCP. Commands of all
+    clients are executed one at a time, each reply is sent after the configured
+    latency and jitter."""
+    def __init__(self, config = None):
+        self.config = SimulatorConfig() if config is None else config
+        self.mount = SimulatedMount(self.config)
+        self.lock = threading.Lock()
+        self.threads = []
+        self.server = None
+        self.ptyName = None
+
+    def replyDelay(self):
+        """Delay before a reply in seconds."""
+        return max(0.0, self.config.latency + random.uniform(-self.config.jitter, self.config.jitter))
+
+    def handle(self, buffer, write):
+        """Execute every complete command in buffer (a bytearray) and write the
+        replies. Incomplete commands stay in the buffer."""
+        while True:
+            index = buffer.find(b'#')
+            if index < 0:
+                return
+            command = buffer[:index + 1].decode('ascii', 'replace')
+            del buffer[:index + 1]
+            with self.lock:
+                reply = self.mount.reply(command)
+            if reply is not None:
+                time.sleep(self.replyDelay())
+                write(reply.encode('ascii'))
+
+    def startThread(self, target, *args):
+        thread = threading.Thread(target = target, args = args, daemon = True)
+        thread.start()
+        self.threads.append(thread)
+
+    def servePty(self):
+        """Open a pseudo terminal and serve it. Returns the device name to use as
+        serial port."""
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        self.ptyName = os.ttyname(slave)
+        self.ptySlave = slave       # Kept open, so reads don't fail between clients
+        self.startThread(self.runPty, master)
+        logging.info('Simulator serving on ' + self.ptyName)
+        return self.ptyName
+
+    def runPty(self, master):
+        buffer = bytearray()
+        while True:
+            try:
+                data = os.read(master, 4096)
+            except OSError:
+                return
+            buffer += data
+            self.handle(buffer, lambda reply: os.write(master, reply))
+
+    def serveTcp(self, host = '127.0.0.1', port = 8899):
+        """Listen on a TCP port like the WLAN bridge of the mount. Port 0 picks a
+        free port. Returns the port."""
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, int(port)))
+        self.server.listen()
+        port = self.server.getsockname()[1]
+        self.startThread(self.runTcp)
+        logging.info('Simulator serving on ' + host + ':' + str(port))
+        return port
+
+    def runTcp(self):
+        while True:
+            try:
+                client, address = self.server.accept()
+            except OSError:
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.startThread(self.runTcpClient, client)
+
+    def runTcpClient(self, client):
+        buffer = bytearray()
+        with client:
+            while True:
+                try:
+                    data = client.recv(4096)
+                except OSError:
+                    return
+                if not data:
+                    return
+                buffer += data
+                try:
+                    self.handle(buffer, client.sendall)
+                except OSError:
+                    return
+
+    def close(self):
+        """Stop listening on TCP."""
+        if self.server is not None:
+            self.server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Simulated iOptron mount')
+    parser.add_argument('--pty', action = 'store_true', help = 'serve on a pseudo terminal')
+    parser.add_argument('--tcp', type = int, metavar = 'PORT', help = 'serve on a TCP port, e.g. 8899')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--latency', type = float, default = SimulatorConfig.latency)
+    parser.add_argument('--jitter', type = float, default = SimulatorConfig.jitter)
+    parser.add_argument('--slew-rate', type = float, default = SimulatorConfig.slewRate,
+                        help = 'degrees per second')
+    parser.add_argument('--model', default = SimulatorConfig.model)
+    args = parser.parse_args()
+    logging.basicConfig(level = logging.INFO, format = '%(asctime)s %(message)s')
+
+    config = SimulatorConfig(latency = args.latency, jitter = args.jitter,
+                             slewRate = args.slew_rate, model = args.model)
+    simulator = MountSimulator(config)
+    if args.pty or args.tcp is None:
+        print('serial port: ' + simulator.servePty())
+    if args.tcp is not None:
+        print('WLAN: ' + args.host + ':' + str(simulator.serveTcp(args.host, args.tcp)))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,30 +7,182 @@ rewritten and adapted: @author - Wolfgang Rafelt, 2023
 
 
 # Imports
-import sys
 import time
+import codecs
+import queue
+import random
+import select
 import serial
 import socket
 import logging
-import iOptronGUI
-from   dialoges import *
+import itertools
+import threading
+import collections
+from   datetime import datetime
+from   concurrent.futures import Future
+import ioProtocol
+from   ioMetrics import metrics
+from   ioProtocol import PRIORITY_STOP, PRIORITY_MOTION, PRIORITY_POLL
 
 
-class IoConnectionUSB:
+def extractFrame(buffer, replyLength = None, terminator = b'#'):
+    """Cut one reply off the front of buffer (a bytearray). The reply ends after
+    replyLength bytes if a length is given, otherwise with the terminator.
+    Returns the reply as bytes or None if the buffer holds no complete reply yet."""
+    if replyLength is not None:
+        if len(buffer) < replyLength:
+            return None
+        end = replyLength
+    else:
+        index = buffer.find(terminator)
+        if index < 0:
+            return None
+        end = index + len(terminator)
+    frame = bytes(buffer[:end])
+    del buffer[:end]
+    return frame
+
+
+class AdaptivePacing:
+    """Gap between two commands, learned from the replies. Every valid reply lets
+    the gap shrink by 5 % down to the floor, a garbled or missing reply doubles it
+    up to the ceiling. The turnarounds are recorded by ioMetrics. Learned gaps are
+    kept per connection type and mount model, so the next connection to the same
+    mount starts with them."""
+    learnedGaps = {}
+
+    def __init__(self, connectionType, floor, gap, ceiling = 0.25):
+        self.connectionType = connectionType
+        self.model = None
+        self.floor = floor
+        self.ceiling = ceiling
+        self.gap = gap
+
+    def useModel(self, model):
+        """Continue with the gap learned for this mount model, if there is one."""
+        self.model = model
+        self.gap = self.learnedGaps.get((self.connectionType, model), self.gap)
+        logging.info('Pacing ' + self.connectionType + ' ' + str(model) + ': %.1f ms' % (self.gap * 1000))
+
+    def replyValid(self):
+        self.gap = max(self.floor, self.gap * 0.95)
+        self.store()
+
+    def replyInvalid(self, code):
+        self.gap = min(self.ceiling, max(self.gap * 2, self.floor * 2, 0.005))
+        logging.info('Pacing: invalid reply to ' + code + ', gap %.1f ms' % (self.gap * 1000))
+        self.store()
+
+    def store(self):
+        if self.model is not None:
+            self.learnedGaps[(self.connectionType, self.model)] = self.gap
+
+
+class IoConnection:
+    """Exchanges shared by the connections. Subclasses provide send() and recv()."""
+    def query(self, command, timeout = None):
+        """Send a command and receive its reply, sized by the command table in
+        ioProtocol. Commands without a reply return an empty string after sending."""
+        startTime = time.monotonic()
+        self.send(command)
+        spec = ioProtocol.commandSpec(command)
+        reply = '' if spec.replyLength == 0 else self.recv(spec.replyLength, timeout)
+        turnaround = time.monotonic() - startTime
+        metrics.recordExchange(spec.code, turnaround, len(command), len(reply))
+        self.checkReply(spec, reply)
+        return reply
+
+    def checkReply(self, spec, reply):
+        """Count a missing reply as timeout and let the pacing learn from the reply.
+        Replies dropped after an emergency stop are not judged."""
+        if spec.replyLength == 0 or self.replyStale:
+            return
+        if spec.replyLength and len(reply) != spec.replyLength:
+            metrics.recordTimeout(spec.code)
+        if ioProtocol.replyIsValid(spec, reply):
+            self.pacing.replyValid()
+        else:
+            self.pacing.replyInvalid(spec.code)
+
+    def reconnect(self):
+        """Open a lost connection again. Raises IoConnectionError if it fails."""
+        raise IoConnectionError(type(self).__name__ + ' can not reconnect.')
+
+    def expectReplies(self, data):
+        """PRIVATE: Note the replies the mount owes for the commands in data, in the
+        order it sends them. Called while writing data."""
+        for command in data.split(ioProtocol.TERMINATOR)[:-1]:
+            replyLength = ioProtocol.commandSpec(command + ioProtocol.TERMINATOR).replyLength
+            if replyLength != 0:
+                self.unreadReplies.append(replyLength)
+
+    def replyRead(self):
+        """PRIVATE: The first reply owed has been read or given up."""
+        if self.unreadReplies:
+            self.unreadReplies.popleft()
+
+    def settleAfterStop(self):
+        """Drop the replies the mount still owes after a stop command sent by sendNow:
+        the rest of the replies awaited when the stop was sent and the reply of the
+        stop itself. They are counted and read one by one, so a mount answering
+        slowly can not slip one of them in front of the reply of the next command."""
+        with self.writeLock:
+            self.stopSent = False
+            owedReplies = list(self.unreadReplies)
+            self.unreadReplies.clear()
+        for replyLength in owedReplies:
+            deadline = time.monotonic() + self.recvTimeout
+            while extractFrame(self.rxBuffer, replyLength) is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.mountIsConnected:
+                    logging.info('reply owed after a stop not received: ' + str(bytes(self.rxBuffer)))
+                    self.rxBuffer.clear()
+                    return
+                self.rxBuffer += self.readAvailable(remaining)
+        self.rxBuffer.clear()
+
+    def queryBatch(self, commands, timeout = None):
+        """Send several commands in one write and split the replies, which the mount
+        sends back in order, by the command table. Returns the list of replies, an
+        empty string for commands without a reply."""
+        startTime = time.monotonic()
+        self.send(''.join(commands))
+        replies = []
+        for command in commands:
+            spec = ioProtocol.commandSpec(command)
+            reply = '' if spec.replyLength == 0 else self.recv(spec.replyLength, timeout)
+            self.checkReply(spec, reply)
+            replies.append(reply)
+        metrics.recordExchange('+'.join(ioProtocol.commandSpec(command).code for command in commands),
+                               time.monotonic() - startTime, sum(map(len, commands)), sum(map(len, replies)))
+        return replies
+
+
+class IoConnectionError(Exception):
+    """The connection to the mount could not be opened."""
+
+
+class IoConnectionUSB(IoConnection):
     """Class for communicating with devices over serial."""
     def __init__(self, port = '/dev/ttyUSB0', baud = 115200):
-        self.sendWait = 0.10         # Arbritrary waiting period to save flooding comms
+        self.pacing = AdaptivePacing('USB', floor = 0.002, gap = 0.01)  # Gap between two commands
+        self.recvTimeout = 1.0       # Deadline for a complete reply
+        self.lastSendTime = 0.0
+        self.rxBuffer = bytearray()
+        self.writeLock = threading.Lock()
+        self.replyStale = False      # Set by sendNow, the awaited reply is dropped
+        self.stopSent = False        # Set by sendNow, late replies are dropped by the next send
+        self.unreadReplies = collections.deque()   # Lengths of the replies the mount still owes
+        self.reading = False         # The worker waits in a read of the serial port
         self.mountIsConnected = False
         try:
-            self.ser = serial.Serial(port, baud)
+            self.ser = serial.Serial(port, baud, timeout = self.recvTimeout)
             self.mountIsConnected = True
             logging.debug('USB serial port ' + port + 'connected')
         except serial.SerialException:
             logging.error('serial connection failed')
             self.mountIsConnected = False
-            info = PopupDialog('ERROR: USB', 'Serial connection failed.', 30, 'red')
-            info.exec()
-            sys.exit(1)
+            raise IoConnectionError('Serial connection to ' + str(port) + ' failed.')
 
     def isOpen(self):
         """Open the serial connection."""
@@ -41,24 +193,90 @@ class IoConnectionUSB:
             return False
 
     def send(self, data):
-        """Send data over the serial connection."""
+        """Send data over the serial connection. Late replies of earlier commands
+        are dropped first, so they can not be taken for the reply of this one."""
         bytesToSend = data.encode('utf-8')
+        gap = self.lastSendTime + self.pacing.gap - time.monotonic()
+        if gap > 0:
+            time.sleep(gap)
         try:
-            self.ser.write(bytesToSend)
-            time.sleep(self.sendWait)
+            while True:
+                if self.stopSent:
+                    self.settleAfterStop()
+                with self.writeLock:
+                    if self.stopSent:
+                        continue                # A stop came in between, settle again
+                    self.ser.reset_input_buffer()
+                    self.rxBuffer.clear()
+                    self.replyStale = False
+                    self.expectReplies(data)
+                    self.ser.write(bytesToSend)
+                break
         except:
             logging.error('USB sending serial --> %s' + data)
+        self.lastSendTime = time.monotonic()
 
+    def sendNow(self, data):
+        """Send data at once, also while another thread waits in recv. The reply
+        awaited there is dropped as stale. Used for emergency stops."""
+        with self.writeLock:
+            self.replyStale = True
+            self.stopSent = True
+            self.expectReplies(data)
+            self.ser.write(data.encode('utf-8'))
+            self.ser.flush()
+            # Only a pending read is cancelled, a cancel without one would end the next read at once
+            if self.reading and hasattr(self.ser, 'cancel_read'):
+                self.ser.cancel_read()
 
-    def recv(self):
-        """Receive the output."""
-        output = ''
+    def readAvailable(self, timeout):
+        """Read and return the bytes arriving within timeout seconds, without framing."""
+        self.ser.timeout = timeout
+        data = self.ser.read(1)
+        if data:
+            data += self.ser.read(self.ser.in_waiting)
+        return data
+
+    def recv(self, replyLength = None, timeout = None):
+        """Receive one reply. Waits until the '#' terminator or, if replyLength is
+        given, exactly replyLength bytes have arrived, but not longer than timeout
+        seconds (recvTimeout by default). Returns the reply including the terminator,
+        or the incomplete rest if the deadline has passed."""
+        deadline = time.monotonic() + (self.recvTimeout if timeout is None else timeout)
+        frame = extractFrame(self.rxBuffer, replyLength)
         try:
-            while self.ser.inWaiting() > 0:
-                output += self.ser.read(1).decode('utf-8')
+            while frame is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.ser.timeout = remaining
+                self.reading = True
+                try:
+                    if self.replyStale:
+                        break
+                    if replyLength is not None:
+                        # One blocking read of exactly the missing bytes
+                        chunk = self.ser.read(replyLength - len(self.rxBuffer))
+                    else:
+                        # Block for the first byte, then take everything already waiting
+                        chunk = self.ser.read(max(1, self.ser.in_waiting))
+                finally:
+                    self.reading = False
+                self.rxBuffer += chunk
+                frame = extractFrame(self.rxBuffer, replyLength)
         except:
-            logging.error('USB received serial <-- %s' + str(output))
-        return output
+            logging.error('USB received serial <-- %s' + str(bytes(self.rxBuffer)))
+        if frame is not None or not self.replyStale:
+            self.replyRead()
+        if self.replyStale:
+            # The rest of the reply stays owed and is dropped by settleAfterStop
+            logging.info('USB reply dropped after emergency stop')
+            return ''
+        if frame is None:
+            frame = bytes(self.rxBuffer)
+            self.rxBuffer.clear()
+            logging.info('USB reply timeout <-- %s' + str(frame))
+        return frame.decode('utf-8', 'replace')
 
     def close(self):
         """Close the connection."""
@@ -67,35 +285,58 @@ class IoConnectionUSB:
         logging.info('Closed serial port successfully')
 
 
-class IoConnectionWlan:
+class IoConnectionWlan(IoConnection):
     """Class for communicating with devices over serial."""
-    def __init__(self, ipAddress = '10.10.100.254', port = '8899'):
-        self.sendWait = 0.10
+    def __init__(self, ipAddress = '10.10.100.254', port = '8899', connectTimeout = 5.0):
+        self.pacing = AdaptivePacing('WLAN', floor = 0.005, gap = 0.01)  # Gap between two commands
+        self.recvTimeout = 1.0       # Deadline for a complete reply
+        self.lastSendTime = 0.0
+        self.rxBuffer = bytearray()  # Stream bytes not yet handed out as a reply
+        self.writeLock = threading.Lock()
+        self.replyStale = False      # Set by sendNow, the awaited reply is dropped
+        self.stopSent = False        # Set by sendNow, late replies are dropped by the next send
+        self.unreadReplies = collections.deque()   # Lengths of the replies the mount still owes
         self.mountIsConnected = False
-        self.wlan = socket.socket()
-        self.wlan.settimeout(5)
+        self.silentReplies = 0       # Replies in a row that timed out without any byte
+        self.deadAfterSilent = 3     # That many silent replies mark the socket as dead
         self.address = (ipAddress, int(port))
-        self.mountIsConnected = True
+        self.connectTimeout = connectTimeout
+        self.open()
+
+    def open(self):
+        """Connect the socket, with TCP keepalive so a dongle that vanished is noticed
+        while the line is idle. Raises IoConnectionError if the mount is not reachable."""
+        self.wlan = socket.socket()
+        self.wlan.settimeout(self.connectTimeout)
+        self.wlan.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (('TCP_KEEPIDLE', 5), ('TCP_KEEPINTVL', 2), ('TCP_KEEPCNT', 3)):
+            if hasattr(socket, option):
+                self.wlan.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
         try:
             self.wlan.connect(self.address)
-            self.mountIsConnected = True
         except OSError as errorText:
-            logging.error('WLAN connection failed')
-            # MessageBox output
+            logging.error('WLAN connection failed: ' + str(errorText))
             self.mountIsConnected = False
-            info = PopupDialog('ERROR: WLAN', 'WLAN connection failed.', 30, 'red')
-            info.exec()
-            sys.exit(1)
-        except:
-            e = sys.exc_info()[0]
-            logging.error('WLAN connection failed')
-            # MessageBox output
-            self.mountIsConnected = False
-            info = PopupDialog('ERROR: WLAN', 'WLAN connection failed.', 30, 'red')
-            info.exec()
-            sys.exit(1)
-        else:
-            logging.debug('WLAN is connected %s' + str(ipAddress) + ':' + str(port))
+            self.wlan.close()
+            raise IoConnectionError('WLAN connection to ' + str(self.address[0]) + ':' +
+                                    str(self.address[1]) + ' failed.')
+        self.mountIsConnected = True
+        self.silentReplies = 0
+        self.rxBuffer.clear()
+        self.unreadReplies.clear()
+        self.stopSent = False
+        logging.debug('WLAN is connected ' + str(self.address))
+
+    def reconnect(self):
+        """Close the dead socket and connect a new one."""
+        self.wlan.close()
+        self.open()
+
+    def connectionLost(self, reason):
+        """Mark the socket as dead, the I/O worker then reconnects."""
+        if self.mountIsConnected:
+            logging.error('WLAN connection ' + str(self.address) + ' lost: ' + reason)
+        self.mountIsConnected = False
 
     def isConnected(self):
         """Open the serial connection."""
@@ -105,28 +346,487 @@ class IoConnectionWlan:
             logging.error('WLAN ' + (ipAddress, port) + ' is not open')
             return False
 
+    def discardInput(self):
+        """Drop late replies of earlier commands, buffered or still in the socket."""
+        self.rxBuffer.clear()
+        try:
+            while select.select([self.wlan], [], [], 0)[0]:
+                if not self.wlan.recv(4096):
+                    break
+        except OSError:
+            pass
+
     def send(self, data):
-        """Send data over the WLAN connection."""
+        """Send data over the WLAN connection. Late replies of earlier commands
+        are dropped first, so they can not be taken for the reply of this one."""
         bytesToSend = data.encode('utf-8')
+        gap = self.lastSendTime + self.pacing.gap - time.monotonic()
+        if gap > 0:
+            time.sleep(gap)
         try:
-            self.wlan.send(bytesToSend)
-        except Exception as e:
-            logging.error('WLAN sending serial -> %s ' + str(data) + (ipAddress, port) + ' failed')
+            while True:
+                if self.stopSent:
+                    self.settleAfterStop()
+                with self.writeLock:
+                    if self.stopSent:
+                        continue                # A stop came in between, settle again
+                    self.discardInput()
+                    self.replyStale = False
+                    self.expectReplies(data)
+                    self.wlan.sendall(bytesToSend)
+                break
+        except OSError as e:
+            logging.error('WLAN sending serial -> %s ' + str(data) + str(self.address) + ' failed')
+            self.connectionLost(str(e))
             return False
-        time.sleep(self.sendWait)
+        self.lastSendTime = time.monotonic()
         return True
 
-    def recv(self):
-        """Receive the output from WLAN."""
-        output = ''
+    def sendNow(self, data):
+        """Send data at once, also while another thread waits in recv. The reply
+        awaited there is dropped as stale. Used for emergency stops."""
+        with self.writeLock:
+            self.replyStale = True
+            self.stopSent = True
+            self.expectReplies(data)
+            self.wlan.sendall(data.encode('utf-8'))
+
+    def readAvailable(self, timeout):
+        """Read and return the bytes arriving within timeout seconds, without framing."""
+        self.wlan.settimeout(timeout)
         try:
-            output = self.wlan.recv(30).decode('utf-8')
-        except:
-            logging.info('WLAN Received <- %s' + str(output) + (ipAddress, port) + ' failed')
-        return output
+            data = self.wlan.recv(4096)
+        except OSError:
+            return b''
+        if not data:
+            self.connectionLost('closed by the mount')
+        return data
+
+    def recv(self, replyLength = None, timeout = None):
+        """Receive one reply from the WLAN stream. Waits until the '#' terminator or,
+        if replyLength is given, exactly replyLength bytes have arrived, but not longer
+        than timeout seconds (recvTimeout by default). Bytes behind the reply stay
+        buffered for the next call. Returns the reply including the terminator, or
+        the incomplete rest if the deadline has passed."""
+        deadline = time.monotonic() + (self.recvTimeout if timeout is None else timeout)
+        frame = extractFrame(self.rxBuffer, replyLength)
+        try:
+            while frame is None and not self.replyStale:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.wlan.settimeout(remaining)
+                chunk = self.wlan.recv(4096)
+                if not chunk:
+                    self.connectionLost('closed by the mount')
+                    break
+                self.silentReplies = 0
+                self.rxBuffer += chunk
+                frame = extractFrame(self.rxBuffer, replyLength)
+        except TimeoutError:
+            pass
+        except OSError as e:
+            logging.error('WLAN Received <- %s' + str(bytes(self.rxBuffer)) + str(self.address) + ' failed')
+            self.connectionLost(str(e))
+        if frame is not None or not self.replyStale:
+            self.replyRead()
+        if self.replyStale:
+            # The rest of the reply stays owed and is dropped by settleAfterStop
+            logging.info('WLAN reply dropped after emergency stop')
+            return ''
+        if frame is None:
+            frame = bytes(self.rxBuffer)
+            self.rxBuffer.clear()
+            logging.info('WLAN reply timeout <- %s' + str(frame) + str(self.address))
+            if not frame:
+                self.silentReplies += 1
+                if self.silentReplies >= self.deadAfterSilent:
+                    self.connectionLost(str(self.silentReplies) + ' replies timed out')
+        return frame.decode('utf-8', 'replace')
 
     def close(self):
         """Close the WLAN connection."""
         self.wlan.close()
         self.mountIsConnected = False
         logging.debug('Closed WLAN connection successfully')
+
+
+def openConnection(config):
+    """Open the USB or WLAN connection set in config, see utilities.readConfig().
+    Raises IoConnectionError if none is set or it can not be opened."""
+    if config['ConType'] == 'USB':
+        if config['SerPort'] != '' and config['SerPort'] != 'WLAN':
+            return IoConnectionUSB(config['SerPort'], config['SerSpeed'])
+        raise IoConnectionError('No serial port set.')
+    if config['ConType'] == 'WLAN':
+        if config['WLanPort'] != '' and config['IpAddress'] != '':
+            return IoConnectionWlan(config['IpAddress'], config['WLanPort'], float(config['ConnectTimeout']))
+        raise IoConnectionError('No WLAN address set.')
+    raise IoConnectionError('Unknown connection type ' + str(config['ConType']) + '.')
+
+
+class IoConnectionRecorder(IoConnection):
+    """Wraps a connection and appends all traffic to a session file, one line per
+    exchange: seconds since the session start, direction and data.
+       '>' command sent, '!' command sent by sendNow, '<' reply received
+    A session starts with a line '# session <date>'."""
+    def __init__(self, connection, path):
+        self.connection = connection
+        self.writeLock = threading.Lock()
+        self.startTime = time.monotonic()
+        self.sessionFile = open(path, 'a', buffering = 1)
+        self.sessionFile.write('# session ' + datetime.now().isoformat(timespec = 'seconds') + '\n')
+        logging.info('Recording session to ' + path)
+
+    @property
+    def mountIsConnected(self):
+        return self.connection.mountIsConnected
+
+    @property
+    def pacing(self):
+        return self.connection.pacing
+
+    @property
+    def replyStale(self):
+        return self.connection.replyStale
+
+    def isOpen(self):
+        """Is the connection open."""
+        return self.connection.isOpen()
+
+    def record(self, direction, data):
+        line = '%.6f %s %s\n' % (time.monotonic() - self.startTime, direction,
+                                  data.encode('unicode_escape').decode('ascii'))
+        with self.writeLock:
+            self.sessionFile.write(line)
+
+    def send(self, data):
+        self.record('>', data)
+        return self.connection.send(data)
+
+    def sendNow(self, data):
+        self.record('!', data)
+        self.connection.sendNow(data)
+
+    def recv(self, replyLength = None, timeout = None):
+        reply = self.connection.recv(replyLength, timeout)
+        self.record('<', reply)
+        return reply
+
+    def reconnect(self):
+        self.connection.reconnect()
+
+    def close(self):
+        """Close the connection and the session file."""
+        self.connection.close()
+        with self.writeLock:
+            self.sessionFile.close()
+
+
+def readSessions(path):
+    """Read a session file written by IoConnectionRecorder. Returns a list of
+    sessions, each a list of (seconds, direction, data)."""
+    sessions = []
+    with open(path) as sessionFile:
+        for line in sessionFile:
+            line = line.rstrip('\n')
+            if line.startswith('#'):
+                sessions.append([])
+                continue
+            seconds, direction, data = line.split(' ', 2)
+            if not sessions:
+                sessions.append([])
+            sessions[-1].append((float(seconds), direction, codecs.decode(data, 'unicode_escape')))
+    return sessions
+
+
+class IoConnectionReplay(IoConnection):
+    """Plays a recorded session back in place of a connection. Each command sent
+    is looked up in the recording from the current position on, recv returns the
+    replies recorded after it, at the recorded time divided by speed, or at once
+    if speed is None. Commands not found in the rest of the recording get empty
+    replies."""
+    def __init__(self, path, session = -1, speed = 1.0):
+        self.entries = readSessions(path)[session]
+        self.speed = speed
+        self.position = 0
+        self.replies = collections.deque()
+        self.startTime = None
+        self.mountIsConnected = True
+        self.replyStale = False
+        self.pacing = AdaptivePacing('REPLAY', floor = 0.0, gap = 0.0)
+        self.mismatches = 0
+
+    def isOpen(self):
+        """Is the connection open."""
+        return self.mountIsConnected
+
+    def find(self, direction, data):
+        """Move behind the next entry with direction and data and queue the replies
+        recorded after it. Returns False if there is none."""
+        if self.startTime is None and self.entries:
+            self.startTime = time.monotonic() - self.entries[0][0] / (self.speed or 1)
+        for index in range(self.position, len(self.entries)):
+            if self.entries[index][1] == direction and self.entries[index][2] == data:
+                break
+        else:
+            self.mismatches += 1
+            logging.info('Replay: ' + data + ' not in the rest of the session')
+            self.replies.clear()
+            return False
+        self.position = index + 1
+        self.replies.clear()
+        while self.position < len(self.entries) and self.entries[self.position][1] == '<':
+            self.replies.append(self.entries[self.position])
+            self.position += 1
+        return True
+
+    def send(self, data):
+        return self.find('>', data)
+
+    def sendNow(self, data):
+        self.find('!', data)
+
+    def recv(self, replyLength = None, timeout = None):
+        if not self.replies:
+            return ''
+        seconds, direction, reply = self.replies.popleft()
+        if self.speed:
+            delay = self.startTime + seconds / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return reply
+
+    def close(self):
+        self.mountIsConnected = False
+
+
+class QueryCache:
+    """Replies of queries, reused as long as the ttl of their command in ioProtocol.
+    Set commands submitted to the worker drop the replies they invalidate, a lost
+    connection drops all."""
+    def __init__(self, worker):
+        self.worker = worker
+        self.entries = {}           # command -> (time of the query, reply)
+        self.generation = 0         # Counts invalidations, a reply older than one is not kept
+        self.lock = threading.Lock()
+        worker.invalidationHandlers.append(self.invalidate)
+        worker.connectionHandlers.append(lambda connected: self.invalidate())
+
+    def query(self, command):
+        """Reply to command, from the cache while it is young enough."""
+        spec = ioProtocol.commandSpec(command)
+        with self.lock:
+            entry = self.entries.get(command)
+            generation = self.generation
+        if entry is not None and time.monotonic() - entry[0] < spec.ttl:
+            return entry[1]
+        queryTime = time.monotonic()
+        reply = self.worker.query(command)
+        if spec.ttl > 0 and ioProtocol.replyIsValid(spec, reply):
+            with self.lock:
+                if generation == self.generation:
+                    self.entries[command] = (queryTime, reply)
+        return reply
+
+    def invalidate(self, codes = None):
+        """Drop the replies of the given command codes, or all."""
+        with self.lock:
+            self.generation += 1
+            if codes is None:
+                self.entries.clear()
+            else:
+                self.entries = {command: entry for command, entry in self.entries.items()
+                                if ioProtocol.commandSpec(command).code not in codes}
+
+
+class IoWorker:
+    """Single thread owning the connection (IoConnectionUSB or IoConnectionWlan).
+    All exchanges with the mount run on this thread, ordered by priority:
+    emergency stops first, then motion, set commands and status polls. Jobs of
+    the same priority run in the order they were submitted. Offers query() and
+    close() like a connection, so Ioptron can use it in place of one.
+
+    The worker also supervises the connection. Once it is lost, queued and new
+    jobs fail with IoConnectionError while the worker reconnects with jittered
+    exponential back-off. The connectionHandlers are called on the worker thread
+    with False when the connection is lost and with True when it is back. The
+    invalidationHandlers are called with the codes of the queries a submitted
+    command invalidates, see CommandSpec.invalidates."""
+    def __init__(self, connection):
+        self.connection = connection
+        self.jobs = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.stopLatencies = collections.deque(maxlen = 100)
+        self.stopGeneration = 0         # Counts emergency stops, motion jobs queued before one are cancelled
+        self.connectionHandlers = []
+        self.invalidationHandlers = []
+        self.capabilities = None        # ioProtocol.Capabilities of the mount, once known
+        self.backoffInitial = 0.5        # Wait before the second reconnect try, seconds
+        self.backoffMaximum = 30.0       # Longest wait between two tries
+        self.reconnectAttempts = 0
+        self.nextReconnect = 0.0
+        self.wasConnected = connection.mountIsConnected
+        self.thread = threading.Thread(target = self.run, name = 'IoWorker', daemon = True)
+        self.thread.start()
+
+    @property
+    def mountIsConnected(self):
+        return self.connection.mountIsConnected
+
+    @property
+    def pacing(self):
+        return self.connection.pacing
+
+    def isOpen(self):
+        """Is the connection open."""
+        return self.connection.isOpen()
+
+    def submitCall(self, function, *args, priority = PRIORITY_POLL):
+        """Queue function(*args) to run on the worker thread. Returns a Future of
+        its result. Called from a job on the worker thread, the function runs at
+        once, so a job can be made of several queries."""
+        future = Future()
+        if threading.current_thread() is self.thread:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(function(*args))
+            except BaseException as error:
+                future.set_exception(error)
+            return future
+        self.jobs.put((priority, next(self.sequence), self.stopGeneration, function, args, future))
+        return future
+
+    def submit(self, command, priority = None):
+        """Queue one command, by default with the priority from the command table.
+        Returns a Future of the reply, an empty one at once for commands the mount
+        does not support."""
+        spec = ioProtocol.commandSpec(command)
+        if self.capabilities is not None and not self.capabilities.supports(spec):
+            # Not sent, the mount would not answer until the reply timeout
+            logging.debug('command ' + command + ' skipped, it needs ' + spec.requires)
+            future = Future()
+            future.set_result('')
+            return future
+        for handler in self.invalidationHandlers if spec.invalidates else ():
+            handler(spec.invalidates)
+        return self.submitCall(self.connection.query, command,
+                               priority = spec.priority if priority is None else priority)
+
+    def query(self, command, timeout = None):
+        """Send a command through the queue and wait for its reply."""
+        return self.submit(command).result()
+
+    def queryBatch(self, commands):
+        """Send several queries in one write as a single poll job and wait for the
+        list of replies."""
+        return self.submitCall(self.connection.queryBatch, commands).result()
+
+    def emergencyStop(self, command = ':Q#'):
+        """Send a stop command at once from the calling thread, bypassing the queue,
+        also while a poll waits for its reply. That reply is dropped as stale and
+        the motion jobs queued until now are cancelled by the worker when it takes
+        them. Returns the time in seconds from the call until the command has left
+        the computer, which is kept in stopLatencies."""
+        startTime = time.monotonic()
+        self.stopGeneration += 1
+        try:
+            self.connection.sendNow(command)
+        except (OSError, serial.SerialException) as error:
+            logging.error('emergency stop ' + command + ' not sent: ' + str(error))
+            return None
+        latency = time.monotonic() - startTime
+        self.stopLatencies.append(latency)
+        metrics.recordExchange(ioProtocol.commandSpec(command).code, latency, len(command), 0)
+        logging.info('emergency stop ' + command + f' sent in {latency * 1000:.1f} ms')
+        return latency
+
+    def run(self):
+        """Worker loop, runs the queued jobs until close() is called."""
+        while True:
+            self.superviseConnection()
+            timeout = None if self.connection.mountIsConnected else max(0.0, self.nextReconnect - time.monotonic())
+            try:
+                priority, sequence, generation, function, args, future = self.jobs.get(timeout = timeout)
+            except queue.Empty:
+                continue
+            if function is None:
+                break
+            if priority == PRIORITY_MOTION and generation != self.stopGeneration:
+                # Queued before an emergency stop
+                future.cancel()
+            if not future.set_running_or_notify_cancel():
+                continue
+            if not self.connection.mountIsConnected:
+                future.set_exception(IoConnectionError('Connection to the mount lost, reconnecting.'))
+                continue
+            try:
+                future.set_result(function(*args))
+                if self.connection.mountIsConnected:
+                    self.reconnectAttempts = 0
+            except BaseException as error:
+                logging.error('IoWorker job failed: ' + str(error))
+                future.set_exception(error)
+
+    def superviseConnection(self):
+        """Notice a lost connection and try to reconnect when the back-off is over."""
+        if self.connection.mountIsConnected:
+            if not self.wasConnected:
+                self.wasConnected = True
+                self.notifyConnection(True)
+            return
+        if self.wasConnected:
+            self.wasConnected = False
+            self.notifyConnection(False)
+            self.scheduleReconnect()
+        if time.monotonic() < self.nextReconnect:
+            return
+        self.reconnectAttempts += 1
+        try:
+            self.connection.reconnect()
+        except IoConnectionError as error:
+            self.scheduleReconnect()
+            logging.warning('reconnect ' + str(self.reconnectAttempts) + ' failed: ' + str(error))
+            return
+        logging.info('reconnected, try ' + str(self.reconnectAttempts))
+        self.wasConnected = True
+        self.notifyConnection(True)
+
+    def scheduleReconnect(self):
+        """Set the time of the next reconnect try. The first try is at once, then the
+        waits double from backoffInitial up to backoffMaximum, each shortened by a
+        random part of up to one half, so several clients do not retry in step. The
+        tries are counted until a job has run on the new connection, so a link that
+        drops right after connecting is retried with back-off too."""
+        if self.reconnectAttempts == 0:
+            self.nextReconnect = 0.0
+            return
+        delay = min(self.backoffMaximum, self.backoffInitial * 2 ** (self.reconnectAttempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        self.nextReconnect = time.monotonic() + delay
+        logging.info(f'next reconnect try in {delay:.1f} s')
+
+    def notifyConnection(self, connected):
+        for handler in self.connectionHandlers:
+            try:
+                handler(connected)
+            except Exception as error:
+                logging.error('connection handler failed: ' + str(error))
+
+    def close(self):
+        """Stop the worker, cancel the jobs still queued and close the connection."""
+        self.jobs.put((PRIORITY_STOP - 1, next(self.sequence), self.stopGeneration, None, (), None))
+        if threading.current_thread() is not self.thread:
+            self.thread.join(timeout = 5)
+        while not self.jobs.empty():
+            job = self.jobs.get_nowait()
+            if job[5] is not None:
+                job[5].cancel()
+        self.connection.close()
+
+
+def awaitable(future):
+    """asyncio future of a job future of IoWorker, for coroutines awaiting the job.
+    asyncio is imported on the first call, the mount server never loads it."""
+    import asyncio
+    return asyncio.wrap_future(future)
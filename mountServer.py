@@ -0,0 +1,232 @@
+"""
+Server sharing one connection to the mount between several programs.
+
+The mount accepts a single serial or TCP session. This server owns it, through the
+IoWorker of ioUtilities, and serves local clients on a TCP port and/or a Unix
+socket. Clients speak the iOptron® command language as if connected to the WLAN
+bridge of the mount, so liomoco itself connects with 127.0.0.1 and the server port
+as WLAN address.
+
+Status queries are answered from one ReplyCache shared by all clients, so each
+query reaches the mount at most once per maxAge seconds however many clients poll.
+Set and motion commands pass through and clear the cache, stop commands are sent
+at once, bypassing the queue. Each client has at most `window` commands queued in
+the worker, so a client sending many commands can not hold back the others.
+
+    python3 mountServer.py --tcp 8898 --unix /tmp/liomoco.sock --max-age 0.5
+"""
+
+
+# Imports
+import os
+import time
+import queue
+import socket
+import logging
+import argparse
+import threading
+from   concurrent.futures import Future
+import utilities
+import ioProtocol
+import ioUtilities
+from   ioProtocol import PRIORITY_STOP, PRIORITY_POLL
+
+
+class ReplyCache:
+    """Replies of status queries, kept for maxAge seconds. A query asked again
+    while the mount still answers it waits for the same reply. Identification
+    queries (staticCodes) are kept until the server stops."""
+    staticCodes = {'FW1', 'FW2', 'MountInfo'}
+
+    def __init__(self, worker, maxAge = 0.5):
+        self.worker = worker
+        self.maxAge = maxAge
+        self.entries = {}           # command -> (time asked, Future of the reply)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def isCacheable(self, spec):
+        return (spec.code in ioProtocol.COMMANDS and spec.priority == PRIORITY_POLL
+                and spec.replyLength != 0)
+
+    def isUsable(self, spec, askedTime, future):
+        if not future.done():
+            return True
+        if future.cancelled() or future.exception() is not None:
+            return False
+        if not ioProtocol.replyIsValid(spec, future.result()):
+            return False
+        return spec.code in self.staticCodes or time.monotonic() - askedTime < self.maxAge
+
+    def query(self, command):
+        """Returns a Future of the reply, from the cache or from the mount."""
+        spec = ioProtocol.commandSpec(command)
+        with self.lock:
+            entry = self.entries.get(command)
+            if entry is not None and self.isUsable(spec, *entry):
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            future = self.worker.submit(command)
+            self.entries[command] = (time.monotonic(), future)
+            return future
+
+    def invalidate(self):
+        """Forget the status replies, e.g. after a command changed the mount state."""
+        with self.lock:
+            self.entries = {command: entry for command, entry in self.entries.items()
+                            if ioProtocol.commandSpec(command).code in self.staticCodes}
+
+
+class MountServer:
+    """Serves the connection of one IoWorker to many clients."""
+    def __init__(self, worker, maxAge = 0.5, window = 4):
+        self.worker = worker
+        self.cache = ReplyCache(worker, maxAge)
+        self.window = window        # Commands of one client queued at most
+        self.servers = []
+        self.clients = set()
+        self.lock = threading.Lock()
+
+    def startThread(self, target, *args):
+        thread = threading.Thread(target = target, args = args, daemon = True)
+        thread.start()
+        return thread
+
+    def serveTcp(self, host = '127.0.0.1', port = 8898):
+        """Listen on a TCP port. Port 0 picks a free port. Returns the port."""
+        server = socket.socket()
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, int(port)))
+        server.listen()
+        self.servers.append(server)
+        self.startThread(self.runServer, server)
+        port = server.getsockname()[1]
+        logging.info('Mount server on ' + host + ':' + str(port))
+        return port
+
+    def serveUnix(self, path):
+        """Listen on a Unix socket at path."""
+        if os.path.exists(path):
+            os.unlink(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen()
+        self.servers.append(server)
+        self.startThread(self.runServer, server)
+        logging.info('Mount server on ' + path)
+        return path
+
+    def runServer(self, server):
+        while True:
+            try:
+                client, address = server.accept()
+            except OSError:
+                return
+            if client.family != socket.AF_UNIX:
+                client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.lock:
+                self.clients.add(client)
+            logging.info('client connected, ' + str(len(self.clients)) + ' in all')
+            self.startThread(self.runClient, client)
+
+    def submit(self, command):
+        """Start one command of a client. Returns a Future of the reply. Stop
+        commands are sent at once, their '1' is dropped by the connection of the
+        worker and answered here, in the order of the client's commands."""
+        spec = ioProtocol.commandSpec(command)
+        if spec.priority == PRIORITY_STOP:
+            self.worker.emergencyStop(command)
+            self.cache.invalidate()
+            future = Future()
+            future.set_result('1')
+            return future
+        if self.cache.isCacheable(spec):
+            return self.cache.query(command)
+        self.cache.invalidate()
+        return self.worker.submit(command)
+
+    def runClient(self, client):
+        """Read the commands of one client. The replies are written in order by a
+        second thread, so the client can send several commands in one write."""
+        replies = queue.Queue(self.window)
+        writer = self.startThread(self.runClientWriter, client, replies)
+        buffer = bytearray()
+        try:
+            while True:
+                try:
+                    data = client.recv(4096)
+                except OSError:
+                    break
+                if not data:
+                    break
+                buffer += data
+                while True:
+                    index = buffer.find(b'#')
+                    if index < 0:
+                        break
+                    command = buffer[:index + 1].decode('ascii', 'replace')
+                    del buffer[:index + 1]
+                    replies.put(self.submit(command))     # Blocks while the window is full
+        finally:
+            replies.put(None)
+            writer.join()
+            with self.lock:
+                self.clients.discard(client)
+            client.close()
+            logging.info('client disconnected, ' + str(len(self.clients)) + ' left')
+
+    def runClientWriter(self, client, replies):
+        while True:
+            future = replies.get()
+            if future is None:
+                return
+            try:
+                reply = future.result()
+            except Exception as error:
+                logging.info('no reply for a client: ' + str(error))
+                reply = ''
+            try:
+                client.sendall(reply.encode('utf-8'))
+            except OSError:
+                pass
+
+    def close(self):
+        """Stop listening, disconnect the clients and close the mount connection."""
+        for server in self.servers:
+            server.close()
+        with self.lock:
+            for client in self.clients:
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.worker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Share one iOptron mount connection')
+    parser.add_argument('--tcp', type = int, metavar = 'PORT', help = 'serve on a TCP port, e.g. 8898')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--unix', metavar = 'PATH', help = 'serve on a Unix socket')
+    parser.add_argument('--max-age', type = float, default = 0.5,
+                        help = 'seconds a status reply is shared')
+    args = parser.parse_args()
+    logging.basicConfig(level = logging.INFO, format = '%(asctime)s %(message)s')
+
+    worker = ioUtilities.IoWorker(ioUtilities.openConnection(utilities.readConfig()))
+    server = MountServer(worker, args.max_age)
+    if args.tcp is not None or args.unix is None:
+        print('WLAN: ' + args.host + ':' + str(server.serveTcp(args.host, 8898 if args.tcp is None else args.tcp)))
+    if args.unix is not None:
+        print('Unix socket: ' + server.serveUnix(args.unix))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Bridge running an asyncio event loop inside the Qt event loop.
+
+While coroutines are pending, a QTimer runs one pass of the asyncio loop every
+few milliseconds on the GUI thread. GUI handlers can so be written as coroutines
+that await mount operations, e.g. Ioptron.call(), and update the widgets when the
+results arrive, while Qt keeps redrawing in between.
+
+    @asyncSlot
+    async def buttonParkPositionClicked(self):
+        await self.scope.call(self.scope.park)
+"""
+
+
+# Imports
+import inspect
+import logging
+import functools
+from   PyQt5.QtCore import QTimer
+
+
+class QtAsyncioBridge:
+    """asyncio loop stepped by a QTimer of the Qt event loop."""
+    def __init__(self, interval = 5):
+        import asyncio                  # Loaded with the first coroutine, keeps the startup short
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.tasks = set()
+        self.timer = QTimer()
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.step)
+
+    def step(self):
+        """Run the callbacks that are ready, without waiting."""
+        if self.loop.is_running():
+            return                      # Called from a nested Qt event loop
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+
+    def start(self, coroutine):
+        """Start a coroutine on the loop. Returns its asyncio.Task."""
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.taskDone)
+        if not self.timer.isActive():
+            self.timer.start()
+        return task
+
+    def taskDone(self, task):
+        self.tasks.discard(task)
+        if not self.tasks:
+            self.timer.stop()
+        if not task.cancelled() and task.exception() is not None:
+            logging.error('GUI task failed: ' + repr(task.exception()))
+
+    def close(self):
+        for task in self.tasks:
+            task.cancel()
+        self.timer.stop()
+        self.loop.close()
+
+
+_bridge = None
+
+def getBridge():
+    """The bridge of the application, created on first use."""
+    global _bridge
+    if _bridge is None:
+        _bridge = QtAsyncioBridge()
+    return _bridge
+
+def runAsync(coroutine):
+    """Start a coroutine on the bridge loop. Returns its asyncio.Task."""
+    return getBridge().start(coroutine)
+
+def asyncSlot(function):
+    """Decorator for coroutine methods connected to Qt signals. The signal starts
+    the coroutine on the bridge loop. Signal arguments the coroutine does not take,
+    like the checked state of clicked, are dropped."""
+    parameters = inspect.signature(function).parameters.values()
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        argumentCount = None
+    else:
+        argumentCount = sum(1 for parameter in parameters if parameter.kind in
+                            (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD))
+
+    @functools.wraps(function)
+    def slot(*args):
+        return runAsync(function(*args[:argumentCount]))
+    return slot
@@ -0,0 +1,85 @@
+"""
+Fixtures of the tests: simulated mounts served over a pseudo terminal and TCP, and
+connections to them. The modules of liomoco are imported from the folder above.
+Files kept in the user's configuration directory are written to a temporary one.
+"""
+
+
+# Imports
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ioSimulator
+import ioUtilities
+import utilities
+
+
+@pytest.fixture(autouse = True)
+def configDirectory(tmp_path, monkeypatch):
+    """Temporary user configuration directory, see ioIdentity.defaultPath()."""
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(tmp_path / 'config'))
+    return tmp_path / 'config'
+
+
+@pytest.fixture
+def simulator():
+    """Start a simulated mount, latency and jitter by simulator(latency = ...)."""
+    simulators = []
+
+    def start(**settings):
+        settings.setdefault('jitter', 0.0)
+        mount = ioSimulator.MountSimulator(ioSimulator.SimulatorConfig(**settings))
+        simulators.append(mount)
+        return mount
+    yield start
+    for mount in simulators:
+        mount.close()
+
+
+@pytest.fixture
+def wlanConnection(simulator):
+    """Open a WLAN connection to a simulated mount. Returns (connection, simulator)."""
+    connections = []
+
+    def open(**settings):
+        mount = simulator(**settings)
+        connection = ioUtilities.IoConnectionWlan('127.0.0.1', mount.serveTcp(port = 0))
+        connections.append(connection)
+        return connection, mount
+    yield open
+    for connection in connections:
+        connection.close()
+
+
+@pytest.fixture
+def usbConnection(simulator):
+    """Open a serial connection to a simulated mount on a pseudo terminal.
+    Returns (connection, simulator)."""
+    connections = []
+
+    def open(**settings):
+        mount = simulator(**settings)
+        connection = ioUtilities.IoConnectionUSB(mount.servePty())
+        connections.append(connection)
+        return connection, mount
+    yield open
+    for connection in connections:
+        connection.close()
+
+
+@pytest.fixture
+def mountConfig(simulator, monkeypatch):
+    """Make utilities.readConfig() return setup.ini with a WLAN connection to a
+    simulated mount. Returns (config, simulator), config can be changed."""
+    monkeypatch.chdir(ROOT)
+    config = utilities.readConfig()
+    mount = simulator()
+    config['ConType'] = 'WLAN'
+    config['IpAddress'] = '127.0.0.1'
+    config['WLanPort'] = str(mount.serveTcp(port = 0))
+    monkeypatch.setattr(utilities, 'readConfig', lambda: dict(config))
+    return config, mount
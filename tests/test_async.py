@@ -0,0 +1,77 @@
+"""
+Tests of the asyncio client iOptronAsync.AsyncIoptron against the simulator.
+"""
+
+
+# Imports
+import asyncio
+from   iOptronAsync import AsyncIoptron
+
+
+def runConnected(mountConfig, coroutine, **settings):
+    """Connect AsyncIoptron to the simulated mount of mountConfig and run
+    coroutine(mount). Returns its result."""
+    config, simulator = mountConfig
+    for name, value in settings.items():
+        setattr(simulator.config, name, value)
+
+    async def run():
+        mount = await AsyncIoptron.connect(config)
+        try:
+            return await coroutine(mount)
+        finally:
+            mount.close()
+    return asyncio.run(run())
+
+
+def test_identify(mountConfig):
+    async def identity(mount):
+        return mount.mountVersion, mount.capabilities.encoders
+    assert runConnected(mountConfig, identity, model = '0027') == ('0027', True)
+
+
+def test_unsupported_command_not_sent(mountConfig):
+    config, simulator = mountConfig
+
+    async def enableGuidingFilter(mount):
+        return await mount.command(':SGF1#')
+    assert runConnected(mountConfig, enableGuidingFilter) is False
+    assert simulator.mount.guidingFilter == '0'
+    assert runConnected(mountConfig, enableGuidingFilter, model = '0027') is True
+    assert simulator.mount.guidingFilter == '1'
+
+
+def test_custom_tracking_rate(mountConfig):
+    config, simulator = mountConfig
+    simulator.mount.customRate = '05000'
+
+    async def customRate(mount):
+        await mount.getCustomTrackingRate()
+        before = mount.tracking.custom
+        assert await mount.setCustomTrackingRate(0.75)
+        await mount.getCustomTrackingRate()
+        return before, mount.tracking.custom
+    assert runConnected(mountConfig, customRate) == (0.5, 0.75)
+
+
+def test_meridian_treatment(mountConfig):
+    config, simulator = mountConfig
+
+    async def flipAtLimit(mount):
+        assert await mount.setMeridianTreatment('1', '10')
+        await mount.getmeridianTreatment()
+        return mount.meridian.code, mount.meridian.degreeLimit
+    assert runConnected(mountConfig, flipAtLimit) == (1, 10)
+    assert (simulator.mount.meridianCode, simulator.mount.meridianLimit) == ('1', '10')
+
+
+def test_latitude_and_guiding_rate(mountConfig):
+    config, simulator = mountConfig
+
+    async def setLocation(mount):
+        assert await mount.setLatitude(-33.5)
+        assert await mount.setGuidingRate(0.5, 0.25)
+        await mount.getGuidingRate()
+        return mount.guiding.rightAscentionRate, mount.guiding.declinationRate
+    assert runConnected(mountConfig, setLocation) == (0.5, 0.25)
+    assert simulator.mount.latitude == -33.5
@@ -0,0 +1,79 @@
+"""
+Tests of ioUtilities.QueryCache: replies reused within their ttl, dropped by the
+set commands that change them and by a lost connection.
+"""
+
+
+# Imports
+import time
+import dataclasses
+import pytest
+import ioProtocol
+import ioUtilities
+
+
+@pytest.fixture
+def cache(wlanConnection):
+    """QueryCache on an I/O worker connected to a simulated mount. Returns
+    (cache, simulator), the queries reaching the mount are in cache.sent."""
+    connection, simulator = wlanConnection()
+    worker = ioUtilities.IoWorker(connection)
+    queryCache = ioUtilities.QueryCache(worker)
+    queryCache.sent = []
+    query = worker.query
+
+    def countedQuery(command, timeout = None):
+        queryCache.sent.append(command)
+        return query(command, timeout)
+    worker.query = countedQuery
+    yield queryCache, simulator
+    worker.close()
+
+
+def test_reply_reused(cache):
+    cache, simulator = cache
+    reply = cache.query(':GAL#')
+    simulator.mount.altitudeLimit = '+20'
+    assert cache.query(':GAL#') == reply
+    assert cache.sent == [':GAL#']
+
+
+def test_set_command_invalidates(cache):
+    cache, simulator = cache
+    cache.query(':GAL#')
+    cache.query(':GMT#')
+    assert cache.worker.submit(':SAL+20#').result(timeout = 5) == '1'
+    assert cache.query(':GAL#') == '+20#'
+    cache.query(':GMT#')
+    assert cache.sent == [':GAL#', ':GMT#', ':GAL#']
+
+
+def test_ttl_expires(cache, monkeypatch):
+    cache, simulator = cache
+    monkeypatch.setitem(ioProtocol.COMMANDS, 'GAL', dataclasses.replace(ioProtocol.COMMANDS['GAL'], ttl = 0.2))
+    monkeypatch.setattr(ioProtocol, '_specCache', {})
+    cache.query(':GAL#')
+    cache.query(':GAL#')
+    time.sleep(0.25)
+    simulator.mount.altitudeLimit = '+20'
+    assert cache.query(':GAL#') == '+20#'
+    assert cache.sent == [':GAL#', ':GAL#']
+
+
+def test_invalid_reply_not_kept(cache):
+    cache, simulator = cache
+    simulator.mount.altitudeLimit = '+2'
+    cache.query(':GAL#')
+    simulator.mount.altitudeLimit = '+20'
+    assert cache.query(':GAL#') == '+20#'
+    assert cache.sent == [':GAL#', ':GAL#']
+
+
+def test_lost_connection_drops_all(cache):
+    cache, simulator = cache
+    cache.query(':GAL#')
+    cache.query(':GMT#')
+    cache.worker.notifyConnection(False)
+    cache.query(':GAL#')
+    cache.query(':GMT#')
+    assert cache.sent == [':GAL#', ':GMT#'] * 2
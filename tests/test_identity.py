@@ -0,0 +1,69 @@
+"""
+Tests of the mount identity cache of ioIdentity and its use by iOptronModel.Ioptron.
+"""
+
+
+# Imports
+import json
+import ioIdentity
+import ioUtilities
+import iOptronModel
+
+
+def connectMount():
+    """Connect the mount of setup.ini, see the fixture mountConfig."""
+    return iOptronModel.Ioptron()
+
+
+def test_identity_file_in_config_directory(configDirectory):
+    assert ioIdentity.defaultPath() == str(configDirectory / 'liomoco' / 'mountIdentity.json')
+
+
+def test_identity_stored_and_taken(mountConfig):
+    mount = connectMount()
+    mount.scope.close()
+    identity = ioIdentity.IdentityCache().load(mount.identityKey)
+    assert identity['model'] == '0026'
+    mount = connectMount()
+    mount.scope.close()
+    assert mount.mountVersion == '0026'
+    assert mount.firmware.mainboard == '210105'
+
+
+def test_unknown_model_not_stored(mountConfig):
+    config, simulator = mountConfig
+    simulator.config.model = '9999'
+    mount = connectMount()
+    mount.scope.close()
+    assert mount.mountVersion == '9999'
+    assert ioIdentity.IdentityCache().load(mount.identityKey) is None
+
+
+def test_unreadable_identity_queried_again(mountConfig):
+    cache = ioIdentity.IdentityCache()
+    mount = connectMount()
+    mount.scope.close()
+    identity = cache.load(mount.identityKey)
+    identity['capabilities']['unknownCapability'] = True
+    cache.store(mount.identityKey, identity)
+    mount = connectMount()
+    mount.scope.close()
+    assert mount.mountVersion == '0026'
+    with open(cache.path) as identityFile:
+        assert 'unknownCapability' not in json.load(identityFile)[mount.identityKey]['capabilities']
+
+
+def test_session_recorded_with_known_mount_replays(mountConfig, tmp_path):
+    config, simulator = mountConfig
+    mount = connectMount()
+    mount.scope.close()
+    config['RecordSession'] = str(tmp_path / 'session.txt')
+    mount = connectMount()
+    mount.scope.close()
+    config['RecordSession'] = ''
+    replay = ioUtilities.IoConnectionReplay(str(tmp_path / 'session.txt'), speed = None)
+    mount = iOptronModel.Ioptron(replay)
+    mount.scope.close()
+    assert mount.mountVersion == '0026'
+    assert mount.firmware.mainboard == '210105'
+    assert replay.mismatches == 0
@@ -0,0 +1,66 @@
+"""
+Tests of the latency histograms of ioMetrics and the table shown by dialoges.MetricsDialog.
+"""
+
+
+# Imports
+import pytest
+from   ioMetrics import LatencyHistogram, IoMetrics
+
+
+def test_exact_below_64_microseconds():
+    histogram = LatencyHistogram()
+    for value in range(64):
+        assert histogram.bucketRange(histogram.bucketIndex(value)) == (value, 1)
+
+
+@pytest.mark.parametrize('value', [64, 65, 100, 999, 1000, 1023, 1024, 54321, 1000000, 7654321])
+def test_bucket_holds_value(value):
+    histogram = LatencyHistogram()
+    lowest, width = histogram.bucketRange(histogram.bucketIndex(value))
+    assert lowest <= value < lowest + width
+    assert width / lowest <= 1 / 32
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    for milliseconds in range(1, 101):
+        histogram.record(milliseconds / 1000)
+    summary = histogram.toDict()
+    assert summary['count'] == 100
+    assert summary['min'] == pytest.approx(1.0, abs = 0.001)
+    assert summary['max'] == pytest.approx(100.0, abs = 0.001)
+    assert summary['mean'] == pytest.approx(50.5, abs = 0.01)
+    for percent, expected in (('p50', 50.0), ('p90', 90.0), ('p99', 99.0), ('p99.9', 100.0)):
+        assert summary[percent] == pytest.approx(expected, rel = 0.03)
+
+
+def test_percentile_not_above_maximum():
+    histogram = LatencyHistogram()
+    histogram.record(0.000995)        # Bucket 992 - 1007 µs
+    assert histogram.percentile(50) == 995
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_metrics_table():
+    metrics = IoMetrics()
+    for milliseconds in (10, 20, 30, 40):
+        metrics.recordExchange('GEP', milliseconds / 1000, 5, 20)
+    metrics.recordTimeout('GLS')
+    metrics.recordMalformed('GLS')
+    metrics.recordCycle('poll', 0.1)
+    data = metrics.snapshot()
+    assert (data['bytesOut'], data['bytesIn']) == (20, 80)
+    assert data['latencies']['GEP']['count'] == 4
+    assert data['latencies']['GEP']['p50'] == pytest.approx(20.0, rel = 0.03)
+
+    rows = {line.split()[0]: line.split()[1:] for line in metrics.formatTable().splitlines()[3:] if line}
+    count, mean, p50, p90, p99, maximum, timeouts, invalid = rows['GEP']
+    assert (count, mean, timeouts, invalid) == ('4', '25.000', '0', '0')
+    assert float(maximum) == pytest.approx(40.0)
+    assert rows['GLS'] == ['0', '-', '-', '-', '-', '-', '1', '1']
+    assert rows['poll'][0] == '1'
+    assert float(rows['poll'][1]) == pytest.approx(100.0)
+
+    metrics.reset()
+    assert metrics.snapshot()['latencies'] == {}
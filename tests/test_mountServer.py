@@ -0,0 +1,63 @@
+"""
+Tests of mountServer.MountServer sharing a simulated mount between clients.
+"""
+
+
+# Imports
+import time
+import pytest
+import ioProtocol
+import ioUtilities
+import mountServer
+
+
+@pytest.fixture
+def serverClient(wlanConnection):
+    """Serve a simulated mount by a MountServer and connect a client to it.
+    Returns a function opening further clients, the first client and the server."""
+    connection, simulator = wlanConnection()
+    server = mountServer.MountServer(ioUtilities.IoWorker(connection), maxAge = 0.5)
+    port = server.serveTcp(port = 0)
+    clients = []
+
+    def openClient():
+        client = ioUtilities.IoConnectionWlan('127.0.0.1', port)
+        clients.append(client)
+        return client
+    openClient()
+    yield openClient, clients[0], server
+    for client in clients:
+        client.close()
+    server.close()
+
+
+def test_query_through_server(serverClient):
+    openClient, client, server = serverClient
+    assert ioProtocol.replyIsValid(ioProtocol.COMMANDS['GEP'], client.query(':GEP#'))
+    assert client.query(':MountInfo#') == '0026'
+
+
+@pytest.mark.parametrize('stop', [':Q#', ':qR#', ':qD#'])
+def test_query_after_stop_not_delayed(serverClient, stop):
+    openClient, client, server = serverClient
+    client.query(':GEP#')
+    for _ in range(3):
+        client.sendNow(stop)
+        startTime = time.monotonic()
+        reply = client.query(':GEP#')
+        assert time.monotonic() - startTime < client.recvTimeout / 2
+        assert ioProtocol.replyIsValid(ioProtocol.COMMANDS['GEP'], reply), reply
+
+
+def test_status_shared_by_clients(serverClient):
+    openClient, client, server = serverClient
+    other = openClient()
+    assert client.query(':GLS#') == other.query(':GLS#')
+    assert server.cache.hits >= 1
+
+
+def test_set_command_clears_status(serverClient):
+    openClient, client, server = serverClient
+    client.query(':GAL#')
+    assert client.query(':SAL+20#') == '1'
+    assert client.query(':GAL#') == '+20#'
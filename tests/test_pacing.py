@@ -0,0 +1,56 @@
+"""
+Tests of ioUtilities.AdaptivePacing, the gap between two commands learned from the replies.
+"""
+
+
+# Imports
+import pytest
+from   ioUtilities import AdaptivePacing
+
+
+@pytest.fixture(autouse = True)
+def learnedGaps(monkeypatch):
+    """Start every test without learned gaps."""
+    monkeypatch.setattr(AdaptivePacing, 'learnedGaps', {})
+
+
+def test_gap_shrinks_to_floor():
+    pacing = AdaptivePacing('WLAN', floor = 0.005, gap = 0.01)
+    pacing.replyValid()
+    assert pacing.gap == pytest.approx(0.0095)
+    for _ in range(100):
+        pacing.replyValid()
+    assert pacing.gap == 0.005
+
+
+def test_gap_grows_to_ceiling():
+    pacing = AdaptivePacing('WLAN', floor = 0.005, gap = 0.01)
+    pacing.replyInvalid('GEP')
+    assert pacing.gap == pytest.approx(0.02)
+    for _ in range(10):
+        pacing.replyInvalid('GEP')
+    assert pacing.gap == pacing.ceiling
+
+
+def test_gap_kept_per_connection_and_model():
+    pacing = AdaptivePacing('WLAN', floor = 0.005, gap = 0.01)
+    pacing.useModel('0026')
+    pacing.replyInvalid('GEP')
+    pacing.replyInvalid('GEP')
+    assert AdaptivePacing.learnedGaps == {('WLAN', '0026'): pytest.approx(0.04)}
+
+    again = AdaptivePacing('WLAN', floor = 0.005, gap = 0.01)
+    again.useModel('0026')
+    assert again.gap == pytest.approx(0.04)
+    otherModel = AdaptivePacing('WLAN', floor = 0.005, gap = 0.01)
+    otherModel.useModel('0027')
+    assert otherModel.gap == 0.01
+    otherConnection = AdaptivePacing('USB', floor = 0.002, gap = 0.01)
+    otherConnection.useModel('0026')
+    assert otherConnection.gap == 0.01
+
+
+def test_gap_not_kept_before_model_known():
+    pacing = AdaptivePacing('WLAN', floor = 0.005, gap = 0.01)
+    pacing.replyInvalid('GEP')
+    assert AdaptivePacing.learnedGaps == {}
@@ -0,0 +1,40 @@
+"""
+Tests of the RA and DEC predicted between the polls by iOptronModel.Ioptron.predictRaAndDec.
+"""
+
+
+# Imports
+import pytest
+import iOptronModel
+from   iOptronModel import SIDEREAL_RATE, FULL_CIRCLE
+
+
+def connectTracking(mountConfig, trackingRate, customRate = '10000'):
+    """Connect a simulated mount tracking at the :RTn# code trackingRate and poll it once."""
+    config, simulator = mountConfig
+    simulator.mount.statusCode = '1'
+    simulator.mount.trackingRate = trackingRate
+    simulator.mount.customRate = customRate
+    mount = iOptronModel.Ioptron()
+    mount.getCustomTrackingRate()
+    assert mount.refreshStatusBatch(withStatus = True)
+    mount.scope.close()
+    return mount
+
+
+def movedInTenSeconds(mount):
+    snapshot = mount.snapshot
+    rightAscension, declination = mount.predictRaAndDec(snapshot.timestamp + 10)
+    assert declination == snapshot.declination
+    return (rightAscension - snapshot.rightAscension + FULL_CIRCLE / 2) % FULL_CIRCLE - FULL_CIRCLE / 2
+
+
+def test_sidereal_tracking_holds_ra(mountConfig):
+    mount = connectTracking(mountConfig, '0')
+    assert movedInTenSeconds(mount) == pytest.approx(0.0)
+
+
+def test_custom_tracking_rate(mountConfig):
+    mount = connectTracking(mountConfig, '4', customRate = '05000')
+    assert mount.tracking.custom == 0.5
+    assert movedInTenSeconds(mount) == pytest.approx(SIDEREAL_RATE * 0.5 * 100 * 10)
@@ -0,0 +1,54 @@
+"""
+Tests of the command table and the reply decoding of ioProtocol.
+"""
+
+
+# Imports
+import pytest
+import ioProtocol
+
+
+@pytest.mark.parametrize('reply, expected', [
+    # longitude, latitude, GPS, system status, tracking rate, moving speed, time source, hemisphere
+    ('+0360000050400000011531#', (10.0, 50.0, 0, '1', '1', '5', '3', '1')),
+    ('-0450000005400000270910#', (-12.5, -75.0, 2, '7', '0', '9', '1', '0')),
+])
+def test_parse_status(reply, expected):
+    status = ioProtocol.parseStatus(reply)
+    assert status.longitude == pytest.approx(expected[0])
+    assert status.latitude == pytest.approx(expected[1])
+    assert (status.gpsState, status.systemStatus, status.trackingRate, status.movingSpeed,
+            status.timeSource, status.hemisphere) == expected[2:]
+
+
+def test_status_descriptions():
+    status = ioProtocol.parseStatus('+0360000050400000151931#')
+    assert status.gpsAvailable and not status.gpsLocked
+    assert status.description == 'tracking with periodic error correction enabled'
+    assert status.systemState[1:4] == (False, True, True)
+    assert status.timeSourceDescription == 'GPS'
+    assert status.hemisphereLocation == 'north'
+
+
+def test_unknown_system_status():
+    status = ioProtocol.parseStatus('+0360000050400000091131#')
+    assert status.systemState == ioProtocol.UNKNOWN_STATE
+    assert status.description is None
+
+
+@pytest.mark.parametrize('reply', [
+    '',
+    '+036000005040000001153#',              # One digit short
+    '+0360000050400000011531#1',            # Behind the terminator
+    '*0360000050400000011531#',             # No sign
+    '+036000005040000001153x#',
+])
+def test_invalid_status(reply):
+    assert ioProtocol.parseStatus(reply) is None
+
+
+def test_mount_info_is_four_digits():
+    spec = ioProtocol.commandSpec(':MountInfo#')
+    assert ioProtocol.replyIsValid(spec, '0026')
+    assert not ioProtocol.replyIsValid(spec, '002x')
+    assert not ioProtocol.replyIsValid(spec, '26')
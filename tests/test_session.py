@@ -0,0 +1,88 @@
+"""
+Tests of the session recording and replay of ioUtilities, and of the settings
+sent again by iOptronModel.Ioptron after a reconnect.
+"""
+
+
+# Imports
+import socket
+import time
+import iOptronModel
+import ioUtilities
+
+
+def exchange(connection):
+    """The exchanges of a short session: queries, a batch and a stop."""
+    replies = [connection.query(':GEP#'), connection.query(':MountInfo#'),
+               connection.queryBatch([':GLS#', ':GAC#', ':GUT#'])]
+    connection.sendNow(':Q#')
+    replies.append(connection.query(':GAL#'))
+    return replies
+
+
+def test_record_and_replay(wlanConnection, tmp_path):
+    path = str(tmp_path / 'session.txt')
+    connection, simulator = wlanConnection()
+    recorder = ioUtilities.IoConnectionRecorder(connection, path)
+    recorded = exchange(recorder)
+    recorder.close()
+    replay = ioUtilities.IoConnectionReplay(path, speed = None)
+    assert exchange(replay) == recorded
+    assert replay.mismatches == 0
+
+
+def test_replay_session_of_file(wlanConnection, tmp_path):
+    path = str(tmp_path / 'session.txt')
+    connection, simulator = wlanConnection()
+    recorder = ioUtilities.IoConnectionRecorder(connection, path)
+    first = recorder.query(':GAL#')
+    recorder.close()
+    connection, simulator = wlanConnection()
+    recorder = ioUtilities.IoConnectionRecorder(connection, path)
+    simulator.mount.altitudeLimit = '+20'
+    second = recorder.query(':GAL#')
+    recorder.close()
+    assert len(ioUtilities.readSessions(path)) == 2
+    assert ioUtilities.IoConnectionReplay(path, session = 0, speed = None).query(':GAL#') == first
+    assert ioUtilities.IoConnectionReplay(path, speed = None).query(':GAL#') == second == '+20#'
+
+
+def test_replay_timing(wlanConnection, tmp_path):
+    path = str(tmp_path / 'session.txt')
+    connection, simulator = wlanConnection(latency = 0.1)
+    recorder = ioUtilities.IoConnectionRecorder(connection, path)
+    exchange(recorder)
+    recorder.close()
+    replay = ioUtilities.IoConnectionReplay(path, speed = 2.0)
+    startTime = time.monotonic()
+    exchange(replay)
+    assert time.monotonic() - startTime >= 0.2
+
+
+def test_settings_sent_again_after_reconnect(mountConfig, tmp_path):
+    config, simulator = mountConfig
+    config['RecordSession'] = str(tmp_path / 'session.txt')
+    mount = iOptronModel.Ioptron()
+    try:
+        simulator.mount.trackingRate = '2'
+        mount.getAllKindsOfStatus()
+        simulator.mount.trackingRate = '0'
+        simulator.mount.movingSpeed = 1
+        mount.scope.connection.connection.wlan.shutdown(socket.SHUT_RDWR)
+        for _ in range(50):
+            try:
+                mount.scope.query(':GEP#')
+            except ioUtilities.IoConnectionError:
+                pass
+            if mount.myMount.connectionStatus == 'online' and mount.scope.mountIsConnected:
+                break
+            time.sleep(0.05)
+        assert mount.myMount.connectionStatus == 'online'
+        assert mount.getAllKindsOfStatus()
+    finally:
+        mount.scope.close()
+    assert (simulator.mount.trackingRate, simulator.mount.movingSpeed) == ('2', 5)
+    session = ioUtilities.readSessions(config['RecordSession'])[-1]
+    sent = [data for seconds, direction, data in session if direction == '>']
+    # Connecting sent :SR5# in one write with the identity queries
+    assert ':RT2#' in sent[sent.index(':SR5#'):]
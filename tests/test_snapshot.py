@@ -0,0 +1,73 @@
+"""
+Tests of the MountSnapshot published after each poll and of the changes passed to the
+subscribers of iOptronModel.Ioptron.
+"""
+
+
+# Imports
+import dataclasses
+import pytest
+import iOptronModel
+
+
+@pytest.fixture
+def mount(mountConfig):
+    """Ioptron polled once from a simulated mount, not connected any more."""
+    mount = iOptronModel.Ioptron()
+    assert mount.refreshStatusBatch(withStatus = True)
+    mount.scope.close()
+    return mount
+
+
+def subscribed(mount, fields):
+    """Subscribe to fields and return the list the changes are collected in,
+    without those reported at once."""
+    changes = []
+    mount.subscribe(changes.append, fields)
+    changes.clear()
+    return changes
+
+
+def test_snapshot_is_immutable(mount):
+    snapshot = mount.snapshot
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.rightAscension = 0.0
+    assert not hasattr(snapshot, '__dict__')
+    with pytest.raises((AttributeError, TypeError)):
+        snapshot.extra = 1
+    assert mount.history[-1] is snapshot
+
+
+def test_change_below_threshold_suppressed(mount):
+    changes = subscribed(mount, ['rightAscension', 'declination'])
+    snapshot = mount.snapshot
+    threshold = iOptronModel.CHANGE_FIELDS['rightAscension']
+    mount.notifyChanges(dataclasses.replace(snapshot, rightAscension = snapshot.rightAscension + threshold / 2))
+    assert changes == []
+
+
+def test_change_above_threshold_delivered(mount):
+    changes = subscribed(mount, ['rightAscension'])
+    snapshot = mount.snapshot
+    threshold = iOptronModel.CHANGE_FIELDS['rightAscension']
+    moved = dataclasses.replace(snapshot, rightAscension = snapshot.rightAscension + threshold * 2)
+    mount.notifyChanges(moved)
+    assert changes == [iOptronModel.MountChange('rightAscension', snapshot.rightAscension,
+                                                moved.rightAscension, moved)]
+
+
+def test_small_moves_add_up(mount):
+    changes = subscribed(mount, ['declination'])
+    snapshot = mount.snapshot
+    threshold = iOptronModel.CHANGE_FIELDS['declination']
+    for step in (1, 2, 3):
+        mount.notifyChanges(dataclasses.replace(snapshot, declination = snapshot.declination + step * threshold * 0.4))
+    assert [change.new - change.old for change in changes] == [pytest.approx(threshold * 1.2)]
+
+
+def test_any_change_of_status_delivered(mount):
+    changes = subscribed(mount, ['pierSide'])
+    snapshot = mount.snapshot
+    flipped = dataclasses.replace(snapshot, pierSide = 'east' if snapshot.pierSide != 'east' else 'west')
+    mount.notifyChanges(flipped)
+    assert [(change.field, change.new) for change in changes] == [('pierSide', flipped.pierSide)]
@@ -0,0 +1,72 @@
+"""
+Emergency stops: the replies the mount still owes after a stop must not be taken
+for the replies of the next commands.
+"""
+
+
+# Imports
+import time
+import threading
+import pytest
+import ioProtocol
+import ioUtilities
+
+
+def assertValid(code, reply):
+    assert ioProtocol.replyIsValid(ioProtocol.COMMANDS[code], reply), reply
+
+
+@pytest.mark.parametrize('transport', ['usbConnection', 'wlanConnection'])
+def test_polls_after_idle_stop(request, transport):
+    connection, mount = request.getfixturevalue(transport)(latency = 0.005)
+    for stop in [':Q#', ':qR#'] * 10:
+        connection.sendNow(stop)
+        assertValid('GEP', connection.query(':GEP#'))
+
+
+@pytest.mark.parametrize('latency', [0.06, 0.1])
+@pytest.mark.parametrize('transport', ['usbConnection', 'wlanConnection'])
+def test_slow_stop_reply(request, transport, latency):
+    connection, mount = request.getfixturevalue(transport)(latency = latency)
+    connection.sendNow(':Q#')
+    assertValid('GEP', connection.query(':GEP#'))
+    assertValid('MountInfo', connection.query(':MountInfo#'))
+
+
+@pytest.mark.parametrize('transport', ['usbConnection', 'wlanConnection'])
+def test_stop_during_poll(request, transport):
+    connection, mount = request.getfixturevalue(transport)(latency = 0.06)
+    worker = ioUtilities.IoWorker(connection)
+    try:
+        for _ in range(3):
+            poll = worker.submitCall(connection.queryBatch, [':GLS#', ':GEP#', ':GAC#'])
+            time.sleep(0.03)            # The worker waits for the first reply
+            worker.emergencyStop(':Q#')
+            assert poll.result(timeout = 5)[0] == ''
+            assertValid('GEP', worker.query(':GEP#'))
+            assertValid('MountInfo', worker.query(':MountInfo#'))
+    finally:
+        worker.close()
+
+
+def test_stop_cancels_queued_motion(wlanConnection):
+    connection, mount = wlanConnection()
+    worker = ioUtilities.IoWorker(connection)
+    try:
+        started = threading.Event()
+        release = threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(5)
+        worker.submitCall(busy, priority = ioProtocol.PRIORITY_SET)
+        assert started.wait(5)
+        queuedMoves = [worker.submit(':mn#'), worker.submit(':mw#')]
+        worker.emergencyStop(':Q#')
+        laterMove = worker.submit(':ms#')
+        release.set()
+        assert laterMove.result(timeout = 5) == ''
+        assert all(move.cancelled() for move in queuedMoves)
+        assertValid('GEP', worker.query(':GEP#'))
+    finally:
+        worker.close()
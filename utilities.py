@@ -79,6 +79,15 @@ def getUtcTimeInJ2k():
     difference = utc - j2kTime
     return(int(difference.total_seconds() * 1000))
 
+def convertFormattedToJ2k(dtString):
+    """Convert a time formatted as DD.MM.YYYY, HH:MM:SS (UTC) to J2000 in ms."""
+    # 0 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16 17
+    # z z p z z p z z z z|z  z  p  z  z  p  z  z
+    dtutc = datetime(int(dtString[6:10]), int(dtString[3:5]), int(dtString[0:2]),
+                     int(dtString[10:12]), int(dtString[13:15]), int(dtString[16:18]))
+    difference = dtutc - datetime(2000, 1, 1, 12, 00)
+    return int(difference.total_seconds() * 1000)
+
 def offsetUtcTime(unix, offset):
     """Convert utc time into a time with the supplied timezone offset."""
     offsetSec = timedelta(minutes=abs(int(offset))).seconds
@@ -129,14 +138,12 @@ def checkValidFormat(datString,formatString):
 
     result = True
     try:
-        for i in range(0,len(formatString)-1):
+        for i in range(0,len(formatString)):
             if formatString[i] == 'v':
-                if datString[i] == '+' or datString[i] == '-':
-                    result = True
-                else:
+                if not(datString[i] == '+' or datString[i] == '-'):
                     result = False
             elif formatString[i] == 'z':
-                if not (datString[i].isdigit):
+                if not (datString[i].isdigit()):
                     result = False
             elif formatString[i] == 'd':
                 if datString[i] != '°':
@@ -189,6 +196,8 @@ def readConfig():
     configData['PollRefresh'] = config['STARTUP']['PollRefresh']
     configData['StartSpeed'] = config['STARTUP']['StartSpeed']
     configData['TrackAtStart'] = config['STARTUP']['TrackAtStart']
+    configData['RecordSession'] = config['STARTUP'].get('RecordSession', '')
+    configData['ConnectTimeout'] = config['STARTUP'].get('ConnectTimeout', '5')
     configData['Sidereal'] = config['TRACKINGRATES']['Sidereal']
     configData['Lunar'] = config['TRACKINGRATES']['Lunar']
     configData['Solar'] = config['TRACKINGRATES']['Solar']
@@ -220,6 +229,8 @@ def writeConfig(configData):
     config['STARTUP']['PollRefresh'] = configData.get('PollRefresh')
     config['STARTUP']['StartSpeed'] = configData.get('StartSpeed')
     config['STARTUP']['TrackAtStart'] = configData.get('TrackAtStart')
+    config['STARTUP']['RecordSession'] = configData.get('RecordSession', '')
+    config['STARTUP']['ConnectTimeout'] = configData.get('ConnectTimeout', '5')
     config.add_section('TRACKINGRATES')
     config['TRACKINGRATES']['Sidereal'] = configData.get('Sidereal')
     config['TRACKINGRATES']['Lunar'] = configData.get('Lunar')